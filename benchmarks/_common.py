@@ -0,0 +1,153 @@
+"""基准测试的公共工具"""
+from __future__ import annotations
+
+import asyncio
+import base64
+import json
+import time
+from typing import Any, Awaitable, Callable
+import urllib.parse
+
+from pyasn1.codec.der import encoder
+from pyasn1.type import univ
+import rsa
+from rsa.asn1 import OpenSSLPubKey
+
+BOT_ID = "bot_benchmark"
+SECRET = "benchmark_secret"
+
+
+def make_keypair(bits: int = 2048) -> tuple[str, rsa.PrivateKey]:
+    """生成密钥对，公钥为开放平台使用的 OpenSSL PEM 格式"""
+    pub, priv = rsa.newkeys(bits)
+    spki = OpenSSLPubKey()
+    spki["header"]["oid"] = univ.ObjectIdentifier("1.2.840.113549.1.1.1")
+    spki["header"]["parameters"] = univ.Null("")
+    spki["key"] = b"\x00" + pub.save_pkcs1("DER")
+    der = base64.encodebytes(encoder.encode(spki)).decode()
+    return f"-----BEGIN PUBLIC KEY-----\n{der}-----END PUBLIC KEY-----\n", priv
+
+
+def send_message_event(
+    text: str = "hello world",
+    *,
+    bot_id: str = BOT_ID,
+    event_id: str = "1",
+) -> dict[str, Any]:
+    """构造一个 SendMessage 回调事件"""
+    content = {
+        "content": {"text": text, "entities": []},
+        "user": {
+            "portraitUri": "https://example.com/avatar.png",
+            "extra": '{"member_roles": [], "state": {}}',
+            "name": "user",
+            "alias": "",
+            "id": "10001",
+            "portrait": "https://example.com/avatar.png",
+        },
+    }
+    return {
+        "robot": {
+            "template": {
+                "id": bot_id,
+                "name": "benchmark",
+                "desc": "",
+                "icon": "",
+                "commands": [],
+            },
+            "villa_id": 1,
+        },
+        "type": 2,
+        "extend_data": {
+            "EventData": {
+                "SendMessage": {
+                    "content": json.dumps(content),
+                    "from_user_id": 10001,
+                    "send_at": 1690000000000,
+                    "room_id": 1,
+                    "object_name": 1,
+                    "nickname": "user",
+                    "msg_uid": "C0000",
+                    "bot_msg_id": "",
+                    "quote_msg": None,
+                },
+            },
+        },
+        "created_at": 1690000000,
+        "id": event_id,
+        "send_at": 1690000000,
+    }
+
+
+def robot_event_frame(text: str = "hello world", event_id: str = "1") -> bytes:
+    """构造一个 WebSocket 推送的 SendMessage 事件帧"""
+    from hertavilla.ws.payload import Payload
+    from hertavilla.ws.pb.model_pb2 import RobotEvent
+    from hertavilla.ws.types import BizType, FlagType
+
+    event = send_message_event(text, event_id=event_id)
+    data = event["extend_data"]["EventData"]["SendMessage"]
+    message = RobotEvent(
+        id=event_id,
+        type=RobotEvent.EventType.SendMessage,
+        created_at=event["created_at"],
+        send_at=event["send_at"],
+    )
+    message.robot.villa_id = event["robot"]["villa_id"]
+    template = event["robot"]["template"]
+    message.robot.template.id = template["id"]
+    message.robot.template.name = template["name"]
+    message.robot.template.icon = "https://example.com/icon.png"
+    message.robot.template.commands.add(name="/help", desc="help")
+    info = message.extend_data.SendMessage
+    for key in ("content", "from_user_id", "send_at", "room_id", "nickname"):
+        setattr(info, key, data[key])
+    info.object_name = data["object_name"]
+    info.msg_uid = data["msg_uid"]
+    info.villa_id = message.robot.villa_id
+    return Payload.new(
+        BizType.EVENT,
+        1,
+        104,
+        FlagType.REQUEST,
+        message.SerializeToString(),
+    ).to_bytes()
+
+
+def callback_body(event: dict[str, Any]) -> str:
+    return json.dumps({"event": event})
+
+
+def sign(body: str, priv: rsa.PrivateKey, secret: str = SECRET) -> str:
+    """按开放平台的方式为回调签名"""
+    message = urllib.parse.urlencode({"body": body, "secret": secret})
+    return base64.b64encode(
+        rsa.sign(message.encode(), priv, "SHA-256"),
+    ).decode()
+
+
+def bench(func: Callable[[], Any], number: int, repeat: int = 5) -> float:
+    """执行 ``repeat`` 轮，每轮 ``number`` 次，返回最快一轮的平均耗时（秒）"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, time.perf_counter() - start)
+    return best / number
+
+
+async def abench(
+    func: Callable[[], Awaitable[Any]],
+    number: int,
+    concurrency: int = 1,
+) -> float:
+    """以 ``concurrency`` 的并发执行 ``number`` 次，返回每次的平均耗时（秒）"""
+    start = time.perf_counter()
+    for _ in range(number // concurrency):
+        await asyncio.gather(*(func() for _ in range(concurrency)))
+    return (time.perf_counter() - start) / number
+
+
+def report(name: str, seconds: float) -> None:
+    print(f"{name:<48} {seconds * 1e6:>10.1f} us/op {1 / seconds:>12.0f} op/s")
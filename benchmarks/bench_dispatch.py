@@ -0,0 +1,70 @@
+"""事件分发的基准测试
+
+比较遍历全部处理器（旧版 ``VillaBot.handle_event`` 的做法）与 ``EventDispatcher``
+按事件类型索引查找处理器、移除临时处理器的耗时。
+处理器平均分布在各事件类型上。
+
+    python benchmarks/bench_dispatch.py
+
+需要先安装本项目（如 ``pip install -e .``）。
+"""  # noqa: E501
+from __future__ import annotations
+
+from hertavilla.bot import Handler
+from hertavilla.dispatch import EventDispatcher
+from hertavilla.event import SendMessageEvent, events, parse_event
+
+from _common import bench, report, send_message_event
+
+NUMBER = 2000
+REPEAT = 5
+
+
+async def noop(*_) -> None:
+    ...
+
+
+def make_handlers(count: int) -> list[Handler]:
+    types = [cls_ for cls_, _ in events.values()]
+    return [Handler(types[i % len(types)], noop) for i in range(count)]
+
+
+def main() -> None:
+    event = parse_event(send_message_event())
+    temp = Handler(SendMessageEvent, noop, temp=True)
+    for count in (10, 100, 1000):
+        handlers = make_handlers(count)
+        dispatcher = EventDispatcher()
+        for handler in handlers:
+            dispatcher.add(handler)
+
+        def linear(handlers: list[Handler] = handlers) -> None:
+            list(filter(lambda x: x == event, handlers))
+
+        def indexed(dispatcher: EventDispatcher = dispatcher) -> None:
+            dispatcher.handlers_for(SendMessageEvent)
+
+        report(f"linear [{count} handlers]", bench(linear, NUMBER, REPEAT))
+        report(f"indexed [{count} handlers]", bench(indexed, NUMBER, REPEAT))
+
+        # 注册一个临时处理器后移除，模拟临时处理器被触发
+        def linear_temp(handlers: list[Handler] = handlers) -> None:
+            handlers.append(temp)
+            handlers.remove(temp)
+
+        def indexed_temp(dispatcher: EventDispatcher = dispatcher) -> None:
+            dispatcher.add(temp)
+            dispatcher.remove(temp)
+
+        report(
+            f"linear temp [{count} handlers]",
+            bench(linear_temp, NUMBER, REPEAT),
+        )
+        report(
+            f"indexed temp [{count} handlers]",
+            bench(indexed_temp, NUMBER, REPEAT),
+        )
+
+
+if __name__ == "__main__":
+    main()
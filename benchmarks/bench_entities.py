@@ -0,0 +1,104 @@
+"""消息 entity 解码的基准测试
+
+比较按 UTF-16 编码切片的旧实现与 ``entities_to_chain`` 将文本消息转换为消息链的耗时。
+
+    python benchmarks/bench_entities.py
+
+需要先安装本项目（如 ``pip install -e .``）。
+"""  # noqa: E501
+from __future__ import annotations
+
+import copy
+from typing import Any
+
+from hertavilla.message import MessageChain
+from hertavilla.message.entity import entities_to_chain
+from hertavilla.message.text import Text, entity_types
+from hertavilla.utils import _rc
+
+from _common import bench, report
+
+NUMBER = 2000
+REPEAT = 50
+
+
+def legacy_parse_content(text: str, entities: list[Any]) -> MessageChain:
+    """旧版 ``MessageContent.parse_content`` 的实现"""
+    chain = MessageChain()
+    encoded = text.encode("utf-16")
+    end_offset = 0
+    for entity in entities:
+        offset = entity["offset"]
+        body = entity["entity"]
+        type_ = body.pop("type")
+        if offset != end_offset:
+            chain.append(
+                Text(encoded[_rc(end_offset) : _rc(offset)].decode("utf-16")),
+            )
+        chain.append(entity_types[type_](**body))
+        end_offset = offset + entity["length"]
+    if _rc(end_offset) != len(encoded):
+        chain.append(Text(encoded[_rc(end_offset) :].decode("utf-16")))
+    return chain
+
+
+def make_content(prefix: str, mentions: int) -> tuple[str, list[Any]]:
+    texts: list[str] = []
+    entities: list[Any] = []
+    offset = 0
+    for i in range(mentions):
+        texts.append(prefix)
+        offset += len(prefix.encode("utf-16-le")) // 2
+        mention = f"@user{i} "
+        entities.append(
+            {
+                "offset": offset,
+                "length": len(mention),
+                "entity": {"type": "mentioned_user", "user_id": str(i)},
+            },
+        )
+        texts.append(mention)
+        offset += len(mention)
+    texts.append(prefix)
+    return "".join(texts), entities
+
+
+def main() -> None:
+    for label, prefix in (("ascii", "hello "), ("emoji", "你好😊 ")):
+        for mentions in (1, 8):
+            text, entities = make_content(prefix, mentions)
+            # 旧实现会修改 entity，预先复制，避免复制的耗时计入结果
+            copies = iter(
+                [copy.deepcopy(entities) for _ in range(NUMBER * REPEAT)],
+            )
+            legacy = current = float("inf")
+            # 两种实现交替执行多轮，减少机器负载波动的影响
+            for _ in range(REPEAT):
+                legacy = min(
+                    legacy,
+                    bench(
+                        lambda t=text, c=copies: legacy_parse_content(
+                            t,
+                            next(c),
+                        ),
+                        NUMBER,
+                        1,
+                    ),
+                )
+                current = min(
+                    current,
+                    bench(
+                        lambda t=text, e=entities: entities_to_chain(t, e),
+                        NUMBER,
+                        1,
+                    ),
+                )
+            report(f"legacy [{label}, {mentions} entities]", legacy)
+            report(
+                f"entities_to_chain [{label}, {mentions} entities]",
+                current,
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""事件 worker 池的基准测试
+
+模拟突发的大量事件，比较为每个事件创建任务（未配置 ``event_pool`` 时的做法）
+与 ``EventWorkerPool`` 的平均耗时与峰值内存。事件处理器模拟 1ms 的 I/O。
+
+    python benchmarks/bench_event_pool.py
+
+需要先安装本项目（如 ``pip install -e .``）。
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+import tracemalloc
+from typing import Any
+
+from hertavilla.dispatch import EventWorkerPool
+from hertavilla.metrics import MetricsRegistry
+
+from _common import report
+
+EVENTS = 20000
+
+
+class FakeBot:
+    bot_id = "bot_benchmark"
+
+    async def handle_event(self, event: Any) -> None:
+        await asyncio.sleep(0.001)
+
+
+async def unbounded(bot: FakeBot) -> None:
+    tasks = set()
+    for i in range(EVENTS):
+        task = asyncio.create_task(bot.handle_event(i))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+    await asyncio.gather(*tasks)
+
+
+async def pooled(bot: FakeBot, workers: int) -> None:
+    pool = EventWorkerPool(workers, maxsize=1024, registry=MetricsRegistry())
+    for i in range(EVENTS):
+        # WebSocket 连接的做法，队列满时等待
+        await pool.put(bot, i)  # type: ignore
+    await pool.close()
+
+
+def run(name: str, coro: Any) -> None:
+    tracemalloc.start()
+    start = time.perf_counter()
+    asyncio.run(coro)
+    seconds = (time.perf_counter() - start) / EVENTS
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    report(name, seconds)
+    print(f"{'':<48} peak memory {peak / 1024 / 1024:>8.1f} MiB")
+
+
+def main() -> None:
+    bot = FakeBot()
+    run("create_task per event", unbounded(bot))
+    for workers in (64, 256):
+        run(f"EventWorkerPool [{workers} workers]", pooled(bot, workers))
+
+
+if __name__ == "__main__":
+    main()
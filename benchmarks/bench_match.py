@@ -0,0 +1,103 @@
+"""消息匹配的基准测试
+
+比较逐个调用 ``Match.check``（旧版 ``VillaBot.message_handler`` 的做法）
+与 ``CompiledMatcher`` 一次找出匹配的消息处理器的耗时。
+匹配规则为命令前缀、后缀、关键词与正则表达式的混合。
+另外比较了相等匹配规则共享结果、纯文本缓存的效果。
+
+    python benchmarks/bench_match.py
+
+需要先安装本项目（如 ``pip install -e .``）。
+"""
+from __future__ import annotations
+
+from hertavilla.match import (
+    CompiledMatcher,
+    Endswith,
+    Keywords,
+    Match,
+    Regex,
+    Startswith,
+)
+from hertavilla.message import MessageChain
+from hertavilla.message.text import Text
+
+from _common import bench, report
+
+NUMBER = 2000
+REPEAT = 5
+
+
+def make_matches(count: int) -> list[Match]:
+    kinds = [
+        lambda i: Startswith(f"/command{i}"),
+        lambda i: Endswith(f"suffix{i}"),
+        lambda i: Keywords(f"keyword{i}", f"word{i}"),
+        lambda i: Regex(rf"/regex{i} (\d+)"),
+    ]
+    return [kinds[i % len(kinds)](i) for i in range(count)]
+
+
+def main() -> None:
+    chain = MessageChain("/command8 hello world")
+    for count in (10, 100, 1000):
+        matches = make_matches(count)
+        matcher: CompiledMatcher[int] = CompiledMatcher()
+        for i, match in enumerate(matches):
+            matcher.add(i, match)
+
+        # 每次都清空消息链的缓存，模拟新收到的消息
+        def linear(matches: list[Match] = matches) -> None:
+            chain.invalidate()
+            for match in matches:
+                match.check(chain)
+
+        def compiled(matcher: CompiledMatcher[int] = matcher) -> None:
+            chain.invalidate()
+            matcher.matches(chain)
+
+        report(f"check [{count} handlers]", bench(linear, NUMBER, REPEAT))
+        report(
+            f"CompiledMatcher [{count} handlers]",
+            bench(compiled, NUMBER, REPEAT),
+        )
+
+    bench_shared_patterns()
+    bench_plaintext()
+
+
+def bench_shared_patterns() -> None:
+    # 多个处理器使用相等的匹配规则时，每条消息上只计算一次
+    chain = MessageChain("hello world " * 8)
+    matches = [Keywords("hello", "world") for _ in range(100)]
+
+    def uncached() -> None:
+        for match in matches:
+            chain.invalidate()
+            match.check(chain)
+
+    def memoized() -> None:
+        chain.invalidate()
+        for match in matches:
+            match.check(chain)
+
+    report("Keywords x100 [uncached]", bench(uncached, NUMBER, REPEAT))
+    report("Keywords x100 [memoized]", bench(memoized, NUMBER, REPEAT))
+
+
+def bench_plaintext() -> None:
+    chain = MessageChain([Text(f"segment{i} ") for i in range(20)])
+
+    def uncached() -> None:
+        chain.invalidate()
+        chain.plaintext  # noqa: B018
+
+    def cached() -> None:
+        chain.plaintext  # noqa: B018
+
+    report("plaintext [uncached]", bench(uncached, NUMBER * 10, REPEAT))
+    report("plaintext [cached]", bench(cached, NUMBER * 10, REPEAT))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""事件解析的基准测试
+
+比较 ``parse_event`` 完整解析、延迟解析（``lazy=True``）
+与 ``parse_event_fast`` 的耗时，以及解析后访问消息链的耗时。
+
+    python benchmarks/bench_parse.py
+
+需要先安装本项目（如 ``pip install -e .``）。
+"""
+from __future__ import annotations
+
+import copy
+import logging
+
+from hertavilla.decoder import parse_event_fast
+from hertavilla.event import EventParser, SendMessageEvent, parse_event
+
+from _common import bench, report, send_message_event
+
+NUMBER = 5000
+REPEAT = 5
+
+
+def bench_parser(parser: EventParser, lazy: bool, message: bool) -> float:
+    payload = send_message_event("hello world " * 8)
+    # 解析会修改事件数据，预先复制，避免复制的耗时计入结果
+    payloads = iter(
+        [copy.deepcopy(payload) for _ in range(NUMBER * REPEAT)],
+    )
+
+    def parse() -> None:
+        event = parser(next(payloads), lazy)
+        if message:
+            assert isinstance(event, SendMessageEvent)
+            event.message  # noqa: B018
+
+    return bench(parse, NUMBER, REPEAT)
+
+
+def main() -> None:
+    logging.disable(logging.INFO)
+    parsers: dict[str, EventParser] = {
+        "parse_event": parse_event,
+        "parse_event_fast": parse_event_fast,
+    }
+    for name, parser in parsers.items():
+        for lazy in (False, True):
+            label = f"{name} [lazy]" if lazy else name
+            report(label, bench_parser(parser, lazy, message=False))
+            report(
+                f"{label} + message",
+                bench_parser(parser, lazy, message=True),
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""回调签名校验的基准测试
+
+比较 ``rsa`` 与 ``cryptography`` 校验后端，以及是否在线程池中校验，
+在 ``BaseBackend._run_handles`` 路径上的吞吐量。
+
+    python benchmarks/bench_verify.py
+
+需要先安装本项目（如 ``pip install -e .``）。
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+
+from hertavilla.bot import VillaBot
+from hertavilla.dedupe import EventDeduplicator
+from hertavilla.server.aiohttp import AIOHTTPBackend
+from hertavilla.verify import CryptographyVerifier, RSAVerifier, Verifier
+
+from _common import (
+    BOT_ID,
+    SECRET,
+    abench,
+    bench,
+    callback_body,
+    make_keypair,
+    report,
+    send_message_event,
+    sign,
+)
+
+NUMBER = 2000
+CONCURRENCY = 50
+
+
+def verifiers(pub_key: str) -> list[Verifier]:
+    result: list[Verifier] = [RSAVerifier(pub_key)]
+    try:
+        result.append(CryptographyVerifier(pub_key))
+    except ImportError:
+        print("cryptography isn't installed, skip it")
+    return result
+
+
+async def bench_run_handles(
+    pub_key: str,
+    verifier: Verifier,
+    verify_in_executor: bool,
+    sign_: str,
+    body: str,
+) -> float:
+    bot = VillaBot(
+        BOT_ID,
+        SECRET,
+        pub_key,
+        verifier=verifier,
+        verify_in_executor=verify_in_executor,
+        # 每次都是同一个事件，关闭去重以测量完整的处理路径
+        deduplicator=EventDeduplicator(maxsize=0),
+    )
+    backend = AIOHTTPBackend()
+    backend.bots[bot.bot_id] = bot
+
+    async def run() -> None:
+        resp = await backend._run_handles(sign_, body)  # noqa: SLF001
+        assert resp.retcode == 0, resp
+
+    result = await abench(run, NUMBER, CONCURRENCY)
+    await asyncio.sleep(0)  # 让事件处理任务结束
+    return result
+
+
+def main() -> None:
+    logging.disable(logging.INFO)
+    pub_key, priv = make_keypair()
+    body = callback_body(send_message_event())
+    sign_ = sign(body, priv)
+
+    bot = VillaBot(BOT_ID, SECRET, pub_key)
+    for verifier in verifiers(pub_key):
+        bot.verifier = verifier
+        assert bot.verify(sign_, body)
+        report(
+            f"verify [{verifier.name}]",
+            bench(lambda: bot.verify(sign_, body), NUMBER),
+        )
+    for verifier in verifiers(pub_key):
+        for in_executor in (False, True):
+            seconds = asyncio.run(
+                bench_run_handles(pub_key, verifier, in_executor, sign_, body),
+            )
+            report(
+                f"_run_handles [{verifier.name}, executor={in_executor}]",
+                seconds,
+            )
+
+
+if __name__ == "__main__":
+    main()
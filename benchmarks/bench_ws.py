@@ -0,0 +1,80 @@
+"""WebSocket 事件解析的基准测试
+
+比较 ``WSConn.recv`` 中事件帧的几种处理方式，
+``MessageToDict`` 后交给 ``parse_event`` / ``parse_event_fast``，
+以及由 protobuf 直接转换的 ``event_from_proto``。
+
+    python benchmarks/bench_ws.py
+
+需要先安装本项目（如 ``pip install -e .``）。
+"""
+from __future__ import annotations
+
+import logging
+from typing import Callable
+
+from hertavilla.decoder import parse_event_fast
+from hertavilla.event import Event, EventParser, parse_event
+from hertavilla.ws.convert import event_from_proto
+from hertavilla.ws.payload import Payload
+from hertavilla.ws.pb.model_pb2 import RobotEvent
+
+from _common import bench, report, robot_event_frame
+from google.protobuf.json_format import MessageToDict
+
+NUMBER = 5000
+
+
+def via_dict(parser: EventParser, lazy: bool) -> Callable[[bytes], Event]:
+    def parse(frame: bytes) -> Event:
+        message = RobotEvent().FromString(Payload.from_bytes(frame).body)
+        return parser(
+            MessageToDict(
+                message,
+                preserving_proto_field_name=True,
+                use_integers_for_enums=True,
+            ),
+            lazy,
+        )
+
+    return parse
+
+
+def direct(lazy: bool) -> Callable[[bytes], Event]:
+    def parse(frame: bytes) -> Event:
+        message = RobotEvent().FromString(Payload.from_bytes(frame).body)
+        return event_from_proto(message, lazy)
+
+    return parse
+
+
+def bench_frames(
+    parse: Callable[[bytes], Event],
+    frames: list[bytes],
+) -> float:
+    index = iter(range(NUMBER * 5))
+    return bench(lambda: parse(frames[next(index) % len(frames)]), NUMBER)
+
+
+def main() -> None:
+    logging.disable(logging.INFO)
+    frames = [
+        robot_event_frame("hello world " * (i % 8 + 1), str(i))
+        for i in range(64)
+    ]
+    for lazy in (False, True):
+        suffix = " [lazy]" if lazy else ""
+        paths = {
+            "MessageToDict + parse_event": via_dict(parse_event, lazy),
+            "MessageToDict + parse_event_fast": via_dict(
+                parse_event_fast,
+                lazy,
+            ),
+            "event_from_proto": direct(lazy),
+        }
+        for name, parse in paths.items():
+            report(name + suffix, bench_frames(parse, frames))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,314 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from dataclasses import dataclass
+import logging
+import time
+from typing import TYPE_CHECKING, Any, Optional, Tuple
+
+if TYPE_CHECKING:
+    from hertavilla.event import Event
+
+logger = logging.getLogger("hertavilla.api.cache")
+
+CacheKey = Tuple[str, Optional[int], Tuple[Tuple[str, Any], ...]]
+Generation = Tuple[int, int, int]
+
+DEFAULT_TTLS: dict[str, float] = {
+    "/getMember": 60,
+    "/getRoom": 300,
+    "/getVilla": 300,
+    "/getVillaMemberRoles": 60,
+    "/getMemberRoleInfo": 60,
+    "/getGroupList": 300,
+    "/getVillaGroupRoomList": 300,
+    "/getAllEmoticons": 3600,
+}
+"""各查询 API 的默认缓存时间（秒）"""
+
+INVALIDATIONS: dict[str, tuple[tuple[str, dict[str, str]], ...]] = {
+    "/editRoom": (
+        ("/getRoom", {"room_id": "room_id"}),
+        ("/getVillaGroupRoomList", {}),
+    ),
+    "/deleteRoom": (
+        ("/getRoom", {"room_id": "room_id"}),
+        ("/getVillaGroupRoomList", {}),
+    ),
+    "/createGroup": (("/getGroupList", {}), ("/getVillaGroupRoomList", {})),
+    "/editGroup": (("/getGroupList", {}), ("/getVillaGroupRoomList", {})),
+    "/deleteGroup": (("/getGroupList", {}), ("/getVillaGroupRoomList", {})),
+    "/operateMemberToRole": (
+        ("/getMember", {"uid": "uid"}),
+        ("/getMemberRoleInfo", {"role_id": "role_id"}),
+        ("/getVillaMemberRoles", {}),
+    ),
+    "/createMemberRole": (("/getVillaMemberRoles", {}),),
+    "/editMemberRole": (
+        ("/getMemberRoleInfo", {"role_id": "id"}),
+        ("/getVillaMemberRoles", {}),
+        # 用户信息中包含身份组详情
+        ("/getMember", {}),
+    ),
+    "/deleteMemberRole": (
+        ("/getMemberRoleInfo", {"role_id": "id"}),
+        ("/getVillaMemberRoles", {}),
+        ("/getMember", {}),
+    ),
+    "/deleteVillaMember": (
+        ("/getMember", {"uid": "uid"}),
+        ("/getVillaMemberRoles", {}),
+    ),
+}
+"""修改类 API 调用成功后需要失效的查询 API
+
+值为 (查询 API, {查询参数名: 修改 API 的参数名}) 列表，
+参数为空时失效该大别野下此查询 API 的全部缓存
+"""
+
+
+@dataclass
+class CacheStats:
+    """缓存命中统计"""
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    """因容量或过期被淘汰的条目数"""
+    invalidations: int = 0
+    """因修改或事件被失效的条目数"""
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0
+
+
+class _Missing:
+    def __repr__(self) -> str:
+        return "MISSING"
+
+
+MISSING: Any = _Missing()
+
+
+def _villa(villa_id: int | str | None) -> int | None:
+    # 部分调用以字符串传入大别野 id
+    return None if villa_id is None else int(villa_id)
+
+
+def _match(params: tuple[tuple[str, Any], ...], match: dict[str, Any]) -> bool:
+    params_ = dict(params)
+    return all(
+        k in params_ and str(params_[k]) == str(v) for k, v in match.items()
+    )
+
+
+class APICache:
+    """查询 API 的 TTL + LRU 缓存
+
+    缓存以 (API 路径, 大别野 id, 查询参数) 为键，保存 API 返回的 ``data``。
+
+    Args:
+        maxsize (int, optional): 最大缓存条目数，超过时淘汰最久未使用的条目. Defaults to 1024.
+        ttls (dict[str, float] | None, optional): 覆盖 ``DEFAULT_TTLS`` 中各 API 的缓存时间，设为 0 时不缓存该 API. Defaults to None.
+    """  # noqa: E501
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        ttls: dict[str, float] | None = None,
+    ) -> None:
+        self.maxsize = maxsize
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.stats: dict[str, CacheStats] = {}
+        self._data: OrderedDict[CacheKey, tuple[float, Any]] = OrderedDict()
+        self._index: dict[tuple[str, int | None], set[CacheKey]] = {}
+        # 失效缓存时递增，用于丢弃失效前发起的查询结果
+        self._generations: dict[tuple[str, int | None], int] = {}
+        self._villa_generations: dict[int | None, int] = {}
+        self._epoch = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def _stats(self, api: str) -> CacheStats:
+        if (stats := self.stats.get(api)) is None:
+            stats = self.stats[api] = CacheStats()
+        return stats
+
+    def cacheable(self, api: str) -> bool:
+        return bool(self.ttls.get(api))
+
+    def get(
+        self,
+        api: str,
+        villa_id: int | None,
+        params: tuple[tuple[str, Any], ...] = (),
+    ) -> Any:
+        """获取缓存
+
+        Returns:
+            Any: 缓存的数据，未命中时为 ``MISSING``
+        """
+        key = (api, _villa(villa_id), params)
+        stats = self._stats(api)
+        if (item := self._data.get(key)) is None:
+            stats.misses += 1
+            return MISSING
+        expires, value = item
+        if expires < time.monotonic():
+            self._remove(key)
+            stats.evictions += 1
+            stats.misses += 1
+            return MISSING
+        self._data.move_to_end(key)
+        stats.hits += 1
+        return value
+
+    def generation(self, api: str, villa_id: int | None) -> Generation:
+        """获取查询 API 在大别野下的缓存代数，失效相关缓存时改变
+
+        Returns:
+            Generation: 缓存代数
+        """
+        villa = _villa(villa_id)
+        return (
+            self._epoch,
+            self._villa_generations.get(villa, 0),
+            self._generations.get((api, villa), 0),
+        )
+
+    def set(  # noqa: A003
+        self,
+        api: str,
+        villa_id: int | None,
+        params: tuple[tuple[str, Any], ...],
+        value: Any,
+        generation: Generation | None = None,
+    ) -> None:
+        """写入缓存
+
+        Args:
+            generation (Generation | None, optional): 发起查询前的缓存代数，此后相关缓存被失效过时不写入. Defaults to None.
+        """  # noqa: E501
+        if not (ttl := self.ttls.get(api)):
+            return
+        if generation is not None and generation != self.generation(
+            api,
+            villa_id,
+        ):
+            logger.debug(f"Discarded stale result of {api}")
+            return
+        key = (api, _villa(villa_id), params)
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        self._index.setdefault((key[0], key[1]), set()).add(key)
+        while len(self._data) > self.maxsize:
+            old_key, _ = self._data.popitem(last=False)
+            self._unindex(old_key)
+            self._stats(old_key[0]).evictions += 1
+
+    def _unindex(self, key: CacheKey) -> None:
+        index_key = (key[0], key[1])
+        if keys := self._index.get(index_key):
+            keys.discard(key)
+            if not keys:
+                del self._index[index_key]
+
+    def _remove(self, key: CacheKey) -> None:
+        self._data.pop(key, None)
+        self._unindex(key)
+
+    def invalidate(
+        self,
+        api: str,
+        villa_id: int | None = None,
+        **params: Any,
+    ) -> int:
+        """失效缓存
+
+        Args:
+            api (str): API 路径
+            villa_id (int | None, optional): 大别野 id. Defaults to None.
+            **params: 仅失效查询参数与之相同的条目，为空时失效该大别野下此 API 的全部条目
+
+        Returns:
+            int: 被失效的条目数
+        """  # noqa: E501
+        # 进行中的查询尚无缓存条目，以 API 与大别野为单位递增代数
+        index_key = (api, _villa(villa_id))
+        self._generations[index_key] = self._generations.get(index_key, 0) + 1
+        keys = [
+            key
+            for key in self._index.get(index_key, ())
+            if _match(key[2], params)
+        ]
+        for key in keys:
+            self._remove(key)
+        if keys:
+            self._stats(api).invalidations += len(keys)
+            logger.debug(f"Invalidated {len(keys)} cache entries of {api}")
+        return len(keys)
+
+    def invalidate_villa(self, villa_id: int) -> int:
+        """失效大别野下的全部缓存
+
+        Args:
+            villa_id (int): 大别野 id
+
+        Returns:
+            int: 被失效的条目数
+        """
+        generation = self._villa_generations.get(_villa(villa_id), 0)
+        self._villa_generations[_villa(villa_id)] = generation + 1
+        return sum(
+            self.invalidate(api, villa_id)
+            for api, villa in list(self._index)
+            if villa == _villa(villa_id)
+        )
+
+    def invalidate_mutation(
+        self,
+        api: str,
+        villa_id: int | None,
+        data: dict[str, Any] | None,
+    ) -> None:
+        """根据修改类 API 的调用失效相关缓存
+
+        Args:
+            api (str): 修改类 API 路径
+            villa_id (int | None): 大别野 id
+            data (dict[str, Any] | None): 调用参数
+        """
+        data = data or {}
+        for read_api, param_map in INVALIDATIONS.get(api, ()):
+            self.invalidate(
+                read_api,
+                villa_id,
+                **{k: data[v] for k, v in param_map.items() if v in data},
+            )
+
+    def invalidate_event(self, event: Event) -> None:
+        """根据事件失效相关缓存
+
+        Args:
+            event (Event): 事件
+        """
+        from hertavilla.event import (
+            CreateRobotEvent,
+            DeleteRobotEvent,
+            JoinVillaEvent,
+        )
+
+        villa_id = event.villa_id
+        if isinstance(event, JoinVillaEvent):
+            self.invalidate("/getMember", villa_id, uid=event.join_uid)
+            self.invalidate("/getVillaMemberRoles", villa_id)
+        elif isinstance(event, (CreateRobotEvent, DeleteRobotEvent)):
+            self.invalidate_villa(villa_id)
+
+    def clear(self) -> None:
+        self._epoch += 1
+        self._data.clear()
+        self._index.clear()
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+import time
+
+from hertavilla.metrics import MetricsRegistry, default_registry
+
+
+@dataclass
+class APICall:
+    """一次 HTTP API 调用（重试时每次尝试各为一次调用）"""
+
+    bot_id: str
+    api: str
+    """API 路径"""
+    method: str
+    villa_id: int | None = None
+    start: float = 0
+    """发出请求的时间（``time.perf_counter``）"""
+    end: float = 0
+    """请求结束的时间（``time.perf_counter``）"""
+    rate_limit_wait: float | None = None
+    """在限速器中排队的时间（秒），未配置限速器时为 None"""
+    status: int | None = None
+    """HTTP 状态码，未收到响应时为 None"""
+    retcode: int | None = None
+    """返回的 retcode，未解析到时为 None"""
+    bytes_sent: int = 0
+    bytes_received: int = 0
+    error: BaseException | None = None
+    """调用失败时的异常"""
+
+    @property
+    def duration(self) -> float:
+        """请求耗时（秒），不包括限速排队时间"""
+        return (self.end or time.perf_counter()) - self.start
+
+
+class APIHook:
+    """API 调用钩子，重写需要的方法即可
+
+    钩子在事件循环中同步调用，应避免耗时操作；钩子中抛出的异常会被记录并忽略。
+    """
+
+    def on_request(self, call: APICall) -> None:
+        """请求发出前调用"""
+
+    def on_response(self, call: APICall) -> None:
+        """请求结束（包括失败）后调用"""
+
+
+class MetricsHook(APIHook):
+    """将 API 调用记录到指标注册表
+
+    Args:
+        registry (MetricsRegistry, optional): 指标注册表. Defaults to default_registry.
+    """  # noqa: E501
+
+    def __init__(self, registry: MetricsRegistry = default_registry) -> None:
+        labels = ("bot", "api")
+        self.requests = registry.counter(
+            "hertavilla_api_requests_total",
+            "Villa API requests by HTTP status and retcode",
+            (*labels, "status", "retcode"),
+        )
+        self.exceptions = registry.counter(
+            "hertavilla_api_exceptions_total",
+            "Villa API requests failed with an exception",
+            (*labels, "exception"),
+        )
+        self.latency = registry.histogram(
+            "hertavilla_api_request_duration_seconds",
+            "Villa API request latency",
+            labels,
+        )
+        self.rate_limit_wait = registry.histogram(
+            "hertavilla_api_rate_limit_wait_seconds",
+            "Time spent waiting for the client side rate limiter",
+            labels,
+        )
+        self.bytes_sent = registry.counter(
+            "hertavilla_api_sent_bytes_total",
+            "Bytes of Villa API request bodies",
+            labels,
+        )
+        self.bytes_received = registry.counter(
+            "hertavilla_api_received_bytes_total",
+            "Bytes of Villa API response bodies",
+            labels,
+        )
+        self.in_flight = registry.gauge(
+            "hertavilla_api_in_flight_requests",
+            "Villa API requests waiting for a response",
+            labels,
+        )
+
+    def on_request(self, call: APICall) -> None:
+        self.in_flight.inc(bot=call.bot_id, api=call.api)
+        if call.rate_limit_wait is not None:
+            self.rate_limit_wait.observe(
+                call.rate_limit_wait,
+                bot=call.bot_id,
+                api=call.api,
+            )
+
+    def on_response(self, call: APICall) -> None:
+        labels = {"bot": call.bot_id, "api": call.api}
+        self.in_flight.dec(**labels)
+        self.latency.observe(call.duration, **labels)
+        self.requests.inc(
+            status="" if call.status is None else call.status,
+            retcode="" if call.retcode is None else call.retcode,
+            **labels,
+        )
+        self.bytes_sent.inc(call.bytes_sent, **labels)
+        self.bytes_received.inc(call.bytes_received, **labels)
+        if call.error is not None:
+            self.exceptions.inc(
+                exception=call.error.__class__.__name__,
+                **labels,
+            )
@@ -1,16 +1,17 @@
 from __future__ import annotations
 
+import asyncio
 from hashlib import md5
 from io import BytesIO
 from pathlib import Path
 from typing import Literal
 
-from hertavilla.apis.internal import _BaseAPIMixin
-from hertavilla.exception import HTTPStatusError
+from hertavilla.apis.internal import _BaseAPIMixin, api_timeouts
+from hertavilla.exception import APITimeoutError, HTTPStatusError
 from hertavilla.model import UploadParams
 from hertavilla.utils import CustomFormData
 
-from aiohttp import ClientSession
+from aiohttp import ClientTimeout
 
 
 class ImgAPIMixin(_BaseAPIMixin):
@@ -90,14 +91,20 @@ class ImgAPIMixin(_BaseAPIMixin):
             },
         )
         form.add_field("file", image)
-        async with ClientSession() as session:
+        budget = self._timeout_budget("/oss")
+        session = await self.http_session.get()
+        try:
             async with session.post(
                 params["params"]["host"],
                 data=form,
+                timeout=ClientTimeout(total=budget),
             ) as resp:
                 if not resp.ok:
                     raise HTTPStatusError(resp.status)
                 return (await resp.json())["data"]["url"]
+        except asyncio.TimeoutError as e:
+            api_timeouts.inc(bot=self.bot_id, api="/oss")
+            raise APITimeoutError("/oss", budget) from e
 
     async def upload_image(
         self,
@@ -1,20 +1,724 @@
 from __future__ import annotations
 
+import asyncio
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from enum import Enum
 import hashlib
 import hmac
+import json
 import logging
-from typing import Any, Literal
+import random
+import time
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Generic,
+    Hashable,
+    Iterator,
+    Literal,
+    Sequence,
+    TypeVar,
+)
 
+from hertavilla.apis.cache import MISSING, APICache
+from hertavilla.apis.hooks import APICall, APIHook, MetricsHook
+from hertavilla.apis.priority import Priority, PriorityScheduler, use_priority
 from hertavilla.exception import (
+    APITimeoutError,
+    CallingApiException,
+    CircuitOpenError,
     HTTPStatusError,
     raise_exception,
+    retryable_retcodes,
 )
+from hertavilla.metrics import default_registry
 
-from aiohttp import ClientSession
+from aiohttp import (
+    ClientConnectionError,
+    ClientConnectorError,
+    ClientResponse,
+    ClientSession,
+    ClientTimeout,
+    TCPConnector,
+)
 
 logger = logging.getLogger("hertavilla.api")
 BASE_API = "https://bbs-api.miyoushe.com/vila/api/bot/platform"
 
+T = TypeVar("T")
+
+COALESCED_APIS = frozenset(
+    {
+        "/getMember",
+        "/getRoom",
+        "/getVilla",
+        "/getVillaMemberRoles",
+        "/getGroupList",
+        "/getAllEmoticons",
+    },
+)
+"""可合并并发请求的幂等 GET API"""
+
+
+class HTTPSession:
+    """长连接 HTTP 会话
+
+    在多次 API 调用之间复用同一个 ``aiohttp.ClientSession`` 及其连接池，
+    可在多个 Bot 之间共享。会话在首次使用时于当前事件循环中创建，
+    调用 ``close`` 后再次使用会重新创建。
+
+    Args:
+        limit (int, optional): 连接池总连接数上限，0 为不限制. Defaults to 100.
+        limit_per_host (int, optional): 单个 host 的连接数上限，0 为不限制. Defaults to 0.
+        keepalive_timeout (float, optional): 空闲连接保活时间（秒）. Defaults to 30.
+        ttl_dns_cache (int | None, optional): DNS 缓存时间（秒），None 为永久缓存. Defaults to 300.
+        use_dns_cache (bool, optional): 是否启用 DNS 缓存. Defaults to True.
+    """  # noqa: E501
+
+    def __init__(
+        self,
+        *,
+        limit: int = 100,
+        limit_per_host: int = 0,
+        keepalive_timeout: float = 30,
+        ttl_dns_cache: int | None = 300,
+        use_dns_cache: bool = True,
+    ) -> None:
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.ttl_dns_cache = ttl_dns_cache
+        self.use_dns_cache = use_dns_cache
+        self._session: ClientSession | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    @property
+    def closed(self) -> bool:
+        return self._session is None or self._session.closed
+
+    def _make_connector(self) -> TCPConnector:
+        return TCPConnector(
+            limit=self.limit,
+            limit_per_host=self.limit_per_host,
+            keepalive_timeout=self.keepalive_timeout,
+            ttl_dns_cache=self.ttl_dns_cache,
+            use_dns_cache=self.use_dns_cache,
+        )
+
+    async def get(self) -> ClientSession:
+        """获取会话，不存在或已关闭时创建
+
+        Returns:
+            ClientSession: aiohttp 会话
+        """
+        loop = asyncio.get_running_loop()
+        if self.closed or self._loop is not loop:
+            # 会话与事件循环绑定，事件循环变化时需要关闭旧会话并重新创建
+            await self._close_stale()
+            self._session = ClientSession(connector=self._make_connector())
+            self._loop = loop
+            logger.debug(f"Created HTTP session {self!r}")
+        assert self._session is not None
+        return self._session
+
+    async def warmup(
+        self,
+        url: str,
+        connections: int = 1,
+        timeout: float = 10,
+    ) -> int:
+        """预先完成 DNS 解析和 TLS 握手，建立到 ``url`` 所在主机的保活连接
+
+        建立的连接会在空闲 ``keepalive_timeout`` 秒后关闭。
+
+        Args:
+            url (str): 目标地址
+            connections (int, optional): 建立的连接数，受 ``limit_per_host`` 限制. Defaults to 1.
+            timeout (float, optional): 超时时间（秒）. Defaults to 10.
+
+        Returns:
+            int: 成功建立的连接数
+        """  # noqa: E501
+        session = await self.get()
+
+        async def connect() -> None:
+            # 并发请求会各自占用一个新连接，响应读完后连接回到连接池
+            async with session.head(
+                url,
+                allow_redirects=False,
+                timeout=ClientTimeout(total=timeout),
+            ) as resp:
+                await resp.read()
+
+        results = await asyncio.gather(
+            *(connect() for _ in range(connections)),
+            return_exceptions=True,
+        )
+        errors = [e for e in results if isinstance(e, BaseException)]
+        if errors:
+            logger.warning(
+                f"Failed to warm up {len(errors)} connections to {url}: "
+                f"{errors[0]!r}",
+            )
+        return connections - len(errors)
+
+    async def _close_stale(self) -> None:
+        session, loop = self._session, self._loop
+        self._session = None
+        self._loop = None
+        if session is None or session.closed:
+            return
+        if loop is not None and loop.is_running():
+            # 旧事件循环仍在其他线程中运行，在该事件循环中关闭
+            asyncio.run_coroutine_threadsafe(session.close(), loop)
+        else:
+            await session.close()
+        logger.debug(f"Closed HTTP session of a stale event loop {self!r}")
+
+    async def close(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+            logger.debug(f"Closed HTTP session {self!r}")
+        self._session = None
+        self._loop = None
+
+    def __repr__(self) -> str:
+        return (
+            f"<HTTPSession limit={self.limit} "
+            f"limit_per_host={self.limit_per_host} closed={self.closed}>"
+        )
+
+
+@dataclass
+class RateLimit:
+    """令牌桶限速配置
+
+    Args:
+        rate (float): 每秒补充的令牌数，即稳定状态下每秒允许的调用次数
+        burst (int, optional): 令牌桶容量，即允许的突发调用次数. Defaults to 1.
+    """
+
+    rate: float
+    burst: int = 1
+
+
+@dataclass
+class RateLimitStats:
+    """限速器排队统计"""
+
+    calls: int = 0
+    """经过限速器的调用次数"""
+    delayed: int = 0
+    """需要排队等待的调用次数"""
+    total_wait: float = 0
+    """累计排队时间（秒）"""
+    max_wait: float = 0
+    """最长排队时间（秒）"""
+
+    @property
+    def average_wait(self) -> float:
+        return self.total_wait / self.calls if self.calls else 0
+
+    def record(self, wait: float) -> None:
+        self.calls += 1
+        if wait > 0:
+            self.delayed += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int = 1) -> None:
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        # asyncio.Lock 按照 FIFO 唤醒，保证排队的调用按顺序获得令牌
+        self._lock = asyncio.Lock()
+
+    @property
+    def idle(self) -> bool:
+        self._refill()
+        return not self._lock.locked() and self.tokens >= self.capacity
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(
+            self.capacity,
+            self.tokens + (now - self.updated) * self.rate,
+        )
+        self.updated = now
+
+    async def acquire(self) -> float:
+        """获取一个令牌，令牌不足时排队等待
+
+        Returns:
+            float: 排队等待的时间（秒）
+        """
+        start = time.monotonic()
+        queued = self._lock.locked()
+        async with self._lock:
+            self._refill()
+            if self.tokens < 1:
+                queued = True
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= 1
+        return time.monotonic() - start if queued else 0
+
+
+class RateLimiter:
+    """按 API 路径和大别野限速的客户端限速器
+
+    超出频率的调用会排队等待令牌，而不是直接失败。
+
+    Args:
+        limits (dict[str, RateLimit] | None, optional): 各 API 路径（如 ``/sendMessage``）的限速配置. Defaults to None.
+        default (RateLimit | None, optional): 未单独配置的 API 使用的限速配置，None 为不限速. Defaults to None.
+        per_villa (bool, optional): 是否为每个大别野分别限速. Defaults to True.
+        max_buckets (int, optional): 令牌桶数量超过此值时清理空闲的令牌桶. Defaults to 10000.
+    """  # noqa: E501
+
+    def __init__(
+        self,
+        limits: dict[str, RateLimit] | None = None,
+        default: RateLimit | None = None,
+        *,
+        per_villa: bool = True,
+        max_buckets: int = 10000,
+    ) -> None:
+        self.limits = limits or {}
+        self.default = default
+        self.per_villa = per_villa
+        self.max_buckets = max_buckets
+        self.buckets: dict[tuple[str, int | None], TokenBucket] = {}
+        self.stats: dict[str, RateLimitStats] = {}
+
+    def _get_bucket(
+        self,
+        api: str,
+        villa_id: int | None,
+    ) -> TokenBucket | None:
+        limit = self.limits.get(api, self.default)
+        if limit is None:
+            return None
+        key = (api, villa_id if self.per_villa else None)
+        if (bucket := self.buckets.get(key)) is None:
+            if len(self.buckets) >= self.max_buckets:
+                self._prune()
+            bucket = self.buckets[key] = TokenBucket(limit.rate, limit.burst)
+        return bucket
+
+    def _prune(self) -> None:
+        for key in [k for k, v in self.buckets.items() if v.idle]:
+            del self.buckets[key]
+
+    async def acquire(self, api: str, villa_id: int | None = None) -> float:
+        """为一次调用获取令牌
+
+        Args:
+            api (str): API 路径
+            villa_id (int | None, optional): 大别野 id. Defaults to None.
+
+        Returns:
+            float: 排队等待的时间（秒）
+        """
+        if (bucket := self._get_bucket(api, villa_id)) is None:
+            return 0
+        wait = await bucket.acquire()
+        self.stats.setdefault(api, RateLimitStats()).record(wait)
+        if wait > 0:
+            logger.debug(f"API {api} waited {wait:.3f}s for rate limit")
+        return wait
+
+
+@dataclass
+class RetryPolicy:
+    """API 调用重试策略
+
+    可重试的错误（HTTP 状态码见 ``retry_statuses``，retcode 见 ``retry_retcodes``）
+    会以带随机抖动的指数退避进行重试，直到达到最大尝试次数或总时限。
+    POST 请求（如发送消息）失败时可能已被平台处理，默认只在连接未能建立时重试。
+
+    Args:
+        max_attempts (int, optional): 最大尝试次数（包括首次调用），1 为不重试. Defaults to 3.
+        base_delay (float, optional): 首次重试前的退避时间（秒）. Defaults to 0.5.
+        max_delay (float, optional): 单次退避时间上限（秒）. Defaults to 8.
+        jitter (float, optional): 随机抖动比例，退避时间会随机减少至多该比例. Defaults to 0.5.
+        deadline (float | None, optional): 所有尝试的总时限（秒），None 为不限制. Defaults to 30.
+        retry_statuses (frozenset[int], optional): 可重试的 HTTP 状态码.
+        retry_retcodes (frozenset[int], optional): 可重试的 retcode，可加入平台的频率限制 retcode.
+        retry_connection_error (bool, optional): 是否重试连接错误. Defaults to True.
+        retry_timeout (bool, optional): 是否重试单次请求超时，``use_deadline`` 的时限用尽后不会重试. Defaults to True.
+        retry_post (bool, optional): 是否像 GET 请求一样重试 POST 请求，可能导致重复执行（如重复发送消息）. Defaults to False.
+    """  # noqa: E501
+
+    max_attempts: int = 3
+    base_delay: float = 0.5
+    max_delay: float = 8
+    jitter: float = 0.5
+    deadline: float | None = 30
+    retry_statuses: frozenset[int] = HTTPStatusError.retryable_statuses
+    retry_retcodes: frozenset[int] = field(default_factory=retryable_retcodes)
+    retry_connection_error: bool = True
+    retry_timeout: bool = True
+    retry_post: bool = False
+
+    @classmethod
+    def never(cls) -> RetryPolicy:
+        """不进行重试的策略"""
+        return cls(max_attempts=1)
+
+    def is_retryable(
+        self,
+        exc: BaseException,
+        method: Literal["POST"] | Literal["GET"] = "GET",
+    ) -> bool:
+        if method != "GET" and not self.retry_post:
+            # 请求可能已被平台处理，只重试未发出的请求
+            return self.retry_connection_error and isinstance(
+                exc,
+                ClientConnectorError,
+            )
+        if isinstance(exc, HTTPStatusError):
+            return exc.status in self.retry_statuses
+        if isinstance(exc, CallingApiException):
+            return exc.retcode in self.retry_retcodes
+        if isinstance(exc, ClientConnectionError):
+            return self.retry_connection_error
+        if isinstance(exc, APITimeoutError):
+            return self.retry_timeout
+        return False
+
+    def backoff(self, attempt: int) -> float:
+        """计算第 ``attempt`` 次失败后的退避时间
+
+        Args:
+            attempt (int): 已失败的次数，从 1 开始
+
+        Returns:
+            float: 退避时间（秒）
+        """
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        return delay - random.uniform(0, delay * self.jitter)
+
+
+current_retry_policy: ContextVar[RetryPolicy | None] = ContextVar(
+    "current_retry_policy",
+    default=None,
+)
+
+
+@contextmanager
+def use_retry_policy(policy: RetryPolicy) -> Iterator[RetryPolicy]:
+    """在上下文中为所有 API 调用使用指定的重试策略
+
+    Args:
+        policy (RetryPolicy): 重试策略
+    """
+    token = current_retry_policy.set(policy)
+    try:
+        yield policy
+    finally:
+        current_retry_policy.reset(token)
+
+
+current_deadline: ContextVar[float | None] = ContextVar(
+    "current_deadline",
+    default=None,
+)
+"""当前上下文的截止时间（``time.monotonic``）"""
+
+
+@contextmanager
+def use_deadline(timeout: float) -> Iterator[float]:
+    """在上下文中为所有 API 调用（包括排队、重试和图片上传）设置时限
+
+    嵌套使用时以更早的截止时间为准，超时的调用会抛出 ``APITimeoutError``。
+
+    Args:
+        timeout (float): 时限（秒）
+
+    Yields:
+        float: 截止时间（``time.monotonic``）
+    """
+    deadline = time.monotonic() + timeout
+    if (outer := current_deadline.get()) is not None:
+        deadline = min(deadline, outer)
+    token = current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        current_deadline.reset(token)
+
+
+def remaining_time() -> float | None:
+    """获取当前上下文距离截止时间的剩余时间
+
+    Returns:
+        float | None: 剩余时间（秒），未设置时限时为 None
+    """
+    if (deadline := current_deadline.get()) is None:
+        return None
+    return deadline - time.monotonic()
+
+
+api_timeouts = default_registry.counter(
+    "hertavilla_api_timeouts_total",
+    "Villa API calls failed with APITimeoutError",
+    ("bot", "api"),
+)
+
+
+class SingleFlight(Generic[T]):
+    """合并相同 key 的并发调用，使其共享同一次执行及其结果"""
+
+    def __init__(self) -> None:
+        self._calls: dict[Hashable, asyncio.Future[T]] = {}
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    async def do(
+        self,
+        key: Hashable,
+        func: Callable[[], Awaitable[T]],
+        timeout: float | None = None,
+    ) -> T:
+        """执行调用，若相同 key 的调用正在进行则等待其结果
+
+        Args:
+            key (Hashable): 调用的标识
+            func (Callable[[], Awaitable[T]]): 实际执行的调用
+            timeout (float | None, optional): 加入进行中的调用时等待结果的时限，超时后共享的调用仍继续执行；新发起的调用由 func 自身负责超时. Defaults to None.
+
+        Raises:
+            asyncio.TimeoutError: 等待进行中的调用超时
+
+        Returns:
+            T: 调用结果
+        """  # noqa: E501
+        if (task := self._calls.get(key)) is None:
+            task = asyncio.ensure_future(func())
+            self._calls[key] = task
+            task.add_done_callback(lambda _: self._done(key, task))
+        else:
+            logger.debug(f"Joined in-flight call {key!r}")
+            if timeout is not None:
+                return await asyncio.wait_for(asyncio.shield(task), timeout)
+        # shield: 单个调用者被取消时不影响其他等待者
+        return await asyncio.shield(task)
+
+    def _done(self, key: Hashable, task: asyncio.Future[T]) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            # 所有等待者都已取消时，避免 "exception was never retrieved"
+            task.exception()
+
+
+def _freeze(params: dict[str, Any] | None) -> tuple[tuple[str, Any], ...]:
+    return tuple(sorted(params.items())) if params else ()
+
+
+class CircuitState(str, Enum):
+    CLOSED = "closed"
+    """正常放行"""
+    OPEN = "open"
+    """快速失败"""
+    HALF_OPEN = "half_open"
+    """放行少量探测请求"""
+
+
+def is_server_failure(exc: BaseException) -> bool:
+    """判断异常是否说明平台不可用（而非请求本身有误）
+
+    Args:
+        exc (BaseException): 异常
+
+    Returns:
+        bool: 是否计入熔断器的失败
+    """
+    if isinstance(exc, HTTPStatusError):
+        return exc.status >= 500 or exc.status == 429  # noqa: PLR2004
+    if isinstance(exc, CallingApiException):
+        return exc.retryable
+    return isinstance(exc, (ClientConnectionError, asyncio.TimeoutError))
+
+
+class _Circuit:
+    def __init__(self) -> None:
+        self.state = CircuitState.CLOSED
+        self.calls: deque[tuple[float, bool]] = deque()
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probes = 0
+        self.probe_successes = 0
+
+    def prune(self, now: float, window: float) -> None:
+        while self.calls and self.calls[0][0] < now - window:
+            _, failed = self.calls.popleft()
+            self.failures -= failed
+
+    def reset(self) -> None:
+        self.calls.clear()
+        self.failures = 0
+        self.probes = 0
+        self.probe_successes = 0
+
+
+class CircuitBreaker:
+    """按 API 路径（可选按大别野）熔断的熔断器
+
+    滑动窗口内调用次数不少于 ``min_calls`` 且失败率达到 ``failure_rate`` 时熔断，
+    熔断期间的调用直接抛出 ``CircuitOpenError``；经过 ``open_timeout`` 后进入半开状态，
+    放行至多 ``half_open_probes`` 个探测请求，全部成功则恢复，任一失败则重新熔断。
+
+    Args:
+        failure_rate (float, optional): 触发熔断的失败率. Defaults to 0.5.
+        min_calls (int, optional): 窗口内触发熔断所需的最少调用次数. Defaults to 20.
+        window (float, optional): 统计失败率的滑动窗口（秒）. Defaults to 30.
+        open_timeout (float, optional): 熔断持续时间（秒）. Defaults to 10.
+        half_open_probes (int, optional): 半开状态下的探测请求数. Defaults to 3.
+        per_villa (bool, optional): 是否为每个大别野分别熔断. Defaults to False.
+        is_failure (Callable[[BaseException], bool], optional): 判断异常是否计入失败. Defaults to is_server_failure.
+    """  # noqa: E501
+
+    def __init__(
+        self,
+        *,
+        failure_rate: float = 0.5,
+        min_calls: int = 20,
+        window: float = 30,
+        open_timeout: float = 10,
+        half_open_probes: int = 3,
+        per_villa: bool = False,
+        is_failure: Callable[[BaseException], bool] = is_server_failure,
+    ) -> None:
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.window = window
+        self.open_timeout = open_timeout
+        self.half_open_probes = half_open_probes
+        self.per_villa = per_villa
+        self.is_failure = is_failure
+        self.circuits: dict[tuple[str, int | None], _Circuit] = {}
+        self._rejected = default_registry.counter(
+            "hertavilla_api_circuit_rejected_total",
+            "Villa API calls rejected by an open circuit",
+            ("api",),
+        )
+        self._opened = default_registry.counter(
+            "hertavilla_api_circuit_opened_total",
+            "Times a Villa API circuit has opened",
+            ("api",),
+        )
+
+    def _key(self, api: str, villa_id: int | None) -> tuple[str, int | None]:
+        return api, villa_id if self.per_villa else None
+
+    def state(self, api: str, villa_id: int | None = None) -> CircuitState:
+        if (circuit := self.circuits.get(self._key(api, villa_id))) is None:
+            return CircuitState.CLOSED
+        return circuit.state
+
+    def before_call(self, api: str, villa_id: int | None = None) -> bool:
+        """调用前检查熔断状态
+
+        Returns:
+            bool: 本次调用是否为半开状态下的探测请求
+
+        Raises:
+            CircuitOpenError: 熔断中或半开状态的探测请求已满
+        """
+        key = self._key(api, villa_id)
+        if (circuit := self.circuits.get(key)) is None:
+            circuit = self.circuits[key] = _Circuit()
+        if circuit.state == CircuitState.CLOSED:
+            return False
+        now = time.monotonic()
+        if circuit.state == CircuitState.OPEN:
+            if (remain := circuit.opened_at + self.open_timeout - now) > 0:
+                self._reject(api, key, remain)
+            circuit.state = CircuitState.HALF_OPEN
+            circuit.reset()
+            logger.info(f"Circuit of {api} is half-open, sending probes")
+        if circuit.probes + circuit.probe_successes >= self.half_open_probes:
+            self._reject(api, key, 0)
+        circuit.probes += 1
+        return True
+
+    def _reject(
+        self,
+        api: str,
+        key: tuple[str, int | None],
+        retry_after: float,
+    ) -> None:
+        self._rejected.inc(api=api)
+        raise CircuitOpenError(api, key[1], retry_after)
+
+    def record(
+        self,
+        api: str,
+        villa_id: int | None,
+        error: BaseException | None,
+        probe: bool = False,
+    ) -> None:
+        """记录调用结果
+
+        Args:
+            api (str): API 路径
+            villa_id (int | None): 大别野 id
+            error (BaseException | None): 调用抛出的异常，成功时为 None
+            probe (bool, optional): 是否为探测请求. Defaults to False.
+        """
+        if (circuit := self.circuits.get(self._key(api, villa_id))) is None:
+            return
+        failed = error is not None and self.is_failure(error)
+        if probe:
+            if circuit.state != CircuitState.HALF_OPEN:
+                return
+            circuit.probes -= 1
+        if isinstance(error, asyncio.CancelledError):
+            # 被取消的调用不能说明平台是否可用
+            return
+        if probe:
+            if failed:
+                self._open(api, circuit)
+                return
+            circuit.probe_successes += 1
+            if circuit.probe_successes >= self.half_open_probes:
+                circuit.state = CircuitState.CLOSED
+                circuit.reset()
+                logger.info(f"Circuit of {api} is closed")
+            return
+        if circuit.state != CircuitState.CLOSED:
+            # 熔断前发出的请求，不再影响当前状态
+            return
+        now = time.monotonic()
+        circuit.calls.append((now, failed))
+        circuit.failures += failed
+        circuit.prune(now, self.window)
+        if (
+            len(circuit.calls) >= self.min_calls
+            and circuit.failures / len(circuit.calls) >= self.failure_rate
+        ):
+            self._open(api, circuit)
+
+    def _open(self, api: str, circuit: _Circuit) -> None:
+        circuit.state = CircuitState.OPEN
+        circuit.opened_at = time.monotonic()
+        circuit.reset()
+        self._opened.inc(api=api)
+        logger.warning(
+            f"Circuit of {api} is open for {self.open_timeout}s "
+            "because the platform keeps failing",
+        )
+
 
 class _BaseAPIMixin:
     def __init__(
@@ -22,6 +726,17 @@ class _BaseAPIMixin:
         bot_id: str,
         secret: str,
         pub_key: str,
+        *,
+        http_session: HTTPSession | None = None,
+        rate_limiter: RateLimiter | None = None,
+        retry_policy: RetryPolicy | None = None,
+        coalesce_requests: bool = True,
+        cache: APICache | None = None,
+        api_hooks: Sequence[APIHook] | None = None,
+        circuit_breaker: CircuitBreaker | None = None,
+        api_base: str | None = None,
+        scheduler: PriorityScheduler | None = None,
+        timeout: float | None = 30,
     ):
         self.bot_id = bot_id
         self.secret = secret
@@ -31,6 +746,19 @@ class _BaseAPIMixin:
             hashlib.sha256,
         ).hexdigest()
         self.pub_key = pub_key
+        self.api_base = (api_base or BASE_API).rstrip("/")
+        self.http_session = http_session or HTTPSession()
+        self.rate_limiter = rate_limiter
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.coalesce_requests = coalesce_requests
+        self._single_flight: SingleFlight[Any] = SingleFlight()
+        self.cache = cache
+        self.circuit_breaker = circuit_breaker
+        self.scheduler = scheduler
+        self.timeout = timeout
+        self.api_hooks: list[APIHook] = (
+            [MetricsHook()] if api_hooks is None else list(api_hooks)
+        )
 
     def _make_header(self, villa_id: int) -> dict[str, str]:
         return {
@@ -39,6 +767,45 @@ class _BaseAPIMixin:
             "x-rpc-bot_villa_id": str(villa_id),
         }
 
+    def add_api_hook(self, hook: APIHook) -> APIHook:
+        """添加 API 调用钩子
+
+        Args:
+            hook (APIHook): 钩子
+
+        Returns:
+            APIHook: 传入的钩子
+        """
+        self.api_hooks.append(hook)
+        return hook
+
+    def _emit(self, name: str, call: APICall) -> None:
+        for hook in self.api_hooks:
+            try:
+                getattr(hook, name)(call)
+            except Exception:
+                logger.exception(f"Raised exceptions in API hook {hook!r}")
+
+    async def close(self) -> None:
+        """关闭 Bot 持有的 HTTP 会话"""
+        await self.http_session.close()
+
+    def _timeout_budget(self, api: str) -> float | None:
+        """单次 HTTP 请求可用的时间，取 ``timeout`` 与上下文剩余时限中较小者
+
+        Raises:
+            APITimeoutError: 上下文的时限已经用尽
+        """
+        remaining = remaining_time()
+        if remaining is None:
+            return self.timeout
+        if remaining <= 0:
+            api_timeouts.inc(bot=self.bot_id, api=api)
+            raise APITimeoutError(api, 0)
+        return (
+            remaining if self.timeout is None else min(remaining, self.timeout)
+        )
+
     async def base_request(
         self,
         api: str,
@@ -48,18 +815,257 @@ class _BaseAPIMixin:
         *,
         data: dict[str, Any] | None = None,
         params: dict[str, Any] | None = None,
+        retry_policy: RetryPolicy | None = None,
+        priority: Priority | None = None,
     ):
+        if priority is not None:
+            with use_priority(priority):
+                return await self.base_request(
+                    api,
+                    method,
+                    villa_id,
+                    data=data,
+                    params=params,
+                    retry_policy=retry_policy,
+                )
         logger.info(f"Calling API {api}.")
-        async with ClientSession() as session:
+        policy = (
+            retry_policy or current_retry_policy.get() or self.retry_policy
+        )
+        if method == "GET":
+            return await self._get(api, villa_id, policy, params)
+        result = await self._request_with_retry(
+            api,
+            method,
+            villa_id,
+            policy,
+            data=data,
+            params=params,
+        )
+        if self.cache is not None:
+            self.cache.invalidate_mutation(api, villa_id, data)
+        return result
+
+    async def _get(
+        self,
+        api: str,
+        villa_id: int | None,
+        policy: RetryPolicy,
+        params: dict[str, Any] | None,
+    ):
+        frozen_params = _freeze(params)
+        cache = self.cache
+        if cache is not None and not cache.cacheable(api):
+            cache = None
+        generation = None
+        if cache is not None:
+            result = cache.get(api, villa_id, frozen_params)
+            if result is not MISSING:
+                return result
+            # 查询期间相关缓存被失效时，结果不再写入缓存
+            generation = cache.generation(api, villa_id)
+
+        async def fetch():
+            result = await self._request_with_retry(
+                api,
+                "GET",
+                villa_id,
+                policy,
+                params=params,
+            )
+            if cache is not None:
+                cache.set(api, villa_id, frozen_params, result, generation)
+            return result
+
+        if not (self.coalesce_requests and api in COALESCED_APIS):
+            return await fetch()
+        remaining = remaining_time()
+        try:
+            # 失效后发起的查询不会合并到失效前发起的调用中
+            return await self._single_flight.do(
+                (api, villa_id, frozen_params, generation),
+                fetch,
+                # 加入进行中的调用时，同样以自身的时限为准
+                remaining,
+            )
+        except asyncio.TimeoutError as e:
+            if remaining is None or isinstance(e, APITimeoutError):
+                raise
+            api_timeouts.inc(bot=self.bot_id, api=api)
+            raise APITimeoutError(api, remaining) from e
+
+    async def _request_with_retry(
+        self,
+        api: str,
+        method: Literal["POST"] | Literal["GET"],
+        villa_id: int | None,
+        policy: RetryPolicy,
+        *,
+        data: dict[str, Any] | None = None,
+        params: dict[str, Any] | None = None,
+    ):
+        start = time.monotonic()
+        attempt = 1
+        while True:
+            try:
+                return await self._request(
+                    api,
+                    method,
+                    villa_id,
+                    data=data,
+                    params=params,
+                )
+            except Exception as e:
+                retryable = policy.is_retryable(e, method)
+                if not retryable or attempt >= policy.max_attempts:
+                    raise
+                delay = policy.backoff(attempt)
+                if (
+                    policy.deadline is not None
+                    and time.monotonic() - start + delay > policy.deadline
+                ):
+                    raise
+                if (remaining := remaining_time()) is not None and (
+                    delay >= remaining
+                ):
+                    raise
+                logger.warning(
+                    f"Calling API {api} failed: {e!r}, "
+                    f"retry in {delay:.2f}s (attempt {attempt})",
+                )
+                await asyncio.sleep(delay)
+                attempt += 1
+
+    async def _request(
+        self,
+        api: str,
+        method: Literal["POST"] | Literal["GET"],
+        villa_id: int | None = None,
+        *,
+        data: dict[str, Any] | None = None,
+        params: dict[str, Any] | None = None,
+    ):
+        remaining = remaining_time()
+        if remaining is None:
+            return await self._schedule_request(
+                api,
+                method,
+                villa_id,
+                data=data,
+                params=params,
+            )
+        self._timeout_budget(api)
+        try:
+            # 时限同样约束在调度器和限速器中排队的时间
+            return await asyncio.wait_for(
+                self._schedule_request(
+                    api,
+                    method,
+                    villa_id,
+                    data=data,
+                    params=params,
+                ),
+                remaining,
+            )
+        except asyncio.TimeoutError as e:
+            if isinstance(e, APITimeoutError):
+                raise
+            api_timeouts.inc(bot=self.bot_id, api=api)
+            raise APITimeoutError(api, remaining) from e
+
+    async def _schedule_request(
+        self,
+        api: str,
+        method: Literal["POST"] | Literal["GET"],
+        villa_id: int | None = None,
+        *,
+        data: dict[str, Any] | None = None,
+        params: dict[str, Any] | None = None,
+    ):
+        # 先获取限速器的令牌再占用调度器名额，
+        # 避免被限速的低优先级调用在等待令牌时占满名额，阻塞高优先级调用
+        rate_limit_wait = None
+        if self.rate_limiter is not None:
+            rate_limit_wait = await self.rate_limiter.acquire(api, villa_id)
+        scheduler = self.scheduler
+        if scheduler is None:
+            return await self._do_request(
+                api,
+                method,
+                villa_id,
+                data=data,
+                params=params,
+                rate_limit_wait=rate_limit_wait,
+            )
+        await scheduler.acquire(scheduler.priority_of(api))
+        try:
+            return await self._do_request(
+                api,
+                method,
+                villa_id,
+                data=data,
+                params=params,
+                rate_limit_wait=rate_limit_wait,
+            )
+        finally:
+            scheduler.release()
+
+    async def _do_request(
+        self,
+        api: str,
+        method: Literal["POST"] | Literal["GET"],
+        villa_id: int | None = None,
+        *,
+        data: dict[str, Any] | None = None,
+        params: dict[str, Any] | None = None,
+        rate_limit_wait: float | None = None,
+    ):
+        call = APICall(self.bot_id, api, method, villa_id)
+        call.rate_limit_wait = rate_limit_wait
+        headers = self._make_header(villa_id) if villa_id else {}
+        body = None
+        if data is not None:
+            body = json.dumps(data).encode()
+            headers["Content-Type"] = "application/json"
+            call.bytes_sent = len(body)
+        budget = self._timeout_budget(api)
+        # 排队结束后再检查熔断状态，避免探测请求因排队被取消而占用名额
+        breaker = self.circuit_breaker
+        probe = breaker is not None and breaker.before_call(api, villa_id)
+        self._emit("on_request", call)
+        call.start = time.perf_counter()
+        try:
+            session = await self.http_session.get()
             async with session.request(
                 method,
-                f"{BASE_API}{api}",
-                json=data,
+                f"{self.api_base}{api}",
+                data=body,
                 params=params,
-                headers=self._make_header(villa_id) if villa_id else None,
+                headers=headers,
+                timeout=ClientTimeout(total=budget),
             ) as resp:
-                if not resp.ok:
-                    raise HTTPStatusError(resp.status)
-                payload = await resp.json()
-                raise_exception(payload)
-                return payload["data"]
+                return await self._read_response(resp, call)
+        except asyncio.TimeoutError as e:
+            api_timeouts.inc(bot=self.bot_id, api=api)
+            call.error = APITimeoutError(api, budget)
+            raise call.error from e
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            call.end = time.perf_counter()
+            if breaker is not None:
+                breaker.record(api, villa_id, call.error, probe)
+            self._emit("on_response", call)
+
+    @staticmethod
+    async def _read_response(resp: ClientResponse, call: APICall) -> Any:
+        call.status = resp.status
+        if not resp.ok:
+            raise HTTPStatusError(resp.status)
+        raw = await resp.read()
+        call.bytes_received = len(raw)
+        payload = json.loads(raw)
+        call.retcode = payload["retcode"]
+        raise_exception(payload)
+        return payload["data"]
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
-from typing import List
+import asyncio
+from typing import AsyncIterator, Iterable, List, Tuple, Union
 
 from hertavilla.apis.internal import _BaseAPIMixin
 from hertavilla.model import Member
@@ -30,6 +31,89 @@ class MemberAPIMixin(_BaseAPIMixin):
             )["member"],
         )
 
+    async def iter_members(
+        self,
+        villa_id: int,
+        uids: Iterable[int],
+        concurrency: int = 10,
+    ) -> AsyncIterator[tuple[int, Member | Exception]]:
+        """批量获取用户信息，按完成顺序逐个返回。
+        重复的 uid 只会请求一次，已缓存的用户不会发起请求，
+        同时进行的请求不超过 concurrency 个并受限速器约束。
+
+        Args:
+            villa_id (int): 大别野 id
+            uids (Iterable[int]): 用户 id 列表
+            concurrency (int, optional): 最大并发请求数. Defaults to 10.
+
+        Yields:
+            tuple[int, Member | Exception]: 用户 id 与用户详情，获取失败时为异常
+
+        Raises:
+            ValueError: concurrency 小于 1
+        """  # noqa: E501
+        if concurrency < 1:
+            raise ValueError(f"concurrency must be positive: {concurrency}")
+        unique_uids = list(dict.fromkeys(int(uid) for uid in uids))
+        if not unique_uids:
+            return
+        pending = iter(unique_uids)
+        results: asyncio.Queue[
+            Tuple[int, Union[Member, Exception]]
+        ] = asyncio.Queue(maxsize=concurrency)
+
+        async def worker() -> None:
+            # 所有 worker 共享同一个迭代器，取出 uid 时不会发生切换
+            for uid in pending:
+                try:
+                    result = await self.get_member(villa_id, uid)
+                except Exception as e:
+                    result = e
+                await results.put((uid, result))
+
+        workers = [
+            asyncio.create_task(worker())
+            for _ in range(min(concurrency, len(unique_uids)))
+        ]
+        try:
+            for _ in range(len(unique_uids)):
+                yield await results.get()
+        finally:
+            for task in workers:
+                task.cancel()
+
+    async def get_members(
+        self,
+        villa_id: int,
+        uids: Iterable[int],
+        concurrency: int = 10,
+    ) -> tuple[dict[int, Member], dict[int, Exception]]:
+        """批量获取用户信息
+
+        Args:
+            villa_id (int): 大别野 id
+            uids (Iterable[int]): 用户 id 列表
+            concurrency (int, optional): 最大并发请求数. Defaults to 10.
+
+        Returns:
+            tuple[dict[int, Member], dict[int, Exception]]: 获取成功的用户详情与获取失败的异常
+
+        Raises:
+            ValueError: concurrency 小于 1
+        """  # noqa: E501
+        members: dict[int, Member] = {}
+        errors: dict[int, Exception] = {}
+        async for uid, result in self.iter_members(
+            villa_id,
+            uids,
+            concurrency,
+        ):
+            if isinstance(result, Exception):
+                errors[uid] = result
+            else:
+                members[uid] = result
+        return members, errors
+
     async def get_villa_members(
         self,
         villa_id: int,
@@ -59,6 +143,69 @@ class MemberAPIMixin(_BaseAPIMixin):
             data["next_offset_str"],
         )
 
+    async def iter_villa_members(
+        self,
+        villa_id: int,
+        page_size: int = 10,
+        prefetch: int = 1,
+    ) -> AsyncIterator[Member]:
+        """遍历大别野全部成员。
+        在调用方处理当前页的同时预取之后的页面，最多缓存 prefetch 页。
+
+        Args:
+            villa_id (int): 大别野 id
+            page_size (int, optional): 分页大小. Defaults to 10.
+            prefetch (int, optional): 预取页数，0 为不预取. Defaults to 1.
+
+        Yields:
+            Member: 用户详情
+        """
+        if prefetch <= 0:
+            offset_str = "0"
+            while True:
+                members, next_offset_str = await self.get_villa_members(
+                    villa_id,
+                    offset_str,
+                    page_size,
+                )
+                for member in members:
+                    yield member
+                if not _has_next(members, offset_str, next_offset_str):
+                    return
+                offset_str = next_offset_str
+
+        pages: asyncio.Queue[
+            Union[List[Member], Exception, None]
+        ] = asyncio.Queue(maxsize=prefetch)
+
+        async def fetch_pages() -> None:
+            offset_str = "0"
+            try:
+                while True:
+                    members, next_offset_str = await self.get_villa_members(
+                        villa_id,
+                        offset_str,
+                        page_size,
+                    )
+                    await pages.put(members)
+                    if not _has_next(members, offset_str, next_offset_str):
+                        break
+                    offset_str = next_offset_str
+            except Exception as e:
+                await pages.put(e)
+            else:
+                await pages.put(None)
+
+        task = asyncio.create_task(fetch_pages())
+        try:
+            while (page := await pages.get()) is not None:
+                if isinstance(page, Exception):
+                    raise page
+                for member in page:
+                    yield member
+        finally:
+            task.cancel()
+
     async def delete_villa_member(self, villa_id: int, uid: int) -> None:
         """踢出大别野用户
 
@@ -72,3 +219,15 @@ class MemberAPIMixin(_BaseAPIMixin):
             villa_id,
             data={"uid": uid},
         )
+
+
+def _has_next(
+    members: list[Member],
+    offset_str: str,
+    next_offset_str: str,
+) -> bool:
+    return (
+        bool(members)
+        and bool(next_offset_str)
+        and next_offset_str != offset_str
+    )
@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+import itertools
+import logging
+import time
+from typing import Iterator
+
+from hertavilla.metrics import MetricsRegistry, default_registry
+
+logger = logging.getLogger("hertavilla.api.priority")
+
+
+class Priority(IntEnum):
+    INTERACTIVE = 0
+    """交互式调用，如回复消息"""
+    NORMAL = 1
+    """普通调用"""
+    BULK = 2
+    """批量后台任务"""
+
+
+DEFAULT_PRIORITIES: dict[str, Priority] = {
+    "/sendMessage": Priority.INTERACTIVE,
+    "/operateMemberToRole": Priority.BULK,
+    "/deleteVillaMember": Priority.BULK,
+    "/audit": Priority.BULK,
+}
+"""各 API 的默认优先级，未列出的 API 为 ``Priority.NORMAL``"""
+
+current_priority: ContextVar[Priority | None] = ContextVar(
+    "current_priority",
+    default=None,
+)
+
+
+@contextmanager
+def use_priority(priority: Priority) -> Iterator[Priority]:
+    """在上下文中为所有 API 调用使用指定的优先级
+
+    Args:
+        priority (Priority): 优先级
+    """
+    token = current_priority.set(priority)
+    try:
+        yield priority
+    finally:
+        current_priority.reset(token)
+
+
+class _Waiter:
+    __slots__ = ("future", "priority", "since", "seq")
+
+    def __init__(
+        self,
+        future: asyncio.Future[None],
+        priority: Priority,
+        seq: int,
+    ) -> None:
+        self.future = future
+        self.priority = priority
+        self.since = time.monotonic()
+        self.seq = seq
+
+
+class PriorityScheduler:
+    """按优先级调度 API 调用
+
+    同时进行的调用数达到 ``max_concurrency`` 后，新的调用按优先级排队，
+    有空位时优先放行高优先级的调用，同一优先级内先到先得。
+    为避免低优先级调用饿死，排队每满 ``aging`` 秒，其优先级视为提升一级。
+
+    Args:
+        max_concurrency (int, optional): 同时进行的调用数上限. Defaults to 10.
+        priorities (dict[str, Priority] | None, optional): 覆盖 ``DEFAULT_PRIORITIES`` 中各 API 的优先级. Defaults to None.
+        aging (float, optional): 排队中的调用提升一级优先级所需的时间（秒）. Defaults to 2.
+        registry (MetricsRegistry, optional): 记录排队情况的指标注册表. Defaults to default_registry.
+    """  # noqa: E501
+
+    def __init__(
+        self,
+        max_concurrency: int = 10,
+        *,
+        priorities: dict[str, Priority] | None = None,
+        aging: float = 2,
+        registry: MetricsRegistry = default_registry,
+    ) -> None:
+        self.max_concurrency = max_concurrency
+        self.priorities = {**DEFAULT_PRIORITIES, **(priorities or {})}
+        self.aging = aging
+        self.active = 0
+        self._waiters: dict[Priority, deque[_Waiter]] = {
+            priority: deque() for priority in Priority
+        }
+        self._seq = itertools.count()
+        self._queued = registry.gauge(
+            "hertavilla_api_priority_queued",
+            "Villa API calls waiting for the priority scheduler",
+            ("priority",),
+        )
+        self._wait = registry.histogram(
+            "hertavilla_api_priority_wait_seconds",
+            "Time Villa API calls waited in the priority scheduler",
+            ("priority",),
+        )
+
+    def __len__(self) -> int:
+        """排队中的调用数"""
+        return sum(len(waiters) for waiters in self._waiters.values())
+
+    def priority_of(self, api: str) -> Priority:
+        """获取调用的优先级，``use_priority`` 指定的优先级优先
+
+        Args:
+            api (str): API 路径
+
+        Returns:
+            Priority: 优先级
+        """
+        priority = current_priority.get()
+        if priority is None:
+            priority = self.priorities.get(api, Priority.NORMAL)
+        return priority
+
+    async def acquire(self, priority: Priority) -> float:
+        """获取一个调用名额，名额不足时按优先级排队
+
+        Args:
+            priority (Priority): 优先级
+
+        Returns:
+            float: 排队等待的时间（秒）
+        """
+        if self.active < self.max_concurrency and not len(self):
+            self.active += 1
+            return 0
+        loop = asyncio.get_running_loop()
+        waiter = _Waiter(loop.create_future(), priority, next(self._seq))
+        self._waiters[priority].append(waiter)
+        self._queued.inc(priority=priority.name)
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if not waiter.future.cancelled():
+                # 已获得名额但调用方被取消，归还名额
+                self.release()
+            elif waiter in (waiters := self._waiters[priority]):
+                waiters.remove(waiter)
+                self._queued.dec(priority=priority.name)
+            raise
+        wait = time.monotonic() - waiter.since
+        self._wait.observe(wait, priority=priority.name)
+        if wait > self.aging:
+            logger.debug(f"{priority.name} API call waited {wait:.3f}s")
+        return wait
+
+    def release(self) -> None:
+        """归还调用名额"""
+        self.active -= 1
+        self._wake()
+
+    def _next(self) -> _Waiter | None:
+        now = time.monotonic()
+        best: _Waiter | None = None
+        best_rank = 0.0
+        for waiters in self._waiters.values():
+            if not waiters:
+                continue
+            waiter = waiters[0]
+            rank = waiter.priority - (now - waiter.since) / self.aging
+            if best is None or (rank, waiter.seq) < (best_rank, best.seq):
+                best, best_rank = waiter, rank
+        return best
+
+    def _wake(self) -> None:
+        while self.active < self.max_concurrency:
+            if (waiter := self._next()) is None:
+                return
+            self._waiters[waiter.priority].popleft()
+            self._queued.dec(priority=waiter.priority.name)
+            if waiter.future.done():
+                # 调用方已取消
+                continue
+            self.active += 1
+            waiter.future.set_result(None)
+
+    def __repr__(self) -> str:
+        return (
+            f"<PriorityScheduler active={self.active}/"
+            f"{self.max_concurrency} queued={len(self)}>"
+        )
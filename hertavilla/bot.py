@@ -12,20 +12,34 @@ from typing import (
     Callable,
     Coroutine,
     Generic,
+    Sequence,
     TypeVar,
 )
 import urllib.parse
 
 from hertavilla.apis.audit import AuditAPIMixin
 from hertavilla.apis.auth import AuthAPIMixin
+from hertavilla.apis.cache import APICache
+from hertavilla.apis.emoticon import EmoticonAPIMixin
+from hertavilla.apis.hooks import APIHook
 from hertavilla.apis.img import ImgAPIMixin
+from hertavilla.apis.internal import (
+    CircuitBreaker,
+    HTTPSession,
+    RateLimiter,
+    RetryPolicy,
+)
 from hertavilla.apis.member import MemberAPIMixin
 from hertavilla.apis.message import MessageAPIMixin
+from hertavilla.apis.priority import PriorityScheduler
 from hertavilla.apis.role import RoleAPIMixin
 from hertavilla.apis.room import RoomAPIMixin
 from hertavilla.apis.villa import VillaAPIMixin
 from hertavilla.apis.websocket import WebSocketAPIMixin
+from hertavilla.dedupe import EventDeduplicator
+from hertavilla.dispatch import EventDispatcher, EventWorkerPool
 from hertavilla.match import (
+    CompiledMatcher,
     Endswith,
     EndswithResult,
     Keywords,
@@ -38,6 +52,8 @@ from hertavilla.match import (
     StartswithResult,
     current_match_result,
 )
+from hertavilla.send_queue import SendQueue
+from hertavilla.verify import RSAVerifier, Verifier, default_verifier
 
 import rsa
 
@@ -66,8 +82,11 @@ class Handler(Generic[TE]):
     def __eq__(self, __value: Event) -> bool:
         return isinstance(__value, self.event)
 
+    # 在 EventDispatcher 中按实例索引
+    __hash__ = object.__hash__
 
-@dataclass
+
+@dataclass(eq=False)
 class MessageHandler(Generic[TR]):
     match: Match
     func: Callable[["SendMessageEvent", "VillaBot", TR], Awaitable[Any]]
@@ -110,6 +129,7 @@ class VillaBot(
     RoleAPIMixin,
     ImgAPIMixin,
     AuditAPIMixin,
+    EmoticonAPIMixin,
     WebSocketAPIMixin,
 ):
     def __init__(
@@ -122,19 +142,58 @@ class VillaBot(
         bot_info: "Template | None" = None,
         use_websocket: bool = False,
         test_villa_id: int = 0,
+        http_session: HTTPSession | None = None,
+        rate_limiter: RateLimiter | None = None,
+        retry_policy: RetryPolicy | None = None,
+        coalesce_requests: bool = True,
+        cache: APICache | None = None,
+        api_hooks: Sequence[APIHook] | None = None,
+        circuit_breaker: CircuitBreaker | None = None,
+        api_base: str | None = None,
+        send_queue: SendQueue | None = None,
+        scheduler: PriorityScheduler | None = None,
+        timeout: float | None = 30,
+        verifier: Verifier | None = None,
+        verify_in_executor: bool = False,
+        deduplicator: EventDeduplicator | None = None,
+        lazy_events: bool = False,
+        event_pool: EventWorkerPool | None = None,
     ) -> None:
         from hertavilla.event import SendMessageEvent
 
-        super().__init__(bot_id, secret, pub_key)
-        self.rsa_pub_key = rsa.PublicKey.load_pkcs1_openssl_pem(
-            pub_key.encode(),
+        super().__init__(
+            bot_id,
+            secret,
+            pub_key,
+            http_session=http_session,
+            rate_limiter=rate_limiter,
+            retry_policy=retry_policy,
+            coalesce_requests=coalesce_requests,
+            cache=cache,
+            api_hooks=api_hooks,
+            circuit_breaker=circuit_breaker,
+            api_base=api_base,
+            scheduler=scheduler,
+            timeout=timeout,
         )
+        self._rsa_pub_key: rsa.PublicKey | None = None
+        self.verifier = verifier or default_verifier(pub_key)
+        self.verify_in_executor = verify_in_executor
+        self.deduplicator = (
+            deduplicator if deduplicator is not None else EventDeduplicator()
+        )
+        self.lazy_events = lazy_events
+        self.event_pool = event_pool
         self._bot_info = bot_info
         self.callback_endpoint = callback_endpoint
-        self.handlers: list[Handler] = []
-        self.message_handlers: list[MessageHandler] = []
+        self.dispatcher = EventDispatcher()
+        self.message_matcher: CompiledMatcher[
+            MessageHandler
+        ] = CompiledMatcher()
         self.register_handler(SendMessageEvent, self.message_handler)
 
+        self.send_queue = send_queue
+
         self.use_websocket = use_websocket
         self.test_villa_id = test_villa_id
         self.ws: "WSConnection | None" = None
@@ -150,6 +209,22 @@ class VillaBot(
     def bot_info(self, value: "Template") -> None:
         self._bot_info = value
 
+    @property
+    def rsa_pub_key(self) -> rsa.PublicKey:
+        """``rsa`` 库的公钥对象，首次访问时解析；签名校验使用 ``verifier``"""
+        if self._rsa_pub_key is None:
+            if isinstance(self.verifier, RSAVerifier):
+                self._rsa_pub_key = self.verifier.key
+            else:
+                self._rsa_pub_key = rsa.PublicKey.load_pkcs1_openssl_pem(
+                    self.pub_key.encode(),
+                )
+        return self._rsa_pub_key
+
+    @rsa_pub_key.setter
+    def rsa_pub_key(self, value: rsa.PublicKey) -> None:
+        self._rsa_pub_key = value
+
     @property
     def name(self) -> str:
         """Bot 昵称"""
@@ -170,6 +245,22 @@ class VillaBot(
         """Bot 介绍"""
         return self.bot_info.desc
 
+    @property
+    def handlers(self) -> tuple[Handler, ...]:
+        """已注册的事件处理器（按注册顺序）
+
+        只读，增删处理器需使用 ``register_handler`` 或 ``dispatcher.add``、``dispatcher.remove``
+        """  # noqa: E501
+        return tuple(self.dispatcher)
+
+    @property
+    def message_handlers(self) -> tuple[MessageHandler, ...]:
+        """已注册的消息处理器（按注册顺序）
+
+        只读，增删处理器需使用 ``register_msg_handler`` 或 ``message_matcher.add``、``message_matcher.remove``
+        """  # noqa: E501
+        return tuple(self.message_matcher)
+
     def __repr__(self) -> str:
         return f"<VillaBot id={self.bot_id!r}>"
 
@@ -192,12 +283,30 @@ class VillaBot(
         sign_msg = urllib.parse.urlencode(
             {"body": body, "secret": self.secret},
         ).encode()
-        try:
-            rsa.verify(sign_msg, sign_, self.rsa_pub_key)
-        except rsa.VerificationError:
-            return False
-        else:
-            return True
+        return self.verifier.verify(sign_, sign_msg)
+
+    async def verify_async(
+        self,
+        sign: str,
+        body: str,
+    ) -> bool:
+        """校验回调签名，``verify_in_executor`` 为 True 时在线程池中校验
+
+        Args:
+            sign (str): 请求头中的签名
+            body (str): 请求体
+
+        Returns:
+            bool: 签名是否有效
+        """
+        if not self.verify_in_executor:
+            return self.verify(sign, body)
+        return await asyncio.get_running_loop().run_in_executor(
+            None,
+            self.verify,
+            sign,
+            body,
+        )
 
     async def send(
         self,
@@ -221,6 +330,40 @@ class VillaBot(
             *(await chain.to_content_json(self)),
         )
 
+    async def send_queued(
+        self,
+        villa_id: int,
+        room_id: int,
+        chain: "MessageChain",
+    ) -> asyncio.Future[str]:
+        """通过出站消息队列发送消息，同一房间的消息按调用顺序发送
+
+        未配置 ``send_queue`` 时使用默认配置的 ``SendQueue``。
+
+        Args:
+            villa_id (int): 大别野 id
+            room_id (int): 房间 id
+            chain (MessageChain): 消息链
+
+        Returns:
+            asyncio.Future[str]: 发送完成后得到 bot_msg_id 的 future，无需结果时可以不等待
+        """  # noqa: E501
+        if self.send_queue is None:
+            self.send_queue = SendQueue()
+        return await self.send_queue.put(self, villa_id, room_id, chain)
+
+    async def close(self, timeout: float | None = 10) -> None:
+        """处理完排队的事件、发送完队列中的消息并关闭 Bot 持有的 HTTP 会话
+
+        Args:
+            timeout (float | None, optional): 等待处理事件与发送消息各自的最长时间（秒），超时后未完成的事件处理与消息发送会被取消，None 为一直等待. Defaults to 10.
+        """  # noqa: E501
+        if self.event_pool is not None:
+            await self.event_pool.close(timeout)
+        if self.send_queue is not None:
+            await self.send_queue.close(timeout)
+        await super().close()
+
     # event handle
 
     def register_handler(
@@ -229,7 +372,7 @@ class VillaBot(
         func: Callable[[TE, VillaBot], Coroutine[Any, Any, None]],
         temp: bool = False,
     ):
-        self.handlers.append(Handler[TE](event, func, temp))
+        self.dispatcher.add(Handler[TE](event, func, temp))
         logger.info(
             f"Registered the handler {func} "
             f"for {event.__name__} (temp: {temp})",
@@ -253,26 +396,37 @@ class VillaBot(
         return wrapper
 
     async def handle_event(self, event: Event) -> None:
-        handlers = list(filter(lambda x: x == event, self.handlers))
+        if self.cache is not None:
+            self.cache.invalidate_event(event)
+        handlers = self.dispatcher.handlers_for(event.__class__)
         logger.info(f"Handling event {event.__class__.__name__}")
-        need_remove_handlers = filter(lambda x: x.temp, handlers)
         try:
             await asyncio.gather(
                 *[handler(event, self) for handler in handlers],
             )
         except Exception:
             logger.exception("Raised exceptions while handling event.")
-        for handler in need_remove_handlers:
-            self.handlers.remove(handler)
-            logger.debug(f"Removed handler for {event.__class__.__name__}")
+        for handler in handlers:
+            if handler.temp:
+                self.dispatcher.remove(handler)
+                logger.debug(
+                    f"Removed handler for {event.__class__.__name__}",
+                )
 
     # message handle
     @staticmethod
     async def message_handler(event: "SendMessageEvent", bot: "VillaBot"):
         await asyncio.gather(
             *[
-                bot._run_message_handler(event, bot, handler)  # noqa: SLF001
-                for handler in bot.message_handlers
+                bot._run_message_handler(  # noqa: SLF001
+                    event,
+                    bot,
+                    handler,
+                    result,
+                )
+                for handler, result in bot.message_matcher.matches(
+                    event.message,
+                )
             ],
         )
 
@@ -281,13 +435,12 @@ class VillaBot(
         event: "SendMessageEvent",
         bot: "VillaBot",
         handler: MessageHandler,
+        result: MatchResult,
     ):
-        if not handler.check(event.message):
-            return
-        result = current_match_result.get()
+        current_match_result.set(result)
         await handler(event, bot, result)
         if handler.temp:
-            bot.message_handlers.remove(handler)
+            bot.message_matcher.remove(handler)
             logger.debug(f"Removed message handler with {handler.match}")
 
     def register_msg_handler(
@@ -296,7 +449,8 @@ class VillaBot(
         func: Callable[["SendMessageEvent", "VillaBot", TR], Awaitable[Any]],
         temp: bool = False,
     ):
-        self.message_handlers.append(MessageHandler[TR](match, func, temp))
+        handler = MessageHandler[TR](match, func, temp)
+        self.message_matcher.add(handler, match)
         logger.info(
             f"Registered the handler {func} with {match} (temp: {temp})",
         )
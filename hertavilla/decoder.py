@@ -0,0 +1,271 @@
+from __future__ import annotations
+
+from enum import Enum
+from typing import Any, Callable, Dict, TypeVar
+
+from hertavilla.event import Event, _flatten_event
+
+from pydantic import BaseModel, ValidationError
+from pydantic.fields import SHAPE_LIST, SHAPE_SINGLETON, ModelField
+from pydantic.validators import bool_validator, int_validator, str_validator
+
+TM = TypeVar("TM", bound=BaseModel)
+
+Converter = Callable[[Any, Dict[str, Any]], Any]
+ModelDecoder = Callable[[Dict[str, Any], bool], BaseModel]
+
+_MISSING = object()
+
+
+def _int(v: Any, _: dict[str, Any]) -> Any:
+    return int_validator(v)
+
+
+def _str(v: Any, _: dict[str, Any]) -> Any:
+    return str_validator(v)
+
+
+def _bool(v: Any, _: dict[str, Any]) -> Any:
+    return bool_validator(v)
+
+
+def _identity(v: Any, _: dict[str, Any]) -> Any:
+    return v
+
+
+def _list_of(item: Converter) -> Converter:
+    def convert(v: Any, values: dict[str, Any]) -> Any:
+        return [item(x, values) for x in v]
+
+    return convert
+
+
+_SCALARS: dict[type, Converter] = {
+    bool: _bool,
+    int: _int,
+    str: _str,
+    dict: _identity,
+}
+_FAST_TYPES: dict[Converter, type] = {_bool: bool, _int: int, _str: str}
+_IMMUTABLE = (type(None), bool, int, float, str, Enum)
+
+
+def _value_expression(convert: Converter, name: str) -> str:
+    # 生成转换变量 v 的表达式，name 为 convert 在生成代码中的变量名
+    if convert is _identity:
+        return "v"
+    if (type_ := _FAST_TYPES.get(convert)) is not None:
+        # 类型正确时无需调用转换函数
+        return f"v if v.__class__ is {type_.__name__} else {name}(v, values)"
+    return f"{name}(v, values)"
+
+
+class EventDecoder:
+    """不经过 pydantic 完整校验的事件解码器
+
+    首次解码某个模型时，根据其 pydantic 字段定义生成专用的解码函数并缓存，
+    解码函数直接转换各字段并构造模型，跳过类型检查等冗余的校验。
+    字段上的 ``pre`` 校验器（如将 JSON 字符串转为对象）仍会执行，
+    无法直接转换的字段回退到 pydantic 的字段校验。
+
+    解码结果与 ``parse_event`` 相同，但不会完整地检查数据，
+    仅应用于签名校验通过或来自 WebSocket 连接等可信来源的事件。
+    """
+
+    def __init__(self) -> None:
+        self._decoders: dict[type[BaseModel], ModelDecoder] = {}
+
+    def __call__(self, payload: dict[str, Any], lazy: bool = False) -> Event:
+        """解码事件，参数与 ``parse_event`` 相同
+
+        Args:
+            payload (dict[str, Any]): 事件数据
+            lazy (bool, optional): 是否延迟解析消息内容等开销较大的字段. Defaults to False.
+
+        Returns:
+            Event: 事件
+        """  # noqa: E501
+        cls_, payload = _flatten_event(payload)
+        return self.decode(cls_, payload, lazy)
+
+    def decode(
+        self,
+        model: type[TM],
+        data: dict[str, Any],
+        lazy: bool = False,
+    ) -> TM:
+        """将数据解码为模型
+
+        Args:
+            model (type[TM]): 模型
+            data (dict[str, Any]): 数据
+            lazy (bool, optional): 是否延迟解析 ``__lazy_fields__`` 中的字段. Defaults to False.
+
+        Returns:
+            TM: 模型实例
+        """  # noqa: E501
+        decoder = self._decoders.get(model)
+        if decoder is None:
+            decoder = self._decoders[model] = self._compile(model)
+        return decoder(data, lazy)  # type: ignore
+
+    def _compile(self, model: type[BaseModel]) -> ModelDecoder:
+        # 为每个模型生成一个展开了所有字段的解码函数
+        namespace: dict[str, Any] = {
+            "MISSING": _MISSING,
+            "model": model,
+            "new": model.__new__,
+            "setattr": object.__setattr__,
+        }
+        lazy_fields: tuple[str, ...] = getattr(model, "__lazy_fields__", ())
+        lines = [
+            "def decode(data, lazy):",
+            "    if not isinstance(data, dict):",
+            "        return model.parse_obj(data)",
+            "    values = {}",
+            "    fields_set = set()",
+        ]
+        if lazy_fields:
+            lines.append("    pending = {}")
+        for i, (name, field) in enumerate(model.__fields__.items()):
+            lines.extend(
+                (
+                    f"    v = data.get({field.alias!r}, MISSING)",
+                    "    if v is MISSING:",
+                ),
+            )
+            if field.required is True:
+                message = f"{model.__name__}.{field.alias} is required"
+                lines.append(f"        raise ValueError({message!r})")
+            elif field.default_factory is None and isinstance(
+                field.default,
+                _IMMUTABLE,
+            ):
+                namespace[f"default_{i}"] = field.default
+                lines.append(f"        values[{name!r}] = default_{i}")
+            else:
+                namespace[f"default_{i}"] = field.get_default
+                lines.append(f"        values[{name!r}] = default_{i}()")
+            lines.extend(("    else:", f"        fields_set.add({name!r})"))
+            expr = self._expression(model, field, i, namespace)
+            if name in lazy_fields:
+                lines.extend(
+                    (
+                        "        if lazy:",
+                        f"            pending[{name!r}] = v",
+                        "        else:",
+                        f"            values[{name!r}] = {expr}",
+                    ),
+                )
+            else:
+                lines.append(f"        values[{name!r}] = {expr}")
+        lines.extend(
+            (
+                "    instance = new(model)",
+                "    setattr(instance, '__dict__', values)",
+                "    setattr(instance, '__fields_set__', fields_set)",
+            ),
+        )
+        if model.__private_attributes__:
+            lines.append("    instance._init_private_attributes()")
+        if lazy_fields:
+            lines.extend(
+                ("    if pending:", "        instance._lazy.update(pending)"),
+            )
+        lines.append("    return instance")
+        exec("\n".join(lines), namespace)
+        return namespace["decode"]
+
+    def _expression(
+        self,
+        model: type[BaseModel],
+        field: ModelField,
+        index: int,
+        namespace: dict[str, Any],
+    ) -> str:
+        convert = self.field_converter(model, field)
+        namespace[f"convert_{index}"] = convert
+        expr = _value_expression(convert, f"convert_{index}")
+        return f"None if v is None else ({expr})" if field.allow_none else expr
+
+    def field_converter(
+        self,
+        model: type[BaseModel],
+        field: ModelField,
+    ) -> Converter:
+        """获取字段的转换函数
+
+        Args:
+            model (type[BaseModel]): 字段所属的模型
+            field (ModelField): 字段
+
+        Returns:
+            Converter: 接受原始值与已转换的字段值，返回字段值的函数
+        """
+        if field.post_validators or any(
+            not validator.pre for validator in field.class_validators.values()
+        ):
+            return self._fallback(model, field)
+        convert = self._type_converter(model, field)
+        if convert is None:
+            return self._fallback(model, field)
+        if not field.pre_validators:
+            return convert
+        pre_validators = field.pre_validators
+        config = field.model_config
+
+        def with_pre_validators(v: Any, values: dict[str, Any]) -> Any:
+            for validator in pre_validators:
+                v = validator(model, v, values, field, config)
+            return convert(v, values)
+
+        return with_pre_validators
+
+    def _type_converter(
+        self,
+        model: type[BaseModel],
+        field: ModelField,
+    ) -> Converter | None:
+        type_ = field.outer_type_
+        if field.shape == SHAPE_LIST and field.sub_fields:
+            item = self._type_converter(model, field.sub_fields[0])
+            return None if item is None else _list_of(item)
+        if field.shape != SHAPE_SINGLETON:
+            return None
+        if getattr(type_, "__origin__", None) is not None:
+            # Literal 等泛型，可信数据无需检查取值
+            return _identity if field.type_ is type_ else None
+        if isinstance(type_, type) and issubclass(type_, (BaseModel, Enum)):
+            return self._class_converter(type_)
+        if type_ in _SCALARS:
+            return _SCALARS[type_]
+        # 由 pre 校验器得到最终的值，如消息链
+        return _identity if field.pre_validators else None
+
+    def _class_converter(self, type_: type) -> Converter:
+        if issubclass(type_, Enum):
+            return lambda v, _: type_(v)
+
+        def decode_model(v: Any, _: dict[str, Any]) -> Any:
+            return v if isinstance(v, type_) else self.decode(type_, v)
+
+        return decode_model
+
+    @staticmethod
+    def _fallback(model: type[BaseModel], field: ModelField) -> Converter:
+        def validate(v: Any, values: dict[str, Any]) -> Any:
+            value, errors = field.validate(
+                v,
+                values,
+                loc=field.alias,
+                cls=model,  # type: ignore
+            )
+            if errors:
+                raise ValidationError([errors], model)
+            return value
+
+        return validate
+
+
+parse_event_fast = EventDecoder()
+"""使用 ``EventDecoder`` 解码事件，可作为后端的 ``event_parser``"""
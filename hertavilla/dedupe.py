@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+import logging
+import time
+from typing import Tuple
+
+from hertavilla.metrics import MetricsRegistry, default_registry
+
+logger = logging.getLogger("hertavilla.dedupe")
+
+EventKey = Tuple[str, str]
+
+
+class EventDeduplicator:
+    """事件去重
+
+    开放平台会重试未成功响应的回调，WebSocket 重连后也可能重复推送事件，
+    按事件 id 记录最近收到的事件，窗口内重复收到的事件不再分发。
+
+    窗口同时受时间与数量限制，超出任一限制的最早记录会被淘汰。
+
+    Args:
+        maxsize (int, optional): 最多记录的事件数，0 为关闭去重. Defaults to 4096.
+        ttl (float, optional): 事件记录的保留时间（秒）. Defaults to 600.
+        registry (MetricsRegistry, optional): 记录重复事件数的指标注册表. Defaults to default_registry.
+    """  # noqa: E501
+
+    def __init__(
+        self,
+        maxsize: int = 4096,
+        ttl: float = 600,
+        *,
+        registry: MetricsRegistry = default_registry,
+    ) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        # 按首次收到的时间排序
+        self._seen: OrderedDict[EventKey, float] = OrderedDict()
+        self._duplicates = registry.counter(
+            "hertavilla_events_deduplicated_total",
+            "Duplicate events suppressed before dispatch",
+            ("bot", "transport"),
+        )
+
+    def __len__(self) -> int:
+        """窗口内记录的事件数"""
+        return len(self._seen)
+
+    def __contains__(self, key: EventKey) -> bool:
+        expires = self._seen.get(key)
+        return expires is not None and expires > time.monotonic()
+
+    def is_duplicate(
+        self,
+        bot_id: str,
+        event_id: str,
+        transport: str = "",
+    ) -> bool:
+        """检查事件是否已经收到过，首次收到时记录该事件
+
+        Args:
+            bot_id (str): 收到事件的 Bot id
+            event_id (str): 事件 id
+            transport (str, optional): 收到事件的方式，用于指标标签. Defaults to "".
+
+        Returns:
+            bool: 窗口内是否已经收到过该事件
+        """  # noqa: E501
+        if self.maxsize <= 0:
+            return False
+        now = time.monotonic()
+        self._evict(now)
+        key = (bot_id, event_id)
+        if key in self._seen:
+            self._duplicates.inc(bot=bot_id, transport=transport)
+            logger.debug(
+                f"Suppressed duplicate event {event_id} on bot {bot_id}",
+            )
+            return True
+        self._seen[key] = now + self.ttl
+        if len(self._seen) > self.maxsize:
+            self._seen.popitem(last=False)
+        return False
+
+    def forget(self, bot_id: str, event_id: str) -> None:
+        """移除事件的记录，之后再次收到该事件时不视为重复（如事件未能分发时）
+
+        Args:
+            bot_id (str): 收到事件的 Bot id
+            event_id (str): 事件 id
+        """
+        self._seen.pop((bot_id, event_id), None)
+
+    def _evict(self, now: float) -> None:
+        seen = self._seen
+        while seen:
+            key, expires = next(iter(seen.items()))
+            if expires > now:
+                return
+            del seen[key]
+
+    def clear(self) -> None:
+        """清空窗口"""
+        self._seen.clear()
+
+    def __repr__(self) -> str:
+        return (
+            f"<EventDeduplicator size={len(self._seen)}/{self.maxsize} "
+            f"ttl={self.ttl}>"
+        )
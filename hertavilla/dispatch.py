@@ -0,0 +1,274 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import TYPE_CHECKING, Dict, Iterator
+
+from hertavilla.metrics import MetricsRegistry, default_registry
+
+if TYPE_CHECKING:
+    from hertavilla.bot import Handler, VillaBot
+    from hertavilla.event import Event
+
+logger = logging.getLogger("hertavilla.dispatch")
+
+HandlerSet = Dict["Handler", None]
+
+
+class EventDispatcher:
+    """按事件类型索引的事件处理器注册表
+
+    首次分发某个事件类型时，按注册顺序找出所有监听该类型或其父类的处理器并缓存，
+    之后分发同类型的事件无需再遍历全部处理器。
+    注册处理器时直接更新已缓存的类型，移除处理器（如临时处理器）与处理器数量无关。
+    """
+
+    def __init__(self) -> None:
+        # dict 保持注册顺序，同时支持 O(1) 移除
+        self._handlers: HandlerSet = {}
+        self._index: dict[type, HandlerSet] = {}
+
+    def __len__(self) -> int:
+        return len(self._handlers)
+
+    def __iter__(self) -> Iterator[Handler]:
+        return iter(self._handlers)
+
+    def __contains__(self, handler: Handler) -> bool:
+        return handler in self._handlers
+
+    def add(self, handler: Handler) -> None:
+        """注册处理器
+
+        Args:
+            handler (Handler): 事件处理器
+        """
+        self._handlers[handler] = None
+        for event, handlers in self._index.items():
+            if issubclass(event, handler.event):
+                handlers[handler] = None
+
+    def remove(self, handler: Handler) -> None:
+        """移除处理器，处理器未注册时不做任何事
+
+        Args:
+            handler (Handler): 事件处理器
+        """
+        if self._handlers.pop(handler, _MISSING) is _MISSING:
+            return
+        for handlers in self._index.values():
+            handlers.pop(handler, None)
+
+    def handlers_for(self, event: type[Event]) -> list[Handler]:
+        """获取处理某类型事件的处理器
+
+        Args:
+            event (type[Event]): 事件类型
+
+        Returns:
+            list[Handler]: 按注册顺序排列的处理器
+        """
+        handlers = self._index.get(event)
+        if handlers is None:
+            handlers = self._index[event] = {
+                handler: None
+                for handler in self._handlers
+                if issubclass(event, handler.event)
+            }
+        return list(handlers)
+
+    def clear(self) -> None:
+        """移除所有处理器"""
+        self._handlers.clear()
+        self._index.clear()
+
+    def __repr__(self) -> str:
+        return (
+            f"<EventDispatcher handlers={len(self._handlers)} "
+            f"indexed={len(self._index)}>"
+        )
+
+
+_MISSING = object()
+
+
+class EventWorkerPool:
+    """事件处理的 worker 池
+
+    收到的事件进入有界队列，由固定数量的 worker 依次调用 ``VillaBot.handle_event``，
+    同时处理的事件数与排队的事件数都有上限，突发流量不会创建大量并发任务。
+    队列满时，回调事件返回可重试的 503 响应，WebSocket 连接暂停读取直到队列有空位。
+
+    事件处理器等待后续事件（如通过临时处理器等待用户回复）时会一直占用 worker，
+    worker 数应大于同时等待的处理器数。
+    调用 ``close`` 后不再接受新的事件。
+
+    Args:
+        workers (int, optional): worker 数量，即同时处理的事件数上限. Defaults to 16.
+        maxsize (int, optional): 排队事件数上限，0 为不限制. Defaults to 1024.
+        registry (MetricsRegistry, optional): 记录队列深度与处理中事件数的指标注册表. Defaults to default_registry.
+    """  # noqa: E501
+
+    def __init__(
+        self,
+        workers: int = 16,
+        *,
+        maxsize: int = 1024,
+        registry: MetricsRegistry = default_registry,
+    ) -> None:
+        self.workers = workers
+        self.maxsize = maxsize
+        self._queue: asyncio.Queue[tuple[VillaBot, Event]] | None = None
+        self._tasks: list[asyncio.Task] = []
+        self._in_flight = 0
+        self._closed = False
+        self._depth = registry.gauge(
+            "hertavilla_event_queue_depth",
+            "Events waiting in the event worker pool",
+            ("bot",),
+        )
+        self._handling = registry.gauge(
+            "hertavilla_event_handlers_in_flight",
+            "Events currently being handled by the event worker pool",
+            ("bot",),
+        )
+        self._rejected = registry.counter(
+            "hertavilla_events_rejected_total",
+            "Events rejected because the event queue was full",
+            ("bot",),
+        )
+
+    def __len__(self) -> int:
+        """排队中（不包括正在处理）的事件数"""
+        return 0 if self._queue is None else self._queue.qsize()
+
+    @property
+    def in_flight(self) -> int:
+        """正在处理的事件数"""
+        return self._in_flight
+
+    @property
+    def closed(self) -> bool:
+        """是否已关闭"""
+        return self._closed
+
+    def full(self) -> bool:
+        """队列是否已满"""
+        return self._queue is not None and self._queue.full()
+
+    def _start(self) -> asyncio.Queue[tuple[VillaBot, Event]]:
+        loop = asyncio.get_running_loop()
+        if (
+            self._queue is not None
+            and self._tasks
+            and self._tasks[0].get_loop() is loop
+        ):
+            return self._queue
+        # 首次使用或事件循环已改变
+        self._queue = asyncio.Queue(self.maxsize)
+        self._in_flight = 0
+        self._tasks = [
+            asyncio.create_task(self._worker()) for _ in range(self.workers)
+        ]
+        return self._queue
+
+    def put_nowait(self, bot: VillaBot, event: Event) -> bool:
+        """将事件加入队列，队列已满时不等待
+
+        Args:
+            bot (VillaBot): 收到事件的 Bot
+            event (Event): 事件
+
+        Returns:
+            bool: 是否加入了队列，队列已满或已关闭时为 False
+        """
+        if self._refuse(bot, event):
+            return False
+        queue = self._start()
+        try:
+            queue.put_nowait((bot, event))
+        except asyncio.QueueFull:
+            self._rejected.inc(bot=bot.bot_id)
+            logger.warning(
+                f"Event queue is full, rejected event {event.id} "
+                f"on bot {bot.bot_id}",
+            )
+            return False
+        self._depth.inc(bot=bot.bot_id)
+        return True
+
+    async def put(self, bot: VillaBot, event: Event) -> bool:
+        """将事件加入队列，队列已满时等待
+
+        Args:
+            bot (VillaBot): 收到事件的 Bot
+            event (Event): 事件
+
+        Returns:
+            bool: 是否加入了队列，已关闭时为 False
+        """
+        if self._refuse(bot, event):
+            return False
+        await self._start().put((bot, event))
+        self._depth.inc(bot=bot.bot_id)
+        return True
+
+    def _refuse(self, bot: VillaBot, event: Event) -> bool:
+        if not self._closed:
+            return False
+        # 关闭后收到的事件不再处理，避免重新启动 worker
+        logger.warning(
+            f"Event worker pool is closed, dropped event {event.id} "
+            f"on bot {bot.bot_id}",
+        )
+        return True
+
+    async def _worker(self) -> None:
+        assert self._queue is not None
+        queue = self._queue
+        while True:
+            bot, event = await queue.get()
+            self._depth.dec(bot=bot.bot_id)
+            self._in_flight += 1
+            self._handling.inc(bot=bot.bot_id)
+            try:
+                await bot.handle_event(event)
+            except Exception:
+                logger.exception("Raised exceptions while handling event.")
+            finally:
+                self._in_flight -= 1
+                self._handling.dec(bot=bot.bot_id)
+                queue.task_done()
+
+    async def join(self) -> None:
+        """等待队列中的事件全部处理完成"""
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def close(self, timeout: float | None = None) -> None:
+        """不再接受新的事件，处理完队列中的事件后停止 worker
+
+        Args:
+            timeout (float | None, optional): 等待处理的最长时间（秒），超时后未处理的事件会被丢弃，正在处理的事件会被取消. Defaults to None.
+        """  # noqa: E501
+        self._closed = True
+        if not self._tasks or self._queue is None:
+            return
+        try:
+            await asyncio.wait_for(self.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"{len(self)} queued events are dropped")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        while not self._queue.empty():
+            bot, _ = self._queue.get_nowait()
+            self._depth.dec(bot=bot.bot_id)
+        self._queue = None
+
+    def __repr__(self) -> str:
+        return (
+            f"<EventWorkerPool workers={self.workers} queued={len(self)} "
+            f"in_flight={self._in_flight}>"
+        )
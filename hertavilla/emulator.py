@@ -0,0 +1,630 @@
+"""本地大别野 API 模拟器
+
+在本机运行一个实现了 SDK 所调用接口的 aiohttp 应用，
+用于在不连接开放平台的情况下进行压测和基准测试。
+
+```python
+async with VillaEmulator(latency=0.05, error_rate=0.01) as emulator:
+    bot = VillaBot(..., api_base=emulator.api_base)
+```
+
+也可以通过 ``python -m hertavilla.emulator --port 8080`` 单独运行。
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections import Counter
+from dataclasses import dataclass
+import itertools
+import json
+import logging
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict
+
+from aiohttp import web
+
+logger = logging.getLogger("hertavilla.emulator")
+
+Handler = Callable[[int, Dict[str, Any]], Awaitable[Dict[str, Any]]]
+
+RATE_LIMIT_RETCODE = -429
+"""超出模拟器频率限制时返回的 retcode（仅在 ``rate_limit_status=200`` 时使用），对应可重试的 ``RateLimitExceeded``"""  # noqa: E501
+
+
+@dataclass
+class EndpointBehavior:
+    """接口的模拟行为
+
+    Args:
+        latency (float, optional): 响应延迟（秒）. Defaults to 0.
+        jitter (float, optional): 延迟的随机增加量上限（秒）. Defaults to 0.
+        error_rate (float, optional): 返回 retcode -502 (``UnknownServerError``) 的概率. Defaults to 0.
+        http_error_rate (float, optional): 返回 HTTP 503 的概率. Defaults to 0.
+        rate_limit (float | None, optional): 每个 Bot 每个大别野每秒允许的调用次数，None 为不限制. Defaults to None.
+        rate_limit_status (int, optional): 超出频率限制时返回的 HTTP 状态码，200 时改为返回 ``RATE_LIMIT_RETCODE``. Defaults to 429.
+    """  # noqa: E501
+
+    latency: float = 0
+    jitter: float = 0
+    error_rate: float = 0
+    http_error_rate: float = 0
+    rate_limit: float | None = None
+    rate_limit_status: int = 429
+
+
+class VillaEmulator:
+    """大别野开放平台 API 模拟器
+
+    模拟器维护一份内存中的大别野数据（成员、房间、分组、身份组、表情），
+    修改类接口会改动这份数据，``sendMessage`` 等接口的调用参数会被记录下来供断言使用。
+    WebSocket 协议本身不在模拟范围内，``/getWebsocketInfo`` 只返回接入信息。
+
+    Args:
+        behavior (EndpointBehavior | None, optional): 所有接口默认的模拟行为. Defaults to None.
+        endpoints (dict[str, EndpointBehavior] | None, optional): 各接口路径（如 ``/sendMessage``）单独的模拟行为. Defaults to None.
+        members (int, optional): 每个大别野的成员数. Defaults to 100.
+        rooms (int, optional): 每个大别野的房间数. Defaults to 10.
+        seed (int | None, optional): 随机数种子. Defaults to None.
+        **kwargs: 作为 ``EndpointBehavior`` 的参数构造默认行为
+    """  # noqa: E501
+
+    def __init__(
+        self,
+        behavior: EndpointBehavior | None = None,
+        *,
+        endpoints: dict[str, EndpointBehavior] | None = None,
+        members: int = 100,
+        rooms: int = 10,
+        seed: int | None = None,
+        **kwargs: Any,
+    ) -> None:
+        self.behavior = behavior or EndpointBehavior(**kwargs)
+        self.endpoints = endpoints or {}
+        self.member_count = members
+        self.room_count = rooms
+        self.random = random.Random(seed)
+
+        self.requests: Counter[str] = Counter()
+        """各接口收到的请求数"""
+        self.errors: Counter[str] = Counter()
+        """各接口注入错误的次数"""
+        self.rate_limited: Counter[str] = Counter()
+        """各接口因超出频率限制被拒绝的次数"""
+        self.messages: list[dict[str, Any]] = []
+        """收到的 ``/sendMessage`` 调用"""
+        self.uploads: dict[str, bytes] = {}
+        """上传到模拟 OSS 的文件"""
+
+        self._windows: dict[tuple[str, str, int], tuple[int, int]] = {}
+        self._ids = itertools.count(1000)
+        self._kicked: set[tuple[int, int]] = set()
+        self._roles: dict[int, dict[int, dict[str, Any]]] = {}
+        self._member_roles: dict[tuple[int, int], set[int]] = {}
+        self._runner: web.AppRunner | None = None
+        self.api_base = ""
+        """模拟器的 API 地址，启动后可用"""
+
+        self._handlers: dict[str, Handler] = {
+            "/checkMemberBotAccessToken": self._check_member_bot_access_token,
+            "/getVilla": self._get_villa,
+            "/getMember": self._get_member,
+            "/getVillaMembers": self._get_villa_members,
+            "/deleteVillaMember": self._delete_villa_member,
+            "/pinMessage": self._ok,
+            "/recallMessage": self._ok,
+            "/sendMessage": self._send_message,
+            "/createComponentTemplate": self._create_component_template,
+            "/createGroup": self._create_group,
+            "/editGroup": self._ok,
+            "/deleteGroup": self._ok,
+            "/getGroupList": self._get_group_list,
+            "/editRoom": self._ok,
+            "/deleteRoom": self._ok,
+            "/getRoom": self._get_room,
+            "/getVillaGroupRoomList": self._get_villa_group_room_list,
+            "/operateMemberToRole": self._operate_member_to_role,
+            "/createMemberRole": self._create_member_role,
+            "/editMemberRole": self._ok,
+            "/deleteMemberRole": self._delete_member_role,
+            "/getMemberRoleInfo": self._get_member_role_info,
+            "/getVillaMemberRoles": self._get_villa_member_roles,
+            "/getAllEmoticons": self._get_all_emoticons,
+            "/audit": self._audit,
+            "/transferImage": self._transfer_image,
+            "/getUploadImageParams": self._get_upload_image_params,
+            "/getWebsocketInfo": self._get_websocket_info,
+        }
+        self.app = web.Application()
+        self.app.router.add_route("*", "/oss/upload", self._handle_upload)
+        self.app.router.add_route("*", "/{api}", self._handle_api)
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """启动模拟器
+
+        Args:
+            host (str, optional): 监听地址. Defaults to "127.0.0.1".
+            port (int, optional): 监听端口，0 为随机端口. Defaults to 0.
+
+        Returns:
+            str: API 地址，可作为 ``VillaBot`` 的 ``api_base`` 参数
+        """
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+        host, port = self._runner.addresses[0][:2]
+        self.api_base = f"http://{host}:{port}"
+        logger.info(f"Villa API emulator running on {self.api_base}")
+        return self.api_base
+
+    async def close(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self) -> VillaEmulator:
+        await self.start()
+        return self
+
+    async def __aexit__(self, *_: Any) -> None:
+        await self.close()
+
+    def _behavior(self, api: str) -> EndpointBehavior:
+        return self.endpoints.get(api, self.behavior)
+
+    def _rate_limited(
+        self,
+        api: str,
+        request: web.Request,
+        behavior: EndpointBehavior,
+    ) -> bool:
+        if behavior.rate_limit is None:
+            return False
+        key = (
+            api,
+            request.headers.get("x-rpc-bot_id", ""),
+            int(request.headers.get("x-rpc-bot_villa_id", 0)),
+        )
+        # 固定一秒窗口计数
+        window = int(time.monotonic())
+        start, count = self._windows.get(key, (window, 0))
+        if start != window:
+            start, count = window, 0
+        self._windows[key] = (start, count + 1)
+        return count + 1 > behavior.rate_limit
+
+    async def _inject(
+        self,
+        api: str,
+        request: web.Request,
+    ) -> web.Response | None:
+        self.requests[api] += 1
+        behavior = self._behavior(api)
+        if behavior.latency or behavior.jitter:
+            await asyncio.sleep(
+                behavior.latency + self.random.uniform(0, behavior.jitter),
+            )
+        if self._rate_limited(api, request, behavior):
+            self.rate_limited[api] += 1
+            if behavior.rate_limit_status != 200:  # noqa: PLR2004
+                return web.Response(status=behavior.rate_limit_status)
+            return _reply(retcode=RATE_LIMIT_RETCODE, message="rate limited")
+        if self.random.random() < behavior.http_error_rate:
+            self.errors[api] += 1
+            return web.Response(status=503)
+        if self.random.random() < behavior.error_rate:
+            self.errors[api] += 1
+            return _reply(retcode=-502, message="injected server error")
+        return None
+
+    async def _handle_api(self, request: web.Request) -> web.Response:
+        api = f"/{request.match_info['api']}"
+        if (handler := self._handlers.get(api)) is None:
+            raise web.HTTPNotFound
+        # 先读取请求体，客户端在模拟延迟期间超时断开时请求仍会被记录和处理
+        payload: dict[str, Any] = dict(request.query)
+        if request.can_read_body:
+            payload.update(await request.json())
+        if (resp := await self._inject(api, request)) is not None:
+            return resp
+        villa_id = int(request.headers.get("x-rpc-bot_villa_id", 0))
+        try:
+            data = await handler(villa_id, payload)
+        except (KeyError, ValueError) as e:
+            return _reply(retcode=-1, message=f"invalid request: {e!r}")
+        except _APIError as e:
+            return _reply(retcode=e.retcode, message=e.message)
+        return _reply(data)
+
+    async def _handle_upload(self, request: web.Request) -> web.Response:
+        form = await request.post()
+        if (resp := await self._inject("/oss/upload", request)) is not None:
+            return resp
+        file = form["file"]
+        content = file if isinstance(file, (bytes, str)) else file.file.read()
+        key = str(form["key"])
+        self.uploads[key] = (
+            content.encode() if isinstance(content, str) else content
+        )
+        return _reply({"url": f"{self.api_base}/oss/{key}"})
+
+    # 模拟数据
+
+    def _member(self, villa_id: int, uid: int) -> dict[str, Any]:
+        if not 0 < uid <= self.member_count or (villa_id, uid) in self._kicked:
+            raise _APIError(-1, f"member {uid} not found")
+        role_ids = sorted(self._member_roles.get((villa_id, uid), ()))
+        roles = self._villa_roles(villa_id)
+        return {
+            "basic": {
+                "uid": uid,
+                "nickname": f"member{uid}",
+                "introduce": "",
+                "avatar": "1",
+                "avatar_url": f"https://example.com/avatar/{uid}.png",
+            },
+            "role_id_list": role_ids,
+            "joined_at": str(1600000000 + uid),
+            "role_list": [roles[role_id] for role_id in role_ids],
+        }
+
+    def _villa_roles(self, villa_id: int) -> dict[int, dict[str, Any]]:
+        if (roles := self._roles.get(villa_id)) is None:
+            roles = self._roles[villa_id] = {}
+            self._add_role(villa_id, "所有人", "MEMBER_ROLE_TYPE_ALL_MEMBER")
+        return roles
+
+    def _add_role(
+        self,
+        villa_id: int,
+        name: str,
+        role_type: str = "MEMBER_ROLE_TYPE_CUSTOM",
+        color: str = "#6173AB",
+    ) -> int:
+        role_id = next(self._ids)
+        self._villa_roles(villa_id)[role_id] = {
+            "id": str(role_id),
+            "name": name,
+            "color": color,
+            "villa_id": str(villa_id),
+            "role_type": role_type,
+            "member_num": "0",
+            "permissions": [],
+            "web_color": color,
+            "font_color": color,
+            "bg_color": color,
+            "is_all_room": False,
+            "room_ids": [],
+            "color_scheme_id": 0,
+        }
+        return role_id
+
+    def _room(self, room_id: int) -> dict[str, Any]:
+        if not 0 < room_id <= self.room_count:
+            raise _APIError(-1, f"room {room_id} not found")
+        return {
+            "room_id": room_id,
+            "room_name": f"room{room_id}",
+            "room_type": "BOT_PLATFORM_ROOM_TYPE_CHAT_ROOM",
+            "group_id": 1,
+        }
+
+    # 接口实现
+
+    async def _ok(self, villa_id: int, data: dict[str, Any]) -> dict[str, Any]:
+        return {}
+
+    async def _check_member_bot_access_token(
+        self,
+        villa_id: int,
+        data: dict[str, Any],
+    ) -> dict[str, Any]:
+        # token 形如 "<villa_id>:<uid>"
+        villa, uid = (int(i) for i in data["token"].split(":"))
+        return {
+            "access_info": {
+                "uid": uid,
+                "villa_id": villa,
+                "member_access_token": data["token"],
+                "bot_tpl_id": "emulator",
+            },
+            "member": self._member(villa, uid),
+        }
+
+    async def _get_villa(
+        self,
+        villa_id: int,
+        data: dict[str, Any],
+    ) -> dict[str, Any]:
+        return {
+            "villa": {
+                "villa_id": villa_id,
+                "name": f"villa{villa_id}",
+                "villa_avatar_url": "https://example.com/villa.png",
+                "owner_uid": 1,
+                "is_official": False,
+                "introduce": "",
+                "category_id": 0,
+                "tags": [],
+            },
+        }
+
+    async def _get_member(
+        self,
+        villa_id: int,
+        data: dict[str, Any],
+    ) -> dict[str, Any]:
+        return {"member": self._member(villa_id, int(data["uid"]))}
+
+    async def _get_villa_members(
+        self,
+        villa_id: int,
+        data: dict[str, Any],
+    ) -> dict[str, Any]:
+        offset = int(data.get("offset_str") or 0)
+        size = int(data.get("size", 10))
+        uids = [
+            uid
+            for uid in range(
+                offset + 1,
+                min(offset + size, self.member_count) + 1,
+            )
+            if (villa_id, uid) not in self._kicked
+        ]
+        end = offset + size
+        return {
+            "list": [self._member(villa_id, uid) for uid in uids],
+            "next_offset_str": str(end) if end < self.member_count else "",
+        }
+
+    async def _delete_villa_member(
+        self,
+        villa_id: int,
+        data: dict[str, Any],
+    ) -> dict[str, Any]:
+        self._member(villa_id, int(data["uid"]))
+        self._kicked.add((villa_id, int(data["uid"])))
+        return {}
+
+    async def _send_message(
+        self,
+        villa_id: int,
+        data: dict[str, Any],
+    ) -> dict[str, Any]:
+        self._room(int(data["room_id"]))
+        json.loads(data["msg_content"])
+        self.messages.append({"villa_id": villa_id, **data})
+        return {"bot_msg_id": f"emulator-{next(self._ids)}"}
+
+    async def _create_component_template(
+        self,
+        villa_id: int,
+        data: dict[str, Any],
+    ) -> dict[str, Any]:
+        return {"template_id": next(self._ids)}
+
+    async def _create_group(
+        self,
+        villa_id: int,
+        data: dict[str, Any],
+    ) -> dict[str, Any]:
+        return {"group_id": next(self._ids)}
+
+    async def _get_group_list(
+        self,
+        villa_id: int,
+        data: dict[str, Any],
+    ) -> dict[str, Any]:
+        return {"list": [{"group_id": 1, "group_name": "group1"}]}
+
+    async def _get_room(
+        self,
+        villa_id: int,
+        data: dict[str, Any],
+    ) -> dict[str, Any]:
+        return {
+            "room": {
+                **self._room(int(data["room_id"])),
+                "room_default_notify_type": "BOT_PLATFORM_DEFAULT_NOTIFY_TYPE_NOTIFY",  # noqa: E501
+                "send_msg_auth_range": {"is_all_send_msg": True, "roles": []},
+            },
+        }
+
+    async def _get_villa_group_room_list(
+        self,
+        villa_id: int,
+        data: dict[str, Any],
+    ) -> dict[str, Any]:
+        return {
+            "list": [
+                {
+                    "group_id": 1,
+                    "group_name": "group1",
+                    "room_list": [
+                        self._room(room_id)
+                        for room_id in range(1, self.room_count + 1)
+                    ],
+                },
+            ],
+        }
+
+    async def _operate_member_to_role(
+        self,
+        villa_id: int,
+        data: dict[str, Any],
+    ) -> dict[str, Any]:
+        uid, role_id = int(data["uid"]), int(data["role_id"])
+        self._member(villa_id, uid)
+        if role_id not in self._villa_roles(villa_id):
+            raise _APIError(-1, f"role {role_id} not found")
+        roles = self._member_roles.setdefault((villa_id, uid), set())
+        if data["is_add"]:
+            roles.add(role_id)
+        else:
+            roles.discard(role_id)
+        return {}
+
+    async def _create_member_role(
+        self,
+        villa_id: int,
+        data: dict[str, Any],
+    ) -> dict[str, Any]:
+        return {
+            "id": self._add_role(villa_id, data["name"], color=data["color"]),
+        }
+
+    async def _delete_member_role(
+        self,
+        villa_id: int,
+        data: dict[str, Any],
+    ) -> dict[str, Any]:
+        self._villa_roles(villa_id).pop(int(data["id"]), None)
+        for roles in self._member_roles.values():
+            roles.discard(int(data["id"]))
+        return {}
+
+    async def _get_member_role_info(
+        self,
+        villa_id: int,
+        data: dict[str, Any],
+    ) -> dict[str, Any]:
+        if (
+            role := self._villa_roles(villa_id).get(int(data["role_id"]))
+        ) is None:
+            raise _APIError(-1, f"role {data['role_id']} not found")
+        return {"role": role}
+
+    async def _get_villa_member_roles(
+        self,
+        villa_id: int,
+        data: dict[str, Any],
+    ) -> dict[str, Any]:
+        return {"list": list(self._villa_roles(villa_id).values())}
+
+    async def _get_all_emoticons(
+        self,
+        villa_id: int,
+        data: dict[str, Any],
+    ) -> dict[str, Any]:
+        return {
+            "list": [
+                {
+                    "emoticon_id": i,
+                    "describe_text": f"emoticon{i}",
+                    "icon": f"https://example.com/emoticon/{i}.png",
+                }
+                for i in range(1, 11)
+            ],
+        }
+
+    async def _audit(
+        self,
+        villa_id: int,
+        data: dict[str, Any],
+    ) -> dict[str, Any]:
+        return {"audit_id": str(next(self._ids))}
+
+    async def _transfer_image(
+        self,
+        villa_id: int,
+        data: dict[str, Any],
+    ) -> dict[str, Any]:
+        return {"new_url": f"{self.api_base}/oss/{next(self._ids)}.png"}
+
+    async def _get_upload_image_params(
+        self,
+        villa_id: int,
+        data: dict[str, Any],
+    ) -> dict[str, Any]:
+        file_name = f"{data['md5']}.{data['ext']}"
+        return {
+            "type": "oss",
+            "file_name": file_name,
+            "max_file_size": 20480,
+            "params": {
+                "accessid": "emulator",
+                "callback": "",
+                "callback_var": {"x:extra": ""},
+                "dir": "images/",
+                "expire": str(int(time.time()) + 3600),
+                "host": f"{self.api_base}/oss/upload",
+                "name": file_name,
+                "policy": "",
+                "signature": "",
+                "x_oss_content_type": f"image/{data['ext']}",
+                "object_acl": "default",
+                "content_disposition": "",
+                "key": f"images/{file_name}",
+                "success_action_status": "200",
+            },
+        }
+
+    async def _get_websocket_info(
+        self,
+        villa_id: int,
+        data: dict[str, Any],
+    ) -> dict[str, Any]:
+        return {
+            "websocket_url": f"{self.api_base.replace('http', 'ws', 1)}/ws",
+            "uid": "1",
+            "app_id": 104,
+            "platform": 3,
+            "device_id": "emulator",
+        }
+
+
+class _APIError(Exception):
+    def __init__(self, retcode: int, message: str) -> None:
+        self.retcode = retcode
+        self.message = message
+
+
+def _reply(
+    data: dict[str, Any] | None = None,
+    *,
+    retcode: int = 0,
+    message: str = "OK",
+) -> web.Response:
+    return web.json_response(
+        {"retcode": retcode, "message": message, "data": data or {}},
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Villa API emulator")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency", type=float, default=0)
+    parser.add_argument("--jitter", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0)
+    parser.add_argument("--http-error-rate", type=float, default=0)
+    parser.add_argument("--rate-limit", type=float, default=None)
+    parser.add_argument("--members", type=int, default=100)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    emulator = VillaEmulator(
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        http_error_rate=args.http_error_rate,
+        rate_limit=args.rate_limit,
+        members=args.members,
+    )
+
+    async def run() -> None:
+        await emulator.start(args.host, args.port)
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await emulator.close()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
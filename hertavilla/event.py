@@ -4,21 +4,36 @@ from __future__ import annotations
 from enum import IntEnum
 import json
 import sys
-from typing import Any, List, Literal, Optional, Type
+from typing import (
+    Any,
+    Callable,
+    ClassVar,
+    Dict,
+    List,
+    Literal,
+    Optional,
+    Tuple,
+    Type,
+)
 
 from hertavilla.message import (
     MessageChain,
 )
+from hertavilla.message.entity import entities_to_chain
 from hertavilla.message.text import (
-    EntityDict,
     MentionedInfo,
     QuoteInfo,
-    Text,
-    entity_types,
 )
-from hertavilla.utils import _rc
 
-from pydantic import BaseModel, Field, create_model_from_typeddict, validator
+from pydantic import (
+    BaseModel,
+    Field,
+    PrivateAttr,
+    ValidationError,
+    create_model_from_typeddict,
+    validate_model,
+    validator,
+)
 
 if sys.version_info >= (3, 11):
     from typing import Self
@@ -27,6 +42,117 @@ else:
 
 events: dict[int, tuple[Type["Event"], str]] = {}
 
+EventParser = Callable[[Dict[str, Any], bool], "Event"]
+"""事件解析函数，参数为事件数据与是否延迟解析"""
+
+
+class LazyModel(BaseModel):
+    """支持延迟解析的模型
+
+    通过 ``parse_lazy`` 创建时，``__lazy_fields__`` 中的字段保留原始数据，
+    首次访问时才进行解析与校验，其余字段与 ``parse_obj`` 相同。
+    """
+
+    __lazy_fields__: ClassVar[Tuple[str, ...]] = ()
+
+    _lazy: Dict[str, Any] = PrivateAttr(default_factory=dict)
+
+    @classmethod
+    def parse_lazy(cls, obj: dict[str, Any]) -> Self:
+        """解析数据，``__lazy_fields__`` 中的字段延迟到首次访问时解析
+
+        Args:
+            obj (dict[str, Any]): 原始数据
+
+        Returns:
+            Self: 模型实例
+        """
+        if not isinstance(obj, dict):
+            return cls.parse_obj(obj)
+        eager = dict(obj)
+        lazy: dict[str, Any] = {}
+        for name in cls.__lazy_fields__:
+            alias = cls.__fields__[name].alias
+            if alias in eager:
+                lazy[name] = eager.pop(alias)
+        values, fields_set, error = validate_model(cls, eager)
+        if error is not None:
+            # 延迟字段的缺失错误不是真正的错误
+            skipped = {cls.__fields__[name].alias for name in lazy}
+            errors = [
+                e for e in error.raw_errors if e.loc_tuple()[0] not in skipped
+            ]
+            if errors:
+                raise ValidationError(errors, cls)
+        for name in lazy:
+            values.pop(name, None)
+        model = cls.__new__(cls)
+        object.__setattr__(model, "__dict__", values)
+        object.__setattr__(model, "__fields_set__", fields_set | lazy.keys())
+        model._init_private_attributes()  # noqa: SLF001
+        model._lazy.update(lazy)  # noqa: SLF001
+        return model
+
+    def _decode_lazy(self, name: str, raw: Any) -> Any:
+        field = self.__fields__[name]
+        value, errors = field.validate(
+            raw,
+            self.__dict__,
+            loc=field.alias,
+            cls=self.__class__,  # type: ignore
+        )
+        if errors:
+            raise ValidationError([errors], self.__class__)
+        return value
+
+    def _load(self, name: str) -> Any:
+        value = self._decode_lazy(name, self._lazy[name])
+        del self._lazy[name]
+        self.__dict__[name] = value
+        if not self._lazy:
+            self._restore_order()
+        return value
+
+    def _load_all(self) -> None:
+        if not self._lazy:
+            return
+        for name in list(self._lazy):
+            if name in self.__dict__:
+                # 已被重新赋值
+                del self._lazy[name]
+            else:
+                self._load(name)
+        self._restore_order()
+
+    def _restore_order(self) -> None:
+        # 使 dict()、json() 的字段顺序与 parse_obj 一致
+        values = self.__dict__
+        ordered = {
+            name: values[name] for name in self.__fields__ if name in values
+        }
+        ordered.update(values)
+        object.__setattr__(self, "__dict__", ordered)
+
+    def __getattr__(self, name: str) -> Any:
+        # 仅在常规查找失败（即字段尚未解析）时调用
+        try:
+            lazy = object.__getattribute__(self, "_lazy")
+        except AttributeError:
+            lazy = {}
+        if name in lazy:
+            return self._load(name)
+        raise AttributeError(
+            f"{self.__class__.__name__!r} object has no attribute {name!r}",
+        )
+
+    def _iter(self, *args: Any, **kwargs: Any) -> Any:
+        self._load_all()
+        return super()._iter(*args, **kwargs)
+
+    def __repr_args__(self) -> Any:
+        self._load_all()
+        return super().__repr_args__()
+
 
 class Command(BaseModel):
     name: str
@@ -50,7 +176,7 @@ class Robot(BaseModel):
     """事件所属的大别野 id"""
 
 
-class Event(BaseModel):
+class Event(LazyModel):
     robot: Robot
     """用户机器人访问凭证"""
     type: int
@@ -123,7 +249,9 @@ class Trace(BaseModel):
     rong_sdk_version: str
 
 
-class MessageContent(BaseModel):
+class MessageContent(LazyModel):
+    __lazy_fields__ = ("content", "user")
+
     content: MessageChain
     mentioned_info: Optional[MentionedInfoModel] = Field(  # type: ignore
         None,
@@ -135,32 +263,7 @@ class MessageContent(BaseModel):
 
     @validator("content", pre=True)
     def parse_content(cls, v: Any):
-        chain = MessageChain()
-        text = v["text"].encode("utf-16")
-        entities = v["entities"]
-        last_offset = 0
-        last_length = 0
-        end_offset = 0
-        for entity in entities:
-            entity: EntityDict
-            offset = entity["offset"]
-            body = entity["entity"]
-            type_ = body.pop("type")
-            if offset != end_offset:
-                # 两个 Entity 偏移相差为文字
-                chain.append(
-                    Text(text[_rc(end_offset) : _rc(offset)].decode("utf-16")),
-                )
-            chain.append(entity_types[type_](**body))
-            last_offset = offset
-            last_length = entity["length"]
-            end_offset = last_offset + last_length
-        if _rc(end_offset) != len(text):
-            # 最后一个 Entity 之后是文字
-            chain.append(
-                Text(text[_rc(end_offset) :].decode("utf-16")),
-            )
-        return chain
+        return entities_to_chain(v["text"], v["entities"])
 
 
 class QuoteMsg(BaseModel):
@@ -175,6 +278,8 @@ class QuoteMsg(BaseModel):
 
 
 class SendMessageEvent(Event):
+    __lazy_fields__ = ("content", "quote_msg")
+
     type: Literal[2]
 
     content: MessageContent
@@ -199,6 +304,14 @@ class SendMessageEvent(Event):
     def str_to_json(cls, v: Any):
         return json.loads(v)
 
+    def _decode_lazy(self, name: str, raw: Any) -> Any:
+        if name == "content" and isinstance(raw, (str, dict)):
+            # 消息内容同样延迟解析消息链与用户信息
+            return MessageContent.parse_lazy(
+                json.loads(raw) if isinstance(raw, str) else raw,
+            )
+        return super()._decode_lazy(name, raw)
+
     @property
     def message(self) -> MessageChain:
         return self.content.content
@@ -296,7 +409,9 @@ class ClickMsgComponentEvent(Event):
     """机器人自定义透传信息"""
 
 
-def parse_event(payload: dict[str, Any]) -> Event:
+def _flatten_event(
+    payload: dict[str, Any],
+) -> tuple[type[Event], dict[str, Any]]:
     type_: int = payload["type"]
     cls_, name = events[type_]
     extend = payload["extend_data"]
@@ -304,4 +419,18 @@ def parse_event(payload: dict[str, Any]) -> Event:
     data = extend["EventData"][name] if "EventData" in extend else extend[name]
     payload.pop("extend_data")
     payload |= data
-    return cls_.parse_obj(payload)
+    return cls_, payload
+
+
+def parse_event(payload: dict[str, Any], lazy: bool = False) -> Event:
+    """解析事件
+
+    Args:
+        payload (dict[str, Any]): 事件数据
+        lazy (bool, optional): 是否延迟解析消息内容等开销较大的字段，这些字段会在首次访问时解析. Defaults to False.
+
+    Returns:
+        Event: 事件
+    """  # noqa: E501
+    cls_, payload = _flatten_event(payload)
+    return cls_.parse_lazy(payload) if lazy else cls_.parse_obj(payload)
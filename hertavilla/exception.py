@@ -1,6 +1,7 @@
 from __future__ import annotations
 
-from typing import Any
+import asyncio
+from typing import Any, ClassVar
 
 call_api_exceptions: dict[int, type[_ExceptionWithRetcode]] = {}
 
@@ -14,6 +15,11 @@ class SDKException(Exception):
 
 
 class HTTPStatusError(SDKException):
+    retryable_statuses: ClassVar[frozenset[int]] = frozenset(
+        {408, 429, 500, 502, 503, 504},
+    )
+    """可重试的 HTTP 状态码"""
+
     def __init__(
         self,
         /,
@@ -21,10 +27,55 @@ class HTTPStatusError(SDKException):
     ) -> None:
         self.status = status
 
+    @property
+    def retryable(self) -> bool:
+        return self.status in self.retryable_statuses
+
     def __repr__(self) -> str:
         return "<HTTPStatusError status={self.status}"
 
 
+class CircuitOpenError(SDKException):
+    def __init__(
+        self,
+        /,
+        api: str,
+        villa_id: int | None = None,
+        retry_after: float = 0,
+    ) -> None:
+        self.api = api
+        self.villa_id = villa_id
+        self.retry_after = retry_after
+        """距离允许探测请求的剩余时间（秒）"""
+
+    def __repr__(self) -> str:
+        return (
+            f"<CircuitOpenError api={self.api!r}, villa_id={self.villa_id}, "
+            f"retry_after={self.retry_after:.2f}>"
+        )
+
+    def __str__(self) -> str:
+        return repr(self)
+
+
+class APITimeoutError(SDKException, asyncio.TimeoutError):
+    def __init__(
+        self,
+        /,
+        api: str,
+        timeout: float | None = None,
+    ) -> None:
+        self.api = api
+        self.timeout = timeout
+        """超时前可用的时间（秒）"""
+
+    def __repr__(self) -> str:
+        return f"<APITimeoutError api={self.api!r}, timeout={self.timeout}>"
+
+    def __str__(self) -> str:
+        return repr(self)
+
+
 class _ExceptionWithRetcode(SDKException):
     def __init__(self, /, retcode: int, message: str) -> None:
         self.retcode = retcode
@@ -35,6 +86,9 @@ class _ExceptionWithRetcode(SDKException):
 
 
 class CallingApiException(_ExceptionWithRetcode):
+    retryable: ClassVar[bool] = False
+    """是否为可重试的临时错误"""
+
     def __repr__(self) -> str:
         return (
             "<CallingApiException "
@@ -50,13 +104,19 @@ class CallingApiException(_ExceptionWithRetcode):
 
 
 class UnknownServerError(CallingApiException, retcode=-502):
-    ...
+    retryable = True
 
 
 class InvalidRequest(CallingApiException, retcode=-1):
     ...
 
 
+class RateLimitExceeded(CallingApiException, retcode=-429):
+    """超出调用频率限制，稍后重试即可（如 ``VillaEmulator`` 以 HTTP 200 返回的限流）"""  # noqa: E501
+
+    retryable = True
+
+
 class InsufficientPermission(CallingApiException, retcode=10318001):
     ...
 
@@ -81,6 +141,19 @@ class UnsupportedMsgType(CallingApiException, retcode=10322006):
     ...
 
 
+def retryable_retcodes() -> frozenset[int]:
+    """获取所有可重试错误的 retcode
+
+    Returns:
+        frozenset[int]: retcode 集合
+    """
+    return frozenset(
+        retcode
+        for retcode, exc in call_api_exceptions.items()
+        if exc.retryable
+    )
+
+
 def raise_exception(payload: dict[str, Any]):
     if payload["retcode"] != 0:
         retcode = payload["retcode"]
@@ -1,12 +1,16 @@
 from __future__ import annotations
 
 import abc
-from contextvars import ContextVar
+from contextvars import ContextVar, copy_context
 from dataclasses import dataclass
+import itertools
 import re
+from typing import Any, Generic, Iterable, Iterator, Optional, Tuple, TypeVar
 
 from hertavilla.message.chain import MessageChain
 
+T = TypeVar("T")
+
 current_match_result: ContextVar[MatchResult] = ContextVar(
     "currect_match_result",
 )
@@ -27,12 +31,22 @@ class Regex(Match):
     def __repr__(self) -> str:
         return f"<Match:Regex pattern={self.pattern!r}>"
 
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Regex) or type(other) is not type(self):
+            return NotImplemented
+        return self.pattern == other.pattern
+
+    def __hash__(self) -> int:
+        return hash((type(self), self.pattern))
+
     def check(self, chain: MessageChain) -> bool:
-        match = re.match(self.pattern, chain.plaintext)
+        return _set_result(_memoized(self, chain))
+
+    def match_plaintext(self, plain: str) -> RegexResult | None:
+        match = re.match(self.pattern, plain)
         if match is not None:
-            current_match_result.set(RegexResult(match=self, re_match=match))
-            return True
-        return False
+            return RegexResult(match=self, re_match=match)
+        return None
 
 
 class Startswith(Match):
@@ -40,34 +54,48 @@ class Startswith(Match):
         self.prefix = prefix
 
     def check(self, chain: MessageChain) -> bool:
-        plain = chain.plaintext
+        return _set_result(_memoized(self, chain))
+
+    def match_plaintext(self, plain: str) -> StartswithResult | None:
         if plain.startswith(self.prefix):
-            current_match_result.set(
-                StartswithResult(match=self, text=plain[len(self.prefix) :]),
-            )
-            return True
-        return False
+            return StartswithResult(match=self, text=plain[len(self.prefix) :])
+        return None
 
     def __repr__(self) -> str:
         return f"<Match:Startswith prefix={self.prefix!r}>"
 
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Startswith) or type(other) is not type(self):
+            return NotImplemented
+        return self.prefix == other.prefix
+
+    def __hash__(self) -> int:
+        return hash((type(self), self.prefix))
+
 
 class Endswith(Match):
     def __init__(self, suffix: str) -> None:
         self.suffix = suffix
 
     def check(self, chain: MessageChain) -> bool:
-        plain = chain.plaintext
+        return _set_result(_memoized(self, chain))
+
+    def match_plaintext(self, plain: str) -> EndswithResult | None:
         if plain.endswith(self.suffix):
-            current_match_result.set(
-                EndswithResult(match=self, text=plain[: len(self.suffix)]),
-            )
-            return True
-        return False
+            return EndswithResult(match=self, text=plain[: len(self.suffix)])
+        return None
 
     def __repr__(self) -> str:
         return f"<Match:Endswith suffix={self.suffix!r}>"
 
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Endswith) or type(other) is not type(self):
+            return NotImplemented
+        return self.suffix == other.suffix
+
+    def __hash__(self) -> int:
+        return hash((type(self), self.suffix))
+
 
 class Keywords(Regex):
     def __init__(self, *keywords: str) -> None:
@@ -78,14 +106,25 @@ class Keywords(Regex):
         return f"<Match:Keywords words={self.keywords!r}>"
 
     def check(self, chain: MessageChain) -> bool:
-        match = re.match(self.pattern, chain.plaintext)
-        if match is not None:
-            matches = re.findall(self.pattern, chain.plaintext)
-            current_match_result.set(
-                KeywordsResult(match=self, matched_keywords=set(matches)),
-            )
-            return True
+        return _set_result(_memoized(self, chain))
+
+    def match_plaintext(self, plain: str) -> KeywordsResult | None:  # type: ignore
+        if re.match(self.pattern, plain) is not None:
+            matches = re.findall(self.pattern, plain)
+            return KeywordsResult(match=self, matched_keywords=set(matches))
+        return None
+
+
+def _memoized(match: Any, chain: MessageChain) -> MatchResult | None:
+    # 相等的匹配规则在同一消息链上的结果相同，只计算一次
+    return chain.memoize(match, match.match_plaintext, chain.plaintext)
+
+
+def _set_result(result: MatchResult | None) -> bool:
+    if result is None:
         return False
+    current_match_result.set(result)
+    return True
 
 
 @dataclass
@@ -131,3 +170,209 @@ class KeywordsResult(MatchResult):
     @property
     def keywords(self) -> tuple[str, ...]:
         return self.match.keywords
+
+
+_SPECIAL = frozenset(".^$*+?{}[]\\|()")
+_QUANTIFIERS = frozenset("*+?{")
+_END = ""
+
+
+def _literal_prefix(match: Regex) -> str:
+    # 正则表达式开头必须出现的文本，无法确定时为空（总是检查）
+    pattern = match.pattern
+    source = pattern.pattern
+    if (
+        not isinstance(source, str)
+        or pattern.flags & (re.IGNORECASE | re.VERBOSE)
+        or "|" in source
+    ):
+        return ""
+    # re.match 总是从开头匹配，开头的 ^ 可以忽略
+    start = end = 1 if source.startswith("^") else 0
+    while end < len(source) and source[end] not in _SPECIAL:
+        end += 1
+    if end < len(source) and source[end] in _QUANTIFIERS:
+        # 量词作用于前一个字符
+        end -= 1
+    return source[start : max(end, start)]
+
+
+class _Trie(Generic[T]):
+    """以字符为边的前缀树，节点中 ``_END`` 键保存以该节点结尾的条目"""
+
+    def __init__(self) -> None:
+        self.root: dict[str, Any] = {}
+
+    def add(self, key: str, item: T) -> None:
+        node = self.root
+        for char in key:
+            node = node.setdefault(char, {})
+        node.setdefault(_END, []).append(item)
+
+    def remove(self, key: str, item: T) -> None:
+        node = self.root
+        path = [("", node)]
+        for char in key:
+            node = node.get(char)
+            if node is None:
+                return
+            path.append((char, node))
+        items = node.get(_END)
+        if not items or item not in items:
+            return
+        items.remove(item)
+        if not items:
+            del node[_END]
+        # 删除不再有条目的节点
+        for i in range(len(path) - 1, 0, -1):
+            char, node = path[i]
+            if node:
+                break
+            del path[i - 1][1][char]
+
+    def walk(self, text: Iterable[str]) -> Iterator[T]:
+        """依次产出 text 的各个前缀（含空串）上的条目"""
+        node = self.root
+        if _END in node:
+            yield from node[_END]
+        for char in text:
+            node = node.get(char)
+            if node is None:
+                return
+            if _END in node:
+                yield from node[_END]
+
+
+TrieKey = Tuple[Optional[_Trie[T]], str]
+
+
+class CompiledMatcher(Generic[T]):
+    """将多个 ``Match`` 编译为一次匹配
+
+    ``Startswith``、文本关键词的 ``Keywords`` 与有固定开头的 ``Regex`` 加入前缀树，
+    ``Endswith`` 加入后缀树，遍历一次纯文本的开头与结尾即可找出可能匹配的条目，
+    只有这些条目和无法预筛的条目（无固定开头的正则表达式、自定义的 ``Match``）需要实际检查。
+    添加或移除条目时只更新对应的树节点。
+
+    匹配结果与逐个调用 ``Match.check`` 相同。
+    """  # noqa: E501
+
+    def __init__(self) -> None:
+        self._matches: dict[T, Match] = {}
+        # 条目的添加顺序与在各个树中的键
+        self._order: dict[T, int] = {}
+        self._keys: dict[T, list[TrieKey[T]]] = {}
+        self._counter = itertools.count()
+        self._prefixes: _Trie[T] = _Trie()
+        self._suffixes: _Trie[T] = _Trie()
+        # 无法预筛，总是检查的条目
+        self._always: dict[T, None] = {}
+
+    def __len__(self) -> int:
+        return len(self._matches)
+
+    def __iter__(self) -> Iterator[T]:
+        return iter(self._matches)
+
+    def __contains__(self, key: T) -> bool:
+        return key in self._matches
+
+    def add(self, key: T, match: Match) -> None:
+        """添加条目
+
+        Args:
+            key (T): 条目，匹配时返回
+            match (Match): 条目的匹配规则
+        """
+        if key in self._matches:
+            self.remove(key)
+        self._matches[key] = match
+        self._order[key] = next(self._counter)
+        keys = self._keys[key] = self._trie_keys(match)
+        for trie, text in keys:
+            if trie is None:
+                self._always[key] = None
+            else:
+                trie.add(text, key)
+
+    def remove(self, key: T) -> None:
+        """移除条目，条目不存在时不做任何事
+
+        Args:
+            key (T): 条目
+        """
+        match = self._matches.pop(key, None)
+        if match is None:
+            return
+        del self._order[key]
+        for trie, text in self._keys.pop(key):
+            if trie is None:
+                self._always.pop(key, None)
+            else:
+                trie.remove(text, key)
+
+    def _trie_keys(self, match: Match) -> list[TrieKey[T]]:
+        # 条目在各个树中的键，树为 None 时总是检查
+        type_ = type(match)
+        if type_ is Startswith:
+            return [(self._prefixes, match.prefix)]  # type: ignore
+        if type_ is Endswith:
+            return [(self._suffixes, match.suffix[::-1])]  # type: ignore
+        if type_ is Keywords:
+            keywords: tuple[str, ...] = match.keywords  # type: ignore
+            if keywords and not any(
+                _SPECIAL.intersection(k) for k in keywords
+            ):
+                # 关键词为纯文本时，匹配即为以某个关键词开头
+                return [(self._prefixes, keyword) for keyword in set(keywords)]
+        if type_ in (Regex, Keywords):
+            prefix = _literal_prefix(match)  # type: ignore
+            if prefix:
+                return [(self._prefixes, prefix)]
+        return [(None, "")]
+
+    def matches(self, chain: MessageChain) -> list[tuple[T, MatchResult]]:
+        """找出匹配消息的条目
+
+        Args:
+            chain (MessageChain): 消息链
+
+        Returns:
+            list[tuple[T, MatchResult]]: 按添加顺序排列的匹配条目与匹配结果
+        """
+        plain = chain.plaintext
+        candidates = set(self._prefixes.walk(plain))
+        candidates.update(self._suffixes.walk(reversed(plain)))
+        candidates.update(self._always)
+        results: list[tuple[T, MatchResult]] = []
+        for key in sorted(candidates, key=self._order.__getitem__):
+            match = self._matches[key]
+            if type(match) in _BUILTIN_MATCHES:
+                result = _memoized(match, chain)
+            else:
+                result = _check(match, chain)
+            if result is not None:
+                results.append((key, result))
+        return results
+
+    def __repr__(self) -> str:
+        return (
+            f"<CompiledMatcher matches={len(self._matches)} "
+            f"always={len(self._always)}>"
+        )
+
+
+_BUILTIN_MATCHES = frozenset((Regex, Startswith, Endswith, Keywords))
+
+
+def _check(match: Match, chain: MessageChain) -> MatchResult | None:
+    # 自定义 Match 通过 current_match_result 返回结果，在独立的上下文中检查
+    return copy_context().run(_run_check, match, chain)
+
+
+def _run_check(match: Match, chain: MessageChain) -> MatchResult | None:
+    # 未设置结果时使用 MatchResult
+    current_match_result.set(MatchResult(match=match))
+    if not match.check(chain):
+        return None
+    return current_match_result.get()
@@ -3,7 +3,17 @@ from __future__ import annotations
 from copy import deepcopy
 import logging
 import sys
-from typing import TYPE_CHECKING, Iterable, List
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Hashable,
+    Iterable,
+    List,
+    SupportsIndex,
+    TypeVar,
+)
+import unicodedata
 
 from hertavilla.message.component import Panel
 from hertavilla.message.image import (
@@ -25,6 +35,13 @@ else:
 
 logger = logging.getLogger("hertavilla.message")
 
+T = TypeVar("T")
+
+_MISSING = object()
+# 缓存键，与 Match 等其他键不会相等
+_PLAINTEXT = object()
+_NORMALIZED = object()
+
 
 class MessageChain(List[_Segment]):
     def __init__(
@@ -32,6 +49,8 @@ class MessageChain(List[_Segment]):
         message: str | _Segment | Iterable[_Segment] | None = None,
     ) -> None:
         super().__init__()
+        # 纯文本与匹配结果等派生数据的缓存，修改消息链时清空
+        self._cache: dict[Hashable, Any] = {}
         if message is None:
             return
         if isinstance(message, (_Segment, str)):
@@ -42,8 +61,49 @@ class MessageChain(List[_Segment]):
     def append(self, __object: str | _Segment) -> None:
         if isinstance(__object, str):
             __object = Text(__object)
+        self._cache.clear()
         super().append(__object)
 
+    def insert(self, __index: SupportsIndex, __object: _Segment) -> None:
+        self._cache.clear()
+        super().insert(__index, __object)
+
+    def __setitem__(self, key: Any, value: Any) -> None:
+        self._cache.clear()
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key: SupportsIndex | slice) -> None:
+        self._cache.clear()
+        super().__delitem__(key)
+
+    def pop(self, __index: SupportsIndex = -1) -> _Segment:
+        self._cache.clear()
+        return super().pop(__index)
+
+    def remove(self, __value: _Segment) -> None:
+        self._cache.clear()
+        super().remove(__value)
+
+    def clear(self) -> None:
+        self._cache.clear()
+        super().clear()
+
+    def reverse(self) -> None:
+        self._cache.clear()
+        super().reverse()
+
+    def sort(self, *args: Any, **kwargs: Any) -> None:
+        self._cache.clear()
+        super().sort(*args, **kwargs)
+
+    def __imul__(self, value: SupportsIndex) -> Self:
+        self._cache.clear()
+        return super().__imul__(value)
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        # 复制或序列化时重新构造，不保留缓存
+        return self.__class__, (list(self),)
+
     def copy(self) -> Self:
         return deepcopy(self)
 
@@ -68,8 +128,11 @@ class MessageChain(List[_Segment]):
         return self
 
     def extend(self, obj: Iterable[_Segment]) -> Self:
-        for segment in obj:
-            self.append(segment)
+        self._cache.clear()
+        super().extend(
+            Text(segment) if isinstance(segment, str) else segment
+            for segment in obj
+        )
         return self
 
     async def to_content_json(  # noqa: PLR0912
@@ -163,10 +226,61 @@ class MessageChain(List[_Segment]):
         """获取纯文本。
         需要注意此属性与 get_text() 不同。
 
+        纯文本在首次访问后缓存，通过消息链的方法修改消息链时失效，
+        直接修改消息段（如 ``Text.text``）后需要调用 ``invalidate()``。
+
         Returns:
             str: 纯文本内容
         """
-        return "".join(map(str, filter(lambda x: isinstance(x, Text), self)))
+        plain = self._cache.get(_PLAINTEXT)
+        if plain is None:
+            plain = self._cache[_PLAINTEXT] = "".join(
+                [str(x) for x in self if isinstance(x, Text)],
+            )
+        return plain
+
+    @property
+    def normalized_plaintext(self) -> str:
+        """获取规范化的纯文本，全角字符转为半角（NFKC）并忽略大小写，
+        可供匹配时使用。与 plaintext 一样会被缓存。
+
+        Returns:
+            str: 规范化的纯文本内容
+        """
+        normalized = self._cache.get(_NORMALIZED)
+        if normalized is None:
+            normalized = self._cache[_NORMALIZED] = unicodedata.normalize(
+                "NFKC",
+                self.plaintext,
+            ).casefold()
+        return normalized
+
+    def memoize(
+        self,
+        key: Hashable,
+        func: Callable[..., T],
+        *args: Any,
+    ) -> T:
+        """以 key 缓存 func(*args) 的结果，修改消息链时失效。
+        用于在多个处理器间共享同一消息上的匹配结果。
+
+        Args:
+            key (Hashable): 缓存键
+            func (Callable[..., T]): 计算结果的函数
+            *args (Any): 传给 func 的参数
+
+        Returns:
+            T: func 的结果
+        """
+        cache = self._cache
+        result = cache.get(key, _MISSING)
+        if result is _MISSING:
+            result = cache[key] = func(*args)
+        return result
+
+    def invalidate(self) -> None:
+        """清空纯文本与匹配结果的缓存"""
+        self._cache.clear()
 
     def __str__(self) -> str:
         return self.plaintext
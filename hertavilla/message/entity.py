@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+from operator import itemgetter
+from typing import Iterable
+
+from hertavilla.message.chain import MessageChain
+from hertavilla.message.internal import _Segment
+from hertavilla.message.text import EntityDict, Text, entity_types
+
+_by_offset = itemgetter("offset")
+# 高字节为 0xD8 - 0xDB 的码元是高位代理
+_HIGH_SURROGATE = bytes(0xD8 <= b <= 0xDB for b in range(256))  # noqa: PLR2004
+
+
+def _high_surrogates(text: str) -> bytes | None:
+    """标记每个 UTF-16 码元是否为高位代理，文本中没有 BMP 以外的字符时为 None
+
+    开放平台的 entity 偏移以 UTF-16 码元计，BMP 以外的字符（如 emoji）占两个码元。
+    偏移 ``u`` 对应的字符串下标为 ``u`` 减去此前高位代理的个数。
+    """  # noqa: E501
+    if text.isascii():
+        return None
+    units = text.encode("utf-16-le")
+    if len(units) == 2 * len(text):
+        return None
+    # 小端序码元的高字节位于奇数位置
+    return units[1::2].translate(_HIGH_SURROGATE)
+
+
+def entities_to_chain(
+    text: str,
+    entities: Iterable[EntityDict],
+) -> MessageChain:
+    """将文本消息的文本与 entity 列表转换为消息链，不会修改传入的数据
+
+    entity 之间与最后一个 entity 之后的文本转换为 ``Text``，
+    ``style`` entity 转换为带有对应样式的 ``Text``，相同范围的多个样式会合并，
+    与其他 entity 重叠的样式无法表示，会被忽略。
+
+    Args:
+        text (str): 消息文本
+        entities (Iterable[EntityDict]): entity 列表
+
+    Raises:
+        ValueError: 未知的 entity 类型
+
+    Returns:
+        MessageChain: 消息链
+    """
+    surrogates = _high_surrogates(text)
+    segments: list[_Segment] = []
+    # 已处理到的 UTF-16 偏移、对应的字符串下标与此前的高位代理数
+    end = pos = skipped = 0
+    # 上一个样式 Text 的范围
+    styled: tuple[int, int] | None = None
+    for entity in _order_entities(entities):
+        offset = entity["offset"]
+        length = entity["length"]
+        body = entity["entity"]
+        type_ = body["type"]
+        if type_ == "style":
+            if styled == (offset, length):
+                last = segments[-1]
+                last.styles = (*last.styles, body["font_style"])  # type: ignore
+                continue
+            if offset < end:
+                # 与其他样式重叠的样式无法表示，忽略
+                continue
+        if surrogates is not None:
+            skipped = (
+                skipped + surrogates.count(1, end, offset)
+                if offset >= end
+                # 与上一个 entity 重叠时重新计数
+                else surrogates.count(1, 0, offset)
+            )
+        start = offset - skipped
+        if offset > end:
+            # 两个 Entity 之间为文字
+            segments.append(Text(text[pos:start]))
+        end = offset + length
+        if surrogates is not None:
+            skipped += surrogates.count(1, offset, end)
+        pos = end - skipped
+        if type_ == "style":
+            segments.append(Text(text[start:pos], body["font_style"]))
+            styled = (offset, length)
+            continue
+        try:
+            cls = entity_types[type_]
+        except KeyError:
+            raise ValueError(f"Unknown entity type {type_!r}") from None
+        kwargs = body.copy()
+        del kwargs["type"]
+        segments.append(cls(**kwargs))
+        styled = None
+    if pos < len(text):
+        # 最后一个 Entity 之后是文字
+        segments.append(Text(text[pos:]))
+    # 直接 extend，省去构造函数对参数类型的检查
+    return MessageChain().extend(segments)
+
+
+def _order_entities(entities: Iterable[EntityDict]) -> list[EntityDict]:
+    ordered: list[EntityDict] = []
+    styles: list[EntityDict] = []
+    for entity in entities:
+        if entity["entity"]["type"] == "style":
+            styles.append(entity)
+        else:
+            ordered.append(entity)
+    ordered.sort(key=_by_offset)
+    if styles:
+        ordered = _merge_styles(ordered, styles)
+    return ordered
+
+
+def _merge_styles(
+    entities: list[EntityDict],
+    styles: list[EntityDict],
+) -> list[EntityDict]:
+    # 忽略与非样式 entity 重叠的样式，结果与 entity 的顺序无关
+    styles.sort(key=_by_offset)
+    kept: list[EntityDict] = []
+    i = 0
+    for style in styles:
+        start = style["offset"]
+        stop = start + style["length"]
+        while (
+            i < len(entities)
+            and entities[i]["offset"] + entities[i]["length"] <= start
+        ):
+            i += 1
+        if i < len(entities) and entities[i]["offset"] < stop:
+            continue
+        kept.append(style)
+    # 稳定排序，起始位置相同时非样式 entity 在前
+    return sorted(entities + kept, key=_by_offset)
@@ -205,7 +205,7 @@ async def text_to_content(
         space = "" if i == len(text_entities) - 1 else " "
         if isinstance(entity, Text):
             text = str(entity)
-            length = len(text)
+            length = _c(text)
             entities.extend(
                 (
                     {
@@ -240,7 +240,7 @@ async def text_to_content(
                     user_id_list = mentioned_info["userIdList"]
                 if type_ != 1:
                     user_id_list.append(id_)
-        offset += len(text)
+        offset += length
         texts.append(text)
     return {
         "content": TextMsgContent(
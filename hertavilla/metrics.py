@@ -0,0 +1,271 @@
+from __future__ import annotations
+
+import bisect
+import math
+import threading
+from typing import Any, ClassVar, Sequence, Tuple, TypeVar
+
+LabelValues = Tuple[str, ...]
+
+DEFAULT_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1,
+    2.5,
+    5,
+    10,
+    math.inf,
+)
+"""默认直方图分桶（秒）"""
+
+TM = TypeVar("TM", bound="Metric")
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Metric:
+    type_: ClassVar[str] = "untyped"
+
+    def __init__(
+        self,
+        name: str,
+        description: str = "",
+        labels: Sequence[str] = (),
+    ) -> None:
+        self.name = name
+        self.description = description
+        self.labels = tuple(labels)
+        self._values: dict[LabelValues, Any] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict[str, Any]) -> LabelValues:
+        return tuple(str(labels.get(label, "")) for label in self.labels)
+
+    def samples(self) -> dict[LabelValues, Any]:
+        with self._lock:
+            return dict(self._values)
+
+    def _render_labels(self, values: LabelValues, **extra: str) -> str:
+        pairs = [*zip(self.labels, values), *extra.items()]
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+    def render(self) -> list[str]:
+        lines = [
+            f"# HELP {self.name} {self.description}",
+            f"# TYPE {self.name} {self.type_}",
+        ]
+        lines.extend(
+            f"{self.name}{self._render_labels(key)} {value}"
+            for key, value in self.samples().items()
+        )
+        return lines
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} {self.name}>"
+
+
+class Counter(Metric):
+    """单调递增计数器"""
+
+    type_ = "counter"
+
+    def inc(self, amount: float = 1, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels: Any) -> float:
+        return self._values.get(self._key(labels), 0)
+
+
+class Gauge(Metric):
+    """可增减的瞬时值"""
+
+    type_ = "gauge"
+
+    def set(self, value: float, **labels: Any) -> None:  # noqa: A003
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels: Any) -> None:
+        self.inc(-amount, **labels)
+
+    def get(self, **labels: Any) -> float:
+        return self._values.get(self._key(labels), 0)
+
+
+class HistogramValue:
+    def __init__(self, buckets: Sequence[float]) -> None:
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> list[tuple[float, int]]:
+        result = []
+        total = 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+    def quantile(self, q: float) -> float:
+        """根据分桶估算分位数（取所在分桶的上界）"""
+        if self.count == 0:
+            return 0
+        rank = q * self.count
+        for bound, total in self.cumulative():
+            if total >= rank:
+                return bound
+        return math.inf
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else 0
+
+
+class Histogram(Metric):
+    """分桶直方图"""
+
+    type_ = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        description: str = "",
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, description, labels)
+        buckets = sorted(buckets)
+        if buckets[-1] != math.inf:
+            buckets.append(math.inf)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            if (hist := self._values.get(key)) is None:
+                hist = self._values[key] = HistogramValue(self.buckets)
+            hist.observe(value)
+
+    def get(self, **labels: Any) -> HistogramValue | None:
+        return self._values.get(self._key(labels))
+
+    def render(self) -> list[str]:
+        lines = [
+            f"# HELP {self.name} {self.description}",
+            f"# TYPE {self.name} {self.type_}",
+        ]
+        for key, hist in self.samples().items():
+            for bound, total in hist.cumulative():
+                le = "+Inf" if bound == math.inf else str(bound)
+                lines.append(
+                    f"{self.name}_bucket{self._render_labels(key, le=le)} "
+                    f"{total}",
+                )
+            labels = self._render_labels(key)
+            lines.append(f"{self.name}_sum{labels} {hist.sum}")
+            lines.append(f"{self.name}_count{labels} {hist.count}")
+        return lines
+
+
+class MetricsRegistry:
+    """内存指标注册表
+
+    同名指标只会创建一次，可通过 ``render`` 导出 Prometheus 文本格式。
+    """
+
+    def __init__(self) -> None:
+        self.metrics: dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(
+        self,
+        cls: type[TM],
+        name: str,
+        *args: Any,
+        **kwargs: Any,
+    ) -> TM:
+        with self._lock:
+            if (metric := self.metrics.get(name)) is None:
+                metric = self.metrics[name] = cls(name, *args, **kwargs)
+        if not isinstance(metric, cls):
+            raise TypeError(
+                f"Metric {name} is already registered as {metric.type_}",
+            )
+        return metric
+
+    def counter(
+        self,
+        name: str,
+        description: str = "",
+        labels: Sequence[str] = (),
+    ) -> Counter:
+        return self._get_or_create(Counter, name, description, labels)
+
+    def gauge(
+        self,
+        name: str,
+        description: str = "",
+        labels: Sequence[str] = (),
+    ) -> Gauge:
+        return self._get_or_create(Gauge, name, description, labels)
+
+    def histogram(
+        self,
+        name: str,
+        description: str = "",
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._get_or_create(
+            Histogram,
+            name,
+            description,
+            labels,
+            buckets,
+        )
+
+    def collect(self) -> dict[str, dict[LabelValues, Any]]:
+        """获取所有指标的当前值
+
+        Returns:
+            dict[str, dict[tuple[str, ...], Any]]: 指标名 -> 标签值 -> 值
+        """
+        return {
+            name: metric.samples() for name, metric in self.metrics.items()
+        }
+
+    def render(self) -> str:
+        """导出 Prometheus 文本格式
+
+        Returns:
+            str: 指标文本
+        """
+        lines: list[str] = []
+        for metric in self.metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+default_registry = MetricsRegistry()
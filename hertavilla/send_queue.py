@@ -0,0 +1,219 @@
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from dataclasses import dataclass, field
+import logging
+import time
+from typing import TYPE_CHECKING, Tuple
+
+from hertavilla.metrics import MetricsRegistry, default_registry
+
+if TYPE_CHECKING:
+    from hertavilla.bot import VillaBot
+    from hertavilla.message import MessageChain
+
+logger = logging.getLogger("hertavilla.send_queue")
+
+RoomKey = Tuple["VillaBot", int, int]
+
+
+@dataclass
+class _Item:
+    chain: MessageChain
+    future: asyncio.Future[str]
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+class SendQueue:
+    """出站消息队列
+
+    消息按 (Bot, 大别野, 房间) 排队，由固定数量的 worker 发送，
+    同一房间的消息严格按入队顺序逐条发送，不同房间的消息并发发送。
+
+    Args:
+        workers (int, optional): worker 数量，即同时发送的消息数上限. Defaults to 4.
+        maxsize (int, optional): 排队消息数上限，队列满时 ``put`` 会等待，0 为不限制. Defaults to 0.
+        registry (MetricsRegistry, optional): 记录队列深度与等待时间的指标注册表. Defaults to default_registry.
+    """  # noqa: E501
+
+    def __init__(
+        self,
+        workers: int = 4,
+        *,
+        maxsize: int = 0,
+        registry: MetricsRegistry = default_registry,
+    ) -> None:
+        self.workers = workers
+        self.maxsize = maxsize
+        self._rooms: dict[RoomKey, deque[_Item]] = {}
+        # 有待发送消息且没有 worker 正在处理的房间
+        self._ready: asyncio.Queue[RoomKey] | None = None
+        self._scheduled: set[RoomKey] = set()
+        self._slots: asyncio.Semaphore | None = None
+        self._idle: asyncio.Event | None = None
+        self._tasks: list[asyncio.Task] = []
+        self._pending = 0
+        self._depth = registry.gauge(
+            "hertavilla_send_queue_depth",
+            "Messages waiting in the outbound send queue",
+            ("bot",),
+        )
+        self._wait = registry.histogram(
+            "hertavilla_send_queue_wait_seconds",
+            "Time messages spent in the outbound send queue before sending",
+            ("bot",),
+        )
+
+    def __len__(self) -> int:
+        """排队中（包括正在发送）的消息数"""
+        return self._pending
+
+    @property
+    def rooms(self) -> int:
+        """有待发送消息的房间数"""
+        return len(self._rooms)
+
+    def _start(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._tasks and self._tasks[0].get_loop() is loop:
+            return
+        # 首次使用或事件循环已改变
+        self._rooms.clear()
+        self._scheduled.clear()
+        self._pending = 0
+        self._ready = asyncio.Queue()
+        self._slots = asyncio.Semaphore(self.maxsize) if self.maxsize else None
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._tasks = [
+            asyncio.create_task(self._worker()) for _ in range(self.workers)
+        ]
+
+    async def put(
+        self,
+        bot: VillaBot,
+        villa_id: int,
+        room_id: int,
+        chain: MessageChain,
+    ) -> asyncio.Future[str]:
+        """将消息加入队列
+
+        Args:
+            bot (VillaBot): 发送消息的 Bot
+            villa_id (int): 大别野 id
+            room_id (int): 房间 id
+            chain (MessageChain): 消息链
+
+        Returns:
+            asyncio.Future[str]: 消息发送完成后得到 bot_msg_id，发送失败时为异常；取消该 future 可撤回尚未发送的消息
+        """  # noqa: E501
+        self._start()
+        assert self._ready is not None
+        assert self._idle is not None
+        if self._slots is not None:
+            await self._slots.acquire()
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[str] = loop.create_future()
+        future.add_done_callback(_consume_exception)
+        key = (bot, villa_id, room_id)
+        self._rooms.setdefault(key, deque()).append(_Item(chain, future))
+        self._pending += 1
+        self._idle.clear()
+        self._depth.inc(bot=bot.bot_id)
+        if key not in self._scheduled:
+            self._scheduled.add(key)
+            self._ready.put_nowait(key)
+        return future
+
+    async def _worker(self) -> None:
+        assert self._ready is not None
+        while True:
+            key = await self._ready.get()
+            items = self._rooms[key]
+            item = items.popleft()
+            try:
+                await self._send(key, item)
+            finally:
+                self._done(key[0])
+                if items:
+                    # 重新排到末尾，让其他房间的消息也能得到发送
+                    self._ready.put_nowait(key)
+                else:
+                    del self._rooms[key]
+                    self._scheduled.discard(key)
+
+    async def _send(self, key: RoomKey, item: _Item) -> None:
+        bot, villa_id, room_id = key
+        if item.future.done():
+            return
+        self._wait.observe(
+            time.monotonic() - item.enqueued_at,
+            bot=bot.bot_id,
+        )
+        try:
+            result = await bot.send(villa_id, room_id, item.chain)
+        except asyncio.CancelledError:
+            item.future.cancel()
+            raise
+        except Exception as e:
+            logger.warning(
+                f"Failed to send message to room {room_id} "
+                f"in villa {villa_id}: {e!r}",
+            )
+            if not item.future.done():
+                item.future.set_exception(e)
+        else:
+            if not item.future.done():
+                item.future.set_result(result)
+
+    def _done(self, bot: VillaBot) -> None:
+        assert self._idle is not None
+        self._pending -= 1
+        self._depth.dec(bot=bot.bot_id)
+        if self._slots is not None:
+            self._slots.release()
+        if self._pending == 0:
+            self._idle.set()
+
+    async def join(self) -> None:
+        """等待队列中的消息全部发送完成"""
+        if self._idle is not None:
+            await self._idle.wait()
+
+    async def close(self, timeout: float | None = None) -> None:
+        """发送完队列中的消息后停止 worker
+
+        Args:
+            timeout (float | None, optional): 等待发送的最长时间（秒），超时后未发送的消息会被取消. Defaults to None.
+        """  # noqa: E501
+        if not self._tasks:
+            return
+        try:
+            await asyncio.wait_for(self.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"{self._pending} queued messages are dropped")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        for key, items in self._rooms.items():
+            for item in items:
+                item.future.cancel()
+                self._depth.dec(bot=key[0].bot_id)
+        self._rooms.clear()
+        self._scheduled.clear()
+        self._pending = 0
+
+    def __repr__(self) -> str:
+        return (
+            f"<SendQueue workers={self.workers} pending={self._pending} "
+            f"rooms={self.rooms}>"
+        )
+
+
+def _consume_exception(future: asyncio.Future[str]) -> None:
+    # 发送失败已记录日志，调用方不等待 future 时避免
+    # "Future exception was never retrieved"
+    if not future.cancelled():
+        future.exception()
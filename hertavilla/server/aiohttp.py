@@ -58,7 +58,9 @@ class AIOHTTPBackend(BaseBackend):
         )
         self.app.on_startup.append(self._run_startup)
         self.app.on_cleanup.append(self._run_shutdown)
+        self.on_startup(functools.partial(self._warmup, bots_))
         self.on_startup(functools.partial(self._start_ws, bots_))
+        self.on_shutdown(functools.partial(self._close_sessions, bots_))
         web.run_app(
             self.app,
             host=host or self.host,
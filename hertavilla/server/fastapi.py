@@ -73,7 +73,9 @@ class FastAPIBackend(BaseBackend):
                 methods=["POST"],
             ),
         )
+        self.on_startup(functools.partial(self._warmup, bots_))
         self.on_startup(functools.partial(self._start_ws, bots_))
+        self.on_shutdown(functools.partial(self._close_sessions, bots_))
         uvicorn.run(
             self.app,
             host=host or self.host,
@@ -8,7 +8,7 @@ import logging
 from typing import TYPE_CHECKING, Any, Callable, Sequence
 
 from hertavilla.bot import VillaBot
-from hertavilla.event import parse_event
+from hertavilla.event import EventParser, parse_event
 from hertavilla.utils import TaskManager
 
 from ._lifespan import L_FUNC
@@ -29,10 +29,29 @@ class ResponseData:
 INVALID_EVENT = ResponseData(400, -1, "event body is invalid")
 VERIFY_FAILED = ResponseData(401, -2, "verify failed")
 NO_BOT = ResponseData(404, 1, "no bot with this id")
+EVENT_QUEUE_FULL = ResponseData(503, -3, "event queue is full, retry later")
 
 
 class BaseBackend(abc.ABC):
-    def __init__(self, **kwargs: Any):
+    """后端基类
+
+    Args:
+        warmup_connections (int, optional): 启动时为每个 Bot 预先建立的保活连接数，0 为不预热. Defaults to 0.
+        warmup_urls (Sequence[str], optional): 除 API 地址外需要预热的地址，如图片上传的 OSS 地址. Defaults to ().
+        event_parser (EventParser | None, optional): 解析事件的函数，可使用 ``hertavilla.decoder.parse_event_fast``；为 None 时回调事件使用 ``parse_event``，WebSocket 事件直接由 protobuf 转换. Defaults to None.
+    """  # noqa: E501
+
+    def __init__(
+        self,
+        *,
+        warmup_connections: int = 0,
+        warmup_urls: Sequence[str] = (),
+        event_parser: EventParser | None = None,
+        **kwargs: Any,
+    ):
+        self.warmup_connections = warmup_connections
+        self.warmup_urls = warmup_urls
+        self.event_parser = event_parser
         self.backend_extra_config = kwargs
         self.bots: dict[str, VillaBot] = {}
         self.ws_connections: set["WSConnection"] = set()
@@ -84,39 +103,80 @@ class BaseBackend(abc.ABC):
         sign: str | None,
         body: str,
     ) -> ResponseData:
-        payload = json.loads(body)
-        if not (event_payload := payload.get("event")):
-            self.logger.warning("Event is invalid")
-            return INVALID_EVENT
         try:
-            event = parse_event(event_payload)
-        except ValueError:
+            event_payload = json.loads(body)["event"]
+            # 校验签名前只读取 Bot id，伪造或无效的请求不会触发完整解析
+            bot_id = event_payload["robot"]["template"]["id"]
+        except (ValueError, KeyError, TypeError):
             self.logger.warning("Event is invalid")
             return INVALID_EVENT
 
-        if bot := self.bots.get(event.robot.template.id):
-            if sign is None or not bot.verify(sign, body):
-                logging.warn("Event verify check is failed. Reject handling.")
-                return VERIFY_FAILED
+        bot = self.bots.get(bot_id)
+        rejected = await self._reject(bot, bot_id, sign, body)
+        if rejected is not None:
+            return rejected
+        assert bot is not None
+        if isinstance(event_id := event_payload.get("id"), str) and (
+            bot.deduplicator.is_duplicate(bot_id, event_id, "http")
+        ):
+            # 平台重试的回调，已经处理过，直接返回成功
+            return ResponseData()
 
-            self.logger.info(
-                (
-                    f"[RECV] {event.__class__.__name__} "
-                    f"on bot {event.robot.template.name}"
-                    f"({event.robot.template.id}) "
-                    f"in villa {event.robot.villa_id}"
-                ),
+        try:
+            event = (self.event_parser or parse_event)(
+                event_payload,
+                bot.lazy_events,
             )
-            if bot._bot_info is None:  # noqa: SLF001
-                bot.bot_info = event.robot.template
+        except (ValueError, KeyError, TypeError):
+            self.logger.warning("Event is invalid")
+            if isinstance(event_id, str):
+                # 未分发的事件，平台重试时不应被视为重复事件
+                bot.deduplicator.forget(bot_id, event_id)
+            return INVALID_EVENT
+
+        self.logger.info(
+            (
+                f"[RECV] {event.__class__.__name__} "
+                f"on bot {event.robot.template.name}"
+                f"({event.robot.template.id}) "
+                f"in villa {event.robot.villa_id}"
+            ),
+        )
+        if bot._bot_info is None:  # noqa: SLF001
+            bot.bot_info = event.robot.template
+        if bot.event_pool is None:
             task = asyncio.create_task(bot.handle_event(event))
             background_tasks.add(task)
             task.add_done_callback(background_tasks.discard)
-            return ResponseData()
-        self.logger.warning(
-            f"Received event but no bot with id {event.robot.template.id}",
-        )
-        return NO_BOT
+        elif not bot.event_pool.put_nowait(bot, event):
+            # 平台重试时不应被视为重复事件
+            bot.deduplicator.forget(bot_id, event.id)
+            return EVENT_QUEUE_FULL
+        return ResponseData()
+
+    async def _reject(
+        self,
+        bot: VillaBot | None,
+        bot_id: str,
+        sign: str | None,
+        body: str,
+    ) -> ResponseData | None:
+        # 解析事件前的检查，返回拒绝事件的响应
+        if bot is None:
+            self.logger.warning(
+                f"Received event but no bot with id {bot_id}",
+            )
+            return NO_BOT
+        if bot.event_pool is not None and bot.event_pool.full():
+            # 无法处理的事件不必校验与解析，平台会重试
+            self.logger.warning(f"Event queue of bot {bot_id} is full")
+            return EVENT_QUEUE_FULL
+        if sign is None or not await bot.verify_async(sign, body):
+            self.logger.warning(
+                "Event verify check is failed. Reject handling.",
+            )
+            return VERIFY_FAILED
+        return None
 
     async def _start_ws(self, bots: tuple[VillaBot, ...]) -> None:
         try:
@@ -124,10 +184,39 @@ class BaseBackend(abc.ABC):
         except ImportError:
             return
         for bot in (bot for bot in bots if bot.use_websocket):
-            conn = WSConnection(bot, self.ws_connections)
+            conn = WSConnection(
+                bot,
+                self.ws_connections,
+                self.event_parser,
+            )
             self.ws_connections.add(conn)
             self.task_manager.task_nowait(conn.connect)
-        self.on_shutdown(self._stop_ws)
+
+    async def _warmup(self, bots: tuple[VillaBot, ...]) -> None:
+        if self.warmup_connections <= 0:
+            return
+        targets = {
+            (id(bot.http_session), url): (bot.http_session, url)
+            for bot in bots
+            for url in (bot.api_base, *self.warmup_urls)
+        }
+        results = await asyncio.gather(
+            *(
+                session.warmup(url, self.warmup_connections)
+                for session, url in targets.values()
+            ),
+        )
+        self.logger.info(
+            f"Warmed up {sum(results)} connections to {len(targets)} hosts",
+        )
+
+    async def _close_sessions(self, bots: tuple[VillaBot, ...]) -> None:
+        # 先断开 WebSocket 连接，关闭 Bot 后不会再收到事件
+        await self._stop_ws()
+        # 共享会话只需关闭一次，重复关闭无副作用
+        for bot in bots:
+            await bot.close()
+        self.logger.debug("HTTP sessions of bots are closed")
 
     async def _stop_ws(self) -> None:
         if len(self.ws_connections) == 0:
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import asyncio
+import functools
 import signal
 from typing import Any
 
@@ -56,6 +57,8 @@ class LoopBackend(BaseBackend):
         self.lifespan_manager.on_shutdown(func)
 
     async def _run(self, bots_: tuple[VillaBot, ...]):
+        self.on_startup(functools.partial(self._warmup, bots_))
+        self.on_shutdown(functools.partial(self._close_sessions, bots_))
         await self.lifespan_manager.startup()
         await self._start_ws(bots_)
         if self.auto_shutdown:
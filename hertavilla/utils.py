@@ -77,7 +77,8 @@ class CustomFormData(FormData):
     def _gen_form_data(self) -> MultipartWriter:
         # the majority of this is copy pasted from aiohttp
         """Encode a list of fields using the multipart/form-data MIME format"""
-        if self._is_processed:
+        # newer aiohttp has no ``_is_processed`` and clears ``_fields`` instead
+        if getattr(self, "_is_processed", False):
             raise RuntimeError("Form data has been processed already")
         for dispparams, headers, value in self._fields:
             try:
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import abc
+import logging
+
+import rsa
+
+logger = logging.getLogger("hertavilla.verify")
+
+
+class Verifier(abc.ABC):
+    """回调签名校验后端
+
+    开放平台使用 RSA (PKCS#1 v1.5, SHA-256) 对回调签名。
+
+    Args:
+        pub_key (str): 开放平台提供的 PEM 格式公钥
+    """
+
+    name: str = ""
+
+    def __init__(self, pub_key: str) -> None:
+        self.pub_key = pub_key
+
+    @abc.abstractmethod
+    def verify(self, sign: bytes, message: bytes) -> bool:
+        """校验签名
+
+        Args:
+            sign (bytes): 签名
+            message (bytes): 被签名的消息
+
+        Returns:
+            bool: 签名是否有效
+        """
+        raise NotImplementedError
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__}>"
+
+
+class RSAVerifier(Verifier):
+    """基于纯 Python ``rsa`` 库的校验后端"""
+
+    name = "rsa"
+
+    def __init__(self, pub_key: str) -> None:
+        super().__init__(pub_key)
+        self.key = rsa.PublicKey.load_pkcs1_openssl_pem(pub_key.encode())
+
+    def verify(self, sign: bytes, message: bytes) -> bool:
+        try:
+            rsa.verify(message, sign, self.key)
+        except rsa.VerificationError:
+            return False
+        return True
+
+
+class CryptographyVerifier(Verifier):
+    """基于 ``cryptography`` (OpenSSL) 的校验后端，速度远快于 ``rsa``，
+    且校验时释放 GIL，适合配合线程池使用
+    """
+
+    name = "cryptography"
+
+    def __init__(self, pub_key: str) -> None:
+        from cryptography.exceptions import InvalidSignature
+        from cryptography.hazmat.primitives import hashes, serialization
+        from cryptography.hazmat.primitives.asymmetric import padding
+
+        super().__init__(pub_key)
+        self.key = serialization.load_pem_public_key(pub_key.encode())
+        self._invalid_signature = InvalidSignature
+        self._padding = padding.PKCS1v15()
+        self._hash = hashes.SHA256()
+
+    def verify(self, sign: bytes, message: bytes) -> bool:
+        try:
+            self.key.verify(  # type: ignore[union-attr]
+                sign,
+                message,
+                self._padding,
+                self._hash,  # type: ignore[call-arg]
+            )
+        except self._invalid_signature:
+            return False
+        return True
+
+
+def default_verifier(pub_key: str) -> Verifier:
+    """获取可用的最快校验后端，未安装 ``cryptography`` 时使用 ``rsa``
+
+    Args:
+        pub_key (str): PEM 格式公钥
+
+    Returns:
+        Verifier: 校验后端
+    """
+    try:
+        return CryptographyVerifier(pub_key)
+    except ImportError:
+        logger.debug("cryptography isn't installed, fallback to rsa")
+        return RSAVerifier(pub_key)
@@ -6,9 +6,10 @@ import time
 from typing import NoReturn
 
 from hertavilla.bot import VillaBot
-from hertavilla.event import Event, parse_event
+from hertavilla.event import Event, EventParser
 from hertavilla.model import WebSocketInfo
 from hertavilla.utils import TaskManager
+from hertavilla.ws.convert import event_from_proto
 from hertavilla.ws.package import (
     BIZ_TO_PACK,
     HeartBeat,
@@ -44,8 +45,10 @@ class WSConn:
         bot: VillaBot,
         ws: ClientWebSocketResponse,
         ws_info: WebSocketInfo,
+        event_parser: EventParser | None = None,
     ):
         self.bot = bot
+        self.event_parser = event_parser
         self.ws_info = ws_info
         self.ws = ws
         self._id = 0
@@ -69,13 +72,18 @@ class WSConn:
 
         if payload.biz_type == BizType.EVENT.value:
             # 事件包
-            event = parse_event(
-                MessageToDict(
-                    RobotEvent().FromString(payload.body),
-                    preserving_proto_field_name=True,
-                    use_integers_for_enums=True,
-                ),
-            )
+            message = RobotEvent().FromString(payload.body)
+            if self.event_parser is None:
+                event = event_from_proto(message, self.bot.lazy_events)
+            else:
+                event = self.event_parser(
+                    MessageToDict(
+                        message,
+                        preserving_proto_field_name=True,
+                        use_integers_for_enums=True,
+                    ),
+                    self.bot.lazy_events,
+                )
             logger.info(
                 (
                     f"[RECV] {event.__class__.__name__} "
@@ -117,8 +125,14 @@ ws_conns: list[WSConn] = []
 
 
 class WSConnection:
-    def __init__(self, bot: VillaBot, owner: set[WSConnection]):
+    def __init__(
+        self,
+        bot: VillaBot,
+        owner: set[WSConnection],
+        event_parser: EventParser | None = None,
+    ):
         self.bot = bot
+        self.event_parser = event_parser
         self.task_manager = TaskManager()
         self.ws_conn: WSConn | None = None
         self.ws_info: WebSocketInfo | None = None
@@ -146,6 +160,7 @@ class WSConnection:
                                 self.bot,
                                 resp,
                                 ws_info,
+                                self.event_parser,
                             )
                             ws_conns.append(ws_conn)
                             is_login = await self._login(ws_conn, ws_info)
@@ -201,8 +216,25 @@ class WSConnection:
         while True:
             pack = await ws.recv()
             if isinstance(pack, Event):
+                if self.bot.deduplicator.is_duplicate(
+                    self.bot.bot_id,
+                    pack.id,
+                    "websocket",
+                ):
+                    continue
                 if self.bot._bot_info is None:  # noqa: SLF001
                     self.bot.bot_info = pack.robot.template
+                if self.bot.event_pool is not None:
+                    # 队列满时暂停读取
+                    if await self.bot.event_pool.put(self.bot, pack):
+                        continue
+                    # worker 池已关闭，重连后重新推送的事件不应被视为重复事件
+                    self.bot.deduplicator.forget(self.bot.bot_id, pack.id)
+                    logger.info(
+                        f"[{self.bot.bot_id}] Event pool is closed, "
+                        "stop receiving events",
+                    )
+                    raise StopConnecting
                 task = asyncio.create_task(self.bot.handle_event(pack))
                 background_tasks.add(task)
                 task.add_done_callback(background_tasks.discard)
@@ -0,0 +1,262 @@
+from __future__ import annotations
+
+from typing import Any, Callable, Sequence, Tuple
+
+from hertavilla.decoder import (
+    EventDecoder,
+    _value_expression,
+    parse_event_fast,
+)
+from hertavilla.event import Event, events
+from hertavilla.ws.pb.model_pb2 import RobotEvent
+
+from google.protobuf.descriptor import Descriptor, FieldDescriptor
+from google.protobuf.message import Message
+from pydantic import BaseModel
+from pydantic.fields import SHAPE_LIST, ModelField
+
+MessageConverter = Callable[[Sequence[Message], bool], Any]
+ConverterKey = Tuple[type, Tuple[Descriptor, ...]]
+
+
+class ProtoEventConverter:
+    """将 WebSocket 推送的 ``RobotEvent`` protobuf 消息直接转换为事件
+
+    不经过 ``MessageToDict`` 生成的中间字典与 pydantic 的完整校验，
+    首次转换时按事件模型与 protobuf 消息的字段定义生成专用的转换函数并缓存，
+    字段值由 ``EventDecoder`` 的字段转换函数处理。
+
+    事件数据中的字段优先于事件本身的同名字段（如 ``send_at``），
+    与 ``parse_event`` 一致，值为默认值的 protobuf 字段视为未设置，
+    此时可选字段使用模型的默认值，必需字段使用 protobuf 的默认值。
+
+    Args:
+        decoder (EventDecoder, optional): 用于转换字段值的解码器. Defaults to parse_event_fast.
+    """  # noqa: E501
+
+    def __init__(self, decoder: EventDecoder = parse_event_fast) -> None:
+        self.decoder = decoder
+        self._converters: dict[ConverterKey, MessageConverter] = {}
+
+    def __call__(self, message: RobotEvent, lazy: bool = False) -> Event:
+        """转换事件
+
+        Args:
+            message (RobotEvent): protobuf 事件消息
+            lazy (bool, optional): 是否延迟解析消息内容等开销较大的字段. Defaults to False.
+
+        Returns:
+            Event: 事件
+        """  # noqa: E501
+        try:
+            cls_, _ = events[message.type]
+        except KeyError:
+            raise ValueError(f"Unknown event type {message.type}") from None
+        extend = message.extend_data
+        # oneof 字段名与事件名不完全一致（如 DelectRobot），按 oneof 取值
+        name = extend.WhichOneof("EventData")
+        sources = (
+            (message,) if name is None else (getattr(extend, name), message)
+        )
+        return self.convert(cls_, sources, lazy)
+
+    def convert(
+        self,
+        model: type[Any],
+        sources: Sequence[Message],
+        lazy: bool = False,
+    ) -> Any:
+        """将 protobuf 消息转换为模型，多个消息中有同名字段时前面的优先
+
+        Args:
+            model (type[Any]): 模型
+            sources (Sequence[Message]): protobuf 消息
+            lazy (bool, optional): 是否延迟解析 ``__lazy_fields__`` 中的字段. Defaults to False.
+
+        Returns:
+            Any: 模型实例
+        """  # noqa: E501
+        converter = self._converter(
+            model,
+            tuple(source.DESCRIPTOR for source in sources),
+        )
+        return converter(sources, lazy)
+
+    def _converter(
+        self,
+        model: type[BaseModel],
+        descriptors: tuple[Descriptor, ...],
+    ) -> MessageConverter:
+        key = (model, descriptors)
+        converter = self._converters.get(key)
+        if converter is None:
+            converter = self._converters[key] = self._compile(*key)
+        return converter
+
+    def _compile(
+        self,
+        model: type[BaseModel],
+        descriptors: tuple[Descriptor, ...],
+    ) -> MessageConverter:
+        # 为每个模型与消息类型的组合生成一个展开了所有字段的转换函数
+        namespace: dict[str, Any] = {
+            "model": model,
+            "new": model.__new__,
+            "setattr": object.__setattr__,
+        }
+        lazy_fields: tuple[str, ...] = getattr(model, "__lazy_fields__", ())
+        sources = "".join(f"s{i}, " for i in range(len(descriptors)))
+        lines = [
+            "def convert(sources, lazy):",
+            f"    {sources}= sources",
+            "    values = {}",
+            "    fields_set = set()",
+        ]
+        if lazy_fields:
+            lines.append("    pending = {}")
+        for i, (name, field) in enumerate(model.__fields__.items()):
+            protos = [
+                (index, proto)
+                for index, descriptor in enumerate(descriptors)
+                if (proto := descriptor.fields_by_name.get(name)) is not None
+            ]
+            if not protos:
+                if field.required is True:
+                    message = f"{model.__name__}.{name} is required"
+                    lines.append(f"    raise ValueError({message!r})")
+                else:
+                    namespace[f"default_{i}"] = field.get_default
+                    lines.append(f"    values[{name!r}] = default_{i}()")
+                continue
+            proto = protos[0][1]
+            lines.extend(self._select(name, field, i, protos, namespace))
+            indent = " " * (4 if field.required is True else 8)
+            expr = self._expression(model, field, proto, i, namespace)
+            lines.append(f"{indent}fields_set.add({name!r})")
+            if name in lazy_fields and proto.message_type is None:
+                lines.extend(
+                    (
+                        f"{indent}if lazy:",
+                        f"{indent}    pending[{name!r}] = v",
+                        f"{indent}else:",
+                        f"{indent}    values[{name!r}] = {expr}",
+                    ),
+                )
+            else:
+                lines.append(f"{indent}values[{name!r}] = {expr}")
+        lines.extend(
+            (
+                "    instance = new(model)",
+                "    setattr(instance, '__dict__', values)",
+                "    setattr(instance, '__fields_set__', fields_set)",
+            ),
+        )
+        if model.__private_attributes__:
+            lines.append("    instance._init_private_attributes()")
+        if lazy_fields:
+            lines.extend(
+                ("    if pending:", "        instance._lazy.update(pending)"),
+            )
+        lines.append("    return instance")
+        exec("\n".join(lines), namespace)
+        return namespace["convert"]
+
+    @staticmethod
+    def _select(
+        name: str,
+        field: ModelField,
+        index: int,
+        protos: list[tuple[int, FieldDescriptor]],
+        namespace: dict[str, Any],
+    ) -> list[str]:
+        # 将第一个已设置的值赋给 v
+        required = field.required is True
+        lines: list[str] = []
+        for i, (source, proto) in enumerate(protos):
+            attr = f"s{source}.{name}"
+            if required and i == len(protos) - 1:
+                # 都未设置时，必需字段使用 protobuf 的默认值
+                if i == 0:
+                    lines.append(f"    v = {attr}")
+                else:
+                    lines.extend(("    else:", f"        v = {attr}"))
+                return lines
+            if proto.message_type is not None and not _repeated(proto):
+                test = f"s{source}.HasField({name!r})"
+            else:
+                test = attr
+            lines.extend(
+                (
+                    f"    {'if' if i == 0 else 'elif'} {test}:",
+                    f"        v = {attr}",
+                ),
+            )
+        namespace[f"default_{index}"] = field.get_default
+        lines.extend(
+            (
+                "    else:",
+                f"        values[{name!r}] = default_{index}()",
+                "        v = MISSING",
+                "    if v is not MISSING:",
+            ),
+        )
+        namespace["MISSING"] = _MISSING
+        return lines
+
+    def _expression(
+        self,
+        model: type[BaseModel],
+        field: ModelField,
+        proto: FieldDescriptor,
+        index: int,
+        namespace: dict[str, Any],
+    ) -> str:
+        type_ = field.type_
+        if (
+            proto.message_type is not None
+            and isinstance(type_, type)
+            and issubclass(type_, BaseModel)
+        ):
+            namespace[f"convert_{index}"] = self._nested(
+                type_,
+                (proto.message_type,),
+            )
+            if field.shape == SHAPE_LIST:
+                return f"[convert_{index}(x) for x in v]"
+            return f"convert_{index}(v)"
+        convert = self.decoder.field_converter(model, field)
+        namespace[f"convert_{index}"] = convert
+        if _repeated(proto):
+            return f"convert_{index}(list(v), values)"
+        return _value_expression(convert, f"convert_{index}")
+
+    def _nested(
+        self,
+        model: type[BaseModel],
+        descriptors: tuple[Descriptor, ...],
+    ) -> Callable[[Message], Any]:
+        # 首次调用时才生成嵌套模型的转换函数
+        converter: MessageConverter | None = None
+
+        def convert(message: Message) -> Any:
+            nonlocal converter
+            if converter is None:
+                converter = self._converter(model, descriptors)
+            return converter((message,), False)
+
+        return convert
+
+
+_MISSING = object()
+
+
+def _repeated(proto: FieldDescriptor) -> bool:
+    # 新版本 protobuf 弃用了 label
+    repeated = getattr(proto, "is_repeated", None)
+    if repeated is None:
+        return proto.label == FieldDescriptor.LABEL_REPEATED
+    return repeated
+
+
+event_from_proto = ProtoEventConverter()
+"""使用默认配置的 ``ProtoEventConverter`` 转换事件"""
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import base64
+import json
+from types import SimpleNamespace
+from typing import Callable
+import urllib.parse
+
+import pytest
+
+
+@pytest.fixture
+def keypair():
+    """RSA 密钥对，返回 PEM 格式的公钥与 ``rsa`` 私钥"""
+    from pyasn1.codec.der import encoder
+    from pyasn1.type import univ
+    import rsa
+    from rsa.asn1 import OpenSSLPubKey
+
+    pub, priv = rsa.newkeys(1024)
+    spki = OpenSSLPubKey()
+    spki["header"]["oid"] = univ.ObjectIdentifier("1.2.840.113549.1.1.1")
+    spki["header"]["parameters"] = univ.Null("")
+    spki["key"] = b"\x00" + pub.save_pkcs1("DER")
+    der = base64.encodebytes(encoder.encode(spki)).decode()
+    return f"-----BEGIN PUBLIC KEY-----\n{der}-----END PUBLIC KEY-----\n", priv
+
+
+@pytest.fixture
+def sign_callback(keypair) -> Callable[[str], str]:
+    """按开放平台的方式为回调请求体签名，Bot secret 为 ``secret``"""
+    import rsa
+
+    _, priv = keypair
+
+    def sign(body: str) -> str:
+        message = urllib.parse.urlencode({"body": body, "secret": "secret"})
+        return base64.b64encode(
+            rsa.sign(message.encode(), priv, "SHA-256"),
+        ).decode()
+
+    return sign
+
+
+@pytest.fixture
+def signed_callback(keypair, sign_callback) -> SimpleNamespace:
+    """Bot ``bot`` 收到的 CreateRobot 回调，包括公钥、事件、请求体与签名"""
+    template = {"id": "bot", "name": "bot", "icon": "", "commands": []}
+    event = {
+        "robot": {"template": template, "villa_id": 1},
+        "type": 3,
+        "extend_data": {"CreateRobot": {}},
+        "created_at": 0,
+        "id": "1",
+        "send_at": 0,
+    }
+    body = json.dumps({"event": event})
+    return SimpleNamespace(
+        pub_key=keypair[0],
+        event=event,
+        body=body,
+        sign=sign_callback(body),
+    )
@@ -0,0 +1,389 @@
+# ruff: noqa: PLR2004
+from __future__ import annotations
+
+import asyncio
+from types import SimpleNamespace
+
+from aiohttp import ClientConnectorError
+import pytest
+
+
+def test_rate_limiter():
+    from hertavilla.apis.internal import RateLimit, RateLimiter
+
+    limiter = RateLimiter({"/sendMessage": RateLimit(rate=50, burst=2)})
+
+    async def run():
+        waits = [await limiter.acquire("/sendMessage", 1) for _ in range(4)]
+        # 其他大别野和未配置的 API 不受影响
+        assert await limiter.acquire("/sendMessage", 2) == 0
+        assert await limiter.acquire("/getMember", 1) == 0
+        return waits
+
+    waits = asyncio.run(run())
+    assert waits[:2] == [0, 0]
+    assert all(wait > 0 for wait in waits[2:])
+    stats = limiter.stats["/sendMessage"]
+    assert stats.calls == 5
+    assert stats.delayed == 2
+    assert stats.max_wait >= stats.average_wait > 0
+
+
+def test_retry_policy():
+    from hertavilla.apis.internal import RetryPolicy, _BaseAPIMixin
+    from hertavilla.exception import (
+        HTTPStatusError,
+        InvalidRequest,
+        UnknownServerError,
+    )
+
+    policy = RetryPolicy(max_attempts=3, base_delay=0.001, max_delay=0.002)
+    assert policy.is_retryable(HTTPStatusError(502))
+    assert not policy.is_retryable(HTTPStatusError(404))
+    assert policy.is_retryable(UnknownServerError(-502, ""))
+    assert not policy.is_retryable(InvalidRequest(-1, ""))
+    assert 0.001 <= policy.backoff(5) <= 0.002
+
+    class FlakyAPI(_BaseAPIMixin):
+        def __init__(self, errors: list[Exception]) -> None:
+            super().__init__("bot", "secret", "key", retry_policy=policy)
+            self.errors = errors
+            self.calls = 0
+
+        async def _request(self, *args, **kwargs):
+            self.calls += 1
+            if self.errors:
+                raise self.errors.pop(0)
+            return {"ok": True}
+
+    api = FlakyAPI([HTTPStatusError(502), UnknownServerError(-502, "")])
+    assert asyncio.run(api.base_request("/getRoom", "GET", 1)) == {"ok": True}
+    assert api.calls == 3
+
+    api = FlakyAPI([InvalidRequest(-1, "")])
+    with pytest.raises(InvalidRequest):
+        asyncio.run(api.base_request("/getRoom", "GET", 1))
+    assert api.calls == 1
+
+    # POST 请求默认只在连接未能建立时重试
+    assert not policy.is_retryable(HTTPStatusError(502), "POST")
+    refused = ClientConnectorError(
+        SimpleNamespace(host="localhost", port=80, ssl=None),  # type: ignore
+        ConnectionRefusedError(),
+    )
+    api = FlakyAPI([refused])
+    asyncio.run(api.base_request("/sendMessage", "POST", 1, data={}))
+    assert api.calls == 2
+    api = FlakyAPI([HTTPStatusError(502)])
+    with pytest.raises(HTTPStatusError):
+        asyncio.run(api.base_request("/sendMessage", "POST", 1, data={}))
+    assert api.calls == 1
+    api = FlakyAPI([HTTPStatusError(502)])
+    asyncio.run(
+        api.base_request(
+            "/sendMessage",
+            "POST",
+            1,
+            data={},
+            retry_policy=RetryPolicy(retry_post=True, base_delay=0.001),
+        ),
+    )
+    assert api.calls == 2
+
+
+def test_single_flight():
+    from hertavilla.apis.internal import _BaseAPIMixin
+
+    class SlowAPI(_BaseAPIMixin):
+        calls = 0
+
+        async def _request(self, api, method, villa_id, *, data, params):
+            self.calls += 1
+            await asyncio.sleep(0.01)
+            return {"api": api, "params": params}
+
+    async def run(api: SlowAPI):
+        return await asyncio.gather(
+            *(
+                api.base_request("/getMember", "GET", 1, params={"uid": 1})
+                for _ in range(10)
+            ),
+            api.base_request("/getMember", "GET", 1, params={"uid": 2}),
+            api.base_request("/sendMessage", "POST", 1, data={}),
+            api.base_request("/sendMessage", "POST", 1, data={}),
+        )
+
+    api = SlowAPI("bot", "secret", "key")
+    results = asyncio.run(run(api))
+    assert api.calls == 4
+    assert all(result is results[0] for result in results[:10])
+    assert len(api._single_flight) == 0  # noqa: SLF001
+
+    api = SlowAPI("bot", "secret", "key", coalesce_requests=False)
+    asyncio.run(run(api))
+    assert api.calls == 13
+
+
+def test_single_flight_joiner_deadline():
+    from hertavilla.apis.internal import _BaseAPIMixin, use_deadline
+    from hertavilla.exception import APITimeoutError
+
+    class SlowAPI(_BaseAPIMixin):
+        calls = 0
+
+        async def _request(self, api, method, villa_id, *, data, params):
+            self.calls += 1
+            await asyncio.sleep(0.2)
+            return {"api": api}
+
+    async def get_member(api: SlowAPI):
+        return await api.base_request(
+            "/getMember",
+            "GET",
+            1,
+            params={"uid": 1},
+        )
+
+    async def join(api: SlowAPI):
+        await asyncio.sleep(0)
+        with use_deadline(0.02), pytest.raises(APITimeoutError):
+            await get_member(api)
+        return asyncio.get_running_loop().time()
+
+    async def run(api: SlowAPI):
+        start = asyncio.get_running_loop().time()
+        result, timed_out = await asyncio.gather(get_member(api), join(api))
+        return result, timed_out - start
+
+    api = SlowAPI("bot", "secret", "key")
+    result, elapsed = asyncio.run(run(api))
+    # 加入的调用按自身时限超时，共享的调用继续执行
+    assert elapsed < 0.1
+    assert result == {"api": "/getMember"}
+    assert api.calls == 1
+
+
+def test_api_cache():
+    from hertavilla.apis.cache import MISSING, APICache
+    from hertavilla.apis.internal import _BaseAPIMixin
+
+    cache = APICache(maxsize=2, ttls={"/getRoom": 0})
+    cache.set("/getMember", 1, (("uid", 1),), "a")
+    cache.set("/getMember", 1, (("uid", 2),), "b")
+    assert cache.get("/getMember", 1, (("uid", 1),)) == "a"
+    cache.set("/getMember", 1, (("uid", 3),), "c")
+    # uid 2 最久未使用，被淘汰
+    assert cache.get("/getMember", 1, (("uid", 2),)) is MISSING
+    assert cache.get("/getMember", "1", (("uid", 3),)) == "c"
+    assert not cache.cacheable("/getRoom")
+
+    stats = cache.stats["/getMember"]
+    assert (stats.hits, stats.misses, stats.evictions) == (2, 1, 1)
+
+    cache.invalidate_mutation("/deleteVillaMember", 1, {"uid": "3"})
+    assert cache.get("/getMember", 1, (("uid", 3),)) is MISSING
+    assert len(cache) == 1
+
+    class CachedAPI(_BaseAPIMixin):
+        calls = 0
+
+        async def _request(self, api, method, villa_id, *, data, params):
+            self.calls += 1
+            return {"api": api}
+
+    async def run(api: CachedAPI):
+        for _ in range(3):
+            await api.base_request("/getRoom", "GET", 1, params={"room_id": 1})
+        await api.base_request("/editRoom", "POST", 1, data={"room_id": 1})
+        await api.base_request("/getRoom", "GET", 1, params={"room_id": 1})
+
+    api = CachedAPI("bot", "secret", "key", cache=APICache())
+    asyncio.run(run(api))
+    assert api.calls == 3
+
+
+def test_api_cache_invalidated_during_fetch():
+    from hertavilla.apis.cache import APICache
+    from hertavilla.apis.internal import _BaseAPIMixin
+
+    class CachedAPI(_BaseAPIMixin):
+        def __init__(self) -> None:
+            super().__init__("bot", "secret", "key", cache=APICache())
+            self.name = "old"
+            self.started = asyncio.Event()
+            self.gate = asyncio.Event()
+            self.calls = 0
+
+        async def _request(self, api, method, villa_id, *, data, params):
+            if method == "POST":
+                self.name = data["name"]
+                return {}
+            self.calls += 1
+            name = self.name
+            if self.calls == 1:
+                # 第一次查询在修改完成后才返回旧值
+                self.started.set()
+                await self.gate.wait()
+            return {"name": name}
+
+    async def get_room(api: CachedAPI):
+        return await api.base_request(
+            "/getRoom",
+            "GET",
+            1,
+            params={"room_id": 1},
+        )
+
+    async def run(api: CachedAPI):
+        stale = asyncio.create_task(get_room(api))
+        await api.started.wait()
+        await api.base_request(
+            "/editRoom",
+            "POST",
+            1,
+            data={"room_id": 1, "name": "new"},
+        )
+        # 修改后的查询不会合并到修改前发起的调用中
+        fresh = await get_room(api)
+        api.gate.set()
+        return await stale, fresh, await get_room(api)
+
+    api = CachedAPI()
+    stale, fresh, cached = asyncio.run(asyncio.wait_for(run(api), 1))
+    assert stale == {"name": "old"}
+    assert fresh == cached == {"name": "new"}
+    assert api.calls == 2
+
+
+def test_circuit_breaker():
+    from hertavilla.apis.internal import CircuitBreaker, CircuitState
+    from hertavilla.exception import CircuitOpenError, HTTPStatusError
+
+    breaker = CircuitBreaker(
+        min_calls=4,
+        open_timeout=0.01,
+        half_open_probes=2,
+    )
+    for error in (None, HTTPStatusError(404), HTTPStatusError(503), None):
+        breaker.before_call("/getRoom")
+        breaker.record("/getRoom", None, error)
+    assert breaker.state("/getRoom") == CircuitState.CLOSED
+    for _ in range(2):
+        breaker.before_call("/getRoom")
+        breaker.record("/getRoom", None, HTTPStatusError(502))
+    assert breaker.state("/getRoom") == CircuitState.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call("/getRoom")
+    # 其他 API 不受影响
+    assert not breaker.before_call("/getMember")
+
+    asyncio.run(asyncio.sleep(0.02))
+    assert breaker.before_call("/getRoom")
+    assert breaker.before_call("/getRoom")
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call("/getRoom")
+    breaker.record("/getRoom", None, None, probe=True)
+    breaker.record("/getRoom", None, None, probe=True)
+    assert breaker.state("/getRoom") == CircuitState.CLOSED
+
+
+def test_priority_scheduler():
+    from hertavilla.apis.priority import (
+        Priority,
+        PriorityScheduler,
+        use_priority,
+    )
+
+    scheduler = PriorityScheduler(max_concurrency=1, aging=60)
+    assert scheduler.priority_of("/sendMessage") == Priority.INTERACTIVE
+    assert scheduler.priority_of("/getRoom") == Priority.NORMAL
+    with use_priority(Priority.BULK):
+        assert scheduler.priority_of("/sendMessage") == Priority.BULK
+
+    async def run(scheduler: PriorityScheduler, priorities: list[Priority]):
+        order = []
+
+        async def call(i: int, priority: Priority):
+            await scheduler.acquire(priority)
+            order.append(i)
+            scheduler.release()
+
+        await scheduler.acquire(Priority.NORMAL)
+        tasks = []
+        for i, priority in enumerate(priorities):
+            tasks.append(asyncio.create_task(call(i, priority)))
+            await asyncio.sleep(0.01)
+        scheduler.release()
+        await asyncio.gather(*tasks)
+        return order
+
+    priorities = [Priority.BULK, Priority.NORMAL, Priority.INTERACTIVE]
+    assert asyncio.run(run(scheduler, priorities)) == [2, 1, 0]
+    # 排队时间足够长的低优先级调用不会被饿死
+    scheduler = PriorityScheduler(max_concurrency=1, aging=0.001)
+    assert asyncio.run(run(scheduler, priorities)) == [0, 1, 2]
+    assert scheduler.active == 0
+
+
+def test_http_session_loop_change():
+    from hertavilla.apis.internal import HTTPSession
+
+    session = HTTPSession()
+    first = asyncio.run(session.get())
+    # 事件循环改变后，旧会话被关闭
+    second = asyncio.run(session.get())
+    assert second is not first
+    assert first.closed
+    asyncio.run(session.close())
+    assert second.closed
+
+
+def test_get_members():
+    from hertavilla.apis.member import MemberAPIMixin
+    from hertavilla.exception import InvalidRequest
+
+    class MemberAPI(MemberAPIMixin):
+        def __init__(self) -> None:
+            super().__init__("bot", "secret", "key")
+            self.active = 0
+            self.max_active = 0
+            self.requested: list[int] = []
+
+        async def get_member(self, villa_id, uid):
+            self.requested.append(uid)
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+            await asyncio.sleep(0.001)
+            self.active -= 1
+            if uid % 3 == 0:
+                raise InvalidRequest(-1, f"member {uid} not found")
+            return uid
+
+    api = MemberAPI()
+    uids = [*range(1, 21), 1, 2, 2]
+    members, errors = asyncio.run(api.get_members(1, uids, concurrency=4))
+    # 重复的 uid 只请求一次
+    assert sorted(api.requested) == list(range(1, 21))
+    assert api.max_active == 4
+    assert members == {uid: uid for uid in range(1, 21) if uid % 3}
+    assert sorted(errors) == [3, 6, 9, 12, 15, 18]
+    assert all(isinstance(e, InvalidRequest) for e in errors.values())
+
+    with pytest.raises(ValueError):
+        asyncio.run(api.get_members(1, uids, concurrency=0))
+
+
+def test_base_request_logs_once(caplog: pytest.LogCaptureFixture):
+    from hertavilla.apis.internal import _BaseAPIMixin
+    from hertavilla.apis.priority import Priority
+
+    class API(_BaseAPIMixin):
+        async def _request(self, api, method, villa_id, *, data, params):
+            return {}
+
+    api = API("bot", "secret", "key")
+    with caplog.at_level("INFO", logger="hertavilla.api"):
+        asyncio.run(
+            api.base_request("/getRoom", "GET", 1, priority=Priority.BULK),
+        )
+    assert caplog.messages.count("Calling API /getRoom.") == 1
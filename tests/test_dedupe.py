@@ -0,0 +1,65 @@
+# ruff: noqa: PLR2004
+from __future__ import annotations
+
+import asyncio
+import time
+
+from hertavilla.dedupe import EventDeduplicator
+from hertavilla.metrics import MetricsRegistry
+
+
+def test_deduplicator(monkeypatch):
+    now = 0.0
+    monkeypatch.setattr(time, "monotonic", lambda: now)
+    registry = MetricsRegistry()
+    dedupe = EventDeduplicator(maxsize=2, ttl=10, registry=registry)
+
+    assert not dedupe.is_duplicate("bot", "1", "http")
+    assert dedupe.is_duplicate("bot", "1", "http")
+    assert not dedupe.is_duplicate("other", "1", "websocket")
+    # 超出数量限制，淘汰最早的记录
+    assert not dedupe.is_duplicate("bot", "2", "http")
+    assert ("bot", "1") not in dedupe
+    assert len(dedupe) == 2
+    # 超出时间限制
+    now = 11.0
+    assert not dedupe.is_duplicate("bot", "2", "http")
+    assert len(dedupe) == 1
+
+    counter = registry.metrics["hertavilla_events_deduplicated_total"]
+    assert counter.samples() == {("bot", "http"): 1}
+
+    disabled = EventDeduplicator(maxsize=0, registry=registry)
+    assert not disabled.is_duplicate("bot", "1")
+    assert not disabled.is_duplicate("bot", "1")
+
+
+def test_invalid_event_not_recorded(signed_callback):
+    from hertavilla.bot import VillaBot
+    from hertavilla.event import parse_event
+    from hertavilla.server.aiohttp import AIOHTTPBackend
+
+    parsed = []
+
+    def parse(payload, lazy):
+        parsed.append(payload)
+        if len(parsed) == 1:
+            raise ValueError("invalid event")
+        return parse_event(payload, lazy)
+
+    backend = AIOHTTPBackend(event_parser=parse)
+    backend.bots["bot"] = VillaBot("bot", "secret", signed_callback.pub_key)
+
+    async def run() -> list[int]:
+        codes = []
+        for _ in range(2):
+            resp = await backend._run_handles(  # noqa: SLF001
+                signed_callback.sign,
+                signed_callback.body,
+            )
+            codes.append(resp.status_code)
+        return codes
+
+    # 解析失败的事件重试时不视为重复
+    assert asyncio.run(run()) == [400, 200]
+    assert len(parsed) == 2
@@ -0,0 +1,240 @@
+# ruff: noqa: PLR2004
+from __future__ import annotations
+
+import asyncio
+import time
+
+from hertavilla.apis.img import ImgAPIMixin
+from hertavilla.apis.internal import RetryPolicy
+from hertavilla.apis.member import MemberAPIMixin
+from hertavilla.apis.message import MessageAPIMixin
+from hertavilla.apis.villa import VillaAPIMixin
+from hertavilla.apis.websocket import WebSocketAPIMixin
+from hertavilla.emulator import EndpointBehavior, VillaEmulator
+
+import pytest
+
+
+class Bot(
+    MemberAPIMixin,
+    MessageAPIMixin,
+    ImgAPIMixin,
+    VillaAPIMixin,
+    WebSocketAPIMixin,
+):
+    ...
+
+
+def test_emulator():
+    from hertavilla.exception import HTTPStatusError
+
+    async def run():
+        emulator = VillaEmulator(
+            members=25,
+            endpoints={
+                "/getWebsocketInfo": EndpointBehavior(rate_limit=1),
+                "/audit": EndpointBehavior(http_error_rate=1),
+            },
+        )
+        async with emulator:
+            bot = Bot(
+                "bot",
+                "secret",
+                "key",
+                api_base=emulator.api_base,
+                retry_policy=RetryPolicy.never(),
+            )
+            try:
+                members = [
+                    member async for member in bot.iter_villa_members(1, 10)
+                ]
+                assert [m.basic.uid for m in members] == list(range(1, 26))
+                assert (await bot.get_member(1, 3)).basic.uid == 3
+
+                content = {"content": {"text": "hello", "entities": []}}
+                assert await bot.send_message(1, 1, content)
+                assert emulator.messages[0]["room_id"] == 1
+
+                url = await bot.upload_image(1, b"image", "png")
+                assert url.startswith(emulator.api_base)
+                assert list(emulator.uploads.values()) == [b"image"]
+
+                await bot.get_websocket_info(1)
+                with pytest.raises(HTTPStatusError):
+                    await bot.get_websocket_info(1)
+                assert emulator.rate_limited["/getWebsocketInfo"] == 1
+            finally:
+                await bot.close()
+
+    asyncio.run(run())
+
+
+def test_timeouts():
+    from hertavilla.apis.internal import api_timeouts, use_deadline
+    from hertavilla.exception import APITimeoutError
+
+    async def run():
+        emulator = VillaEmulator(
+            endpoints={
+                "/getMember": EndpointBehavior(latency=0.2),
+                "/oss/upload": EndpointBehavior(latency=0.2),
+            },
+        )
+        async with emulator:
+            bot = Bot(
+                "bot",
+                "secret",
+                "key",
+                api_base=emulator.api_base,
+                retry_policy=RetryPolicy.never(),
+                timeout=0.05,
+            )
+            try:
+                with pytest.raises(APITimeoutError):
+                    await bot.get_member(1, 1)
+                with pytest.raises(APITimeoutError):
+                    await bot.upload_image(1, b"image", "png")
+                # 客户端超时断开后，模拟器仍会处理已收到的请求
+                await asyncio.sleep(0.3)
+                assert list(emulator.uploads.values()) == [b"image"]
+
+                bot.timeout = None
+                with use_deadline(0.05), pytest.raises(APITimeoutError):
+                    await bot.get_member(1, 1)
+                # 时限用尽后不再发出请求
+                requests = emulator.requests["/getVilla"]
+                with use_deadline(0), pytest.raises(APITimeoutError):
+                    await bot.get_villa(1)
+                assert emulator.requests["/getVilla"] == requests
+            finally:
+                await bot.close()
+
+    before = api_timeouts.get(bot="bot", api="/getMember")
+    asyncio.run(run())
+    assert api_timeouts.get(bot="bot", api="/getMember") == before + 2
+    assert api_timeouts.get(bot="bot", api="/oss") >= 1
+
+
+def test_timed_out_post_not_retried():
+    from hertavilla.apis.internal import use_retry_policy
+    from hertavilla.exception import APITimeoutError
+
+    async def run():
+        emulator = VillaEmulator(
+            endpoints={"/sendMessage": EndpointBehavior(latency=0.3)},
+        )
+        async with emulator:
+            bot = Bot(
+                "bot",
+                "secret",
+                "key",
+                api_base=emulator.api_base,
+                retry_policy=RetryPolicy(base_delay=0.01),
+                timeout=0.1,
+            )
+            content = {"content": {"text": "hello", "entities": []}}
+            try:
+                with pytest.raises(APITimeoutError):
+                    await bot.send_message(1, 1, content)
+                # 请求可能已被平台处理，不会重新发送
+                assert emulator.requests["/sendMessage"] == 1
+
+                policy = RetryPolicy(
+                    max_attempts=2,
+                    base_delay=0.01,
+                    retry_post=True,
+                )
+                with use_retry_policy(policy), pytest.raises(APITimeoutError):
+                    await bot.send_message(1, 1, content)
+                assert emulator.requests["/sendMessage"] == 3
+            finally:
+                await bot.close()
+
+    asyncio.run(run())
+
+
+def test_priority_under_rate_limit():
+    from hertavilla.apis.internal import RateLimit, RateLimiter
+    from hertavilla.apis.priority import PriorityScheduler
+
+    async def run():
+        async with VillaEmulator() as emulator:
+            bot = Bot(
+                "bot",
+                "secret",
+                "key",
+                api_base=emulator.api_base,
+                rate_limiter=RateLimiter(
+                    {"/deleteVillaMember": RateLimit(rate=1)},
+                ),
+                scheduler=PriorityScheduler(max_concurrency=2),
+            )
+            try:
+                bulk = asyncio.gather(
+                    *(bot.delete_villa_member(1, uid) for uid in range(1, 5)),
+                    return_exceptions=True,
+                )
+                await asyncio.sleep(0.05)
+                # 等待令牌的批量调用不占用调度器名额
+                start = time.monotonic()
+                content = {"content": {"text": "hello", "entities": []}}
+                await bot.send_message(1, 1, content)
+                assert time.monotonic() - start < 0.3
+                bulk.cancel()
+                await asyncio.gather(bulk, return_exceptions=True)
+            finally:
+                await bot.close()
+
+    asyncio.run(run())
+
+
+def test_rate_limit_reply_retried():
+    from hertavilla.emulator import RATE_LIMIT_RETCODE
+    from hertavilla.exception import RateLimitExceeded, call_api_exceptions
+
+    assert call_api_exceptions[RATE_LIMIT_RETCODE] is RateLimitExceeded
+
+    async def run():
+        emulator = VillaEmulator(
+            endpoints={
+                "/getMember": EndpointBehavior(
+                    rate_limit=1,
+                    rate_limit_status=200,
+                ),
+            },
+        )
+        async with emulator:
+            bot = Bot(
+                "bot",
+                "secret",
+                "key",
+                api_base=emulator.api_base,
+                retry_policy=RetryPolicy(
+                    max_attempts=4,
+                    base_delay=0.5,
+                    max_delay=1,
+                    jitter=0,
+                ),
+            )
+            try:
+                await bot.get_member(1, 1)
+                # 被限流的调用退避后重试成功
+                assert (await bot.get_member(1, 2)).basic.uid == 2
+                assert emulator.rate_limited["/getMember"] >= 1
+            finally:
+                await bot.close()
+
+    asyncio.run(run())
+
+
+def test_warmup():
+    from hertavilla.apis.internal import HTTPSession
+
+    async def run():
+        session = HTTPSession()
+        async with VillaEmulator() as emulator:
+            assert await session.warmup(emulator.api_base, 3) == 3
+        assert await session.warmup("http://127.0.0.1:1", 2, 1) == 0
+        await session.close()
+
+    asyncio.run(run())
@@ -0,0 +1,282 @@
+# ruff: noqa: PLR2004
+from __future__ import annotations
+
+import copy
+import json
+from typing import Any
+
+from hertavilla.event import SendMessageEvent, parse_event
+from hertavilla.message import MessageChain
+
+from pydantic import ValidationError
+import pytest
+
+
+def send_message_payload(content: Any = None) -> dict[str, Any]:
+    if content is None:
+        content = {
+            "content": {
+                "text": "hi @bot !",
+                "entities": [
+                    {
+                        "offset": 3,
+                        "length": 4,
+                        "entity": {"type": "mentioned_robot", "bot_id": "bot"},
+                    },
+                ],
+            },
+            "user": {
+                "portraitUri": "",
+                "extra": "{}",
+                "name": "user",
+                "alias": "",
+                "id": "1",
+                "portrait": "",
+            },
+        }
+    return {
+        "robot": {
+            "template": {
+                "id": "bot",
+                "name": "bot",
+                "icon": "",
+                "commands": [],
+            },
+            "villa_id": 1,
+        },
+        "type": 2,
+        "extend_data": {
+            "SendMessage": {
+                "content": json.dumps(content),
+                "from_user_id": 1,
+                "send_at": 0,
+                "room_id": 2,
+                "object_name": 1,
+                "nickname": "user",
+                "msg_uid": "msg",
+                "bot_msg_id": "",
+                "quote_msg": None,
+            },
+        },
+        "created_at": 0,
+        "id": "1",
+        "send_at": 0,
+    }
+
+
+def test_lazy_event():
+    payload = send_message_payload()
+    eager = parse_event(copy.deepcopy(payload))
+    lazy = parse_event(copy.deepcopy(payload), lazy=True)
+    assert isinstance(lazy, SendMessageEvent)
+    assert lazy.room_id == eager.room_id
+    assert "content" not in lazy.__dict__
+
+    assert isinstance(lazy.message, MessageChain)
+    assert str(lazy.message) == str(eager.message)
+    assert "user" not in lazy.content.__dict__
+    assert lazy.content.user == eager.content.user
+    assert lazy.quote_msg is None
+    assert list(lazy.dict()) == list(eager.dict())
+
+    with pytest.raises(AttributeError):
+        lazy.unknown  # noqa: B018
+
+    # 头部字段仍然立即校验
+    invalid = send_message_payload()
+    del invalid["extend_data"]["SendMessage"]["room_id"]
+    with pytest.raises(ValidationError):
+        parse_event(invalid, lazy=True)
+
+    # 消息内容在首次访问时校验
+    event = parse_event(send_message_payload(1), lazy=True)
+    assert isinstance(event, SendMessageEvent)
+    with pytest.raises(ValidationError):
+        event.message  # noqa: B018
+
+
+def test_fast_decoder():
+    from hertavilla.decoder import parse_event_fast
+    from hertavilla.event import AuditCallbackEvent, AuditResult
+
+    payload = send_message_payload()
+    payload["extend_data"]["SendMessage"]["quote_msg"] = {
+        "content": "quoted",
+        "msg_uid": "quoted",
+        "bot_msg_id": None,
+        "send_at": 0,
+        "msg_type": "文本",
+        "from_user_id": 1,
+        "from_user_nickname": "user",
+        "from_user_id_str": "1",
+    }
+    for lazy in (False, True):
+        expected = parse_event(copy.deepcopy(payload))
+        event = parse_event_fast(copy.deepcopy(payload), lazy)
+        assert type(event) is SendMessageEvent
+        assert str(event.message) == str(expected.message)
+        event_dict, expected_dict = event.dict(), expected.dict()
+        event_dict["content"].pop("content")
+        expected_dict["content"].pop("content")
+        assert event_dict == expected_dict
+
+    # WebSocket 事件中的整数可能为字符串
+    audit = {
+        "robot": {
+            "template": {
+                "id": "bot",
+                "name": "bot",
+                "icon": "",
+                "commands": [],
+            },
+            "villa_id": "1",
+        },
+        "type": 6,
+        "extend_data": {
+            "EventData": {
+                "AuditCallback": {
+                    "audit_id": "audit",
+                    "bot_tpl_id": "bot",
+                    "user_id": "2",
+                    "audit_result": 2,
+                },
+            },
+        },
+        "created_at": "0",
+        "id": "1",
+        "send_at": "0",
+    }
+    event = parse_event_fast(copy.deepcopy(audit), False)
+    assert event == parse_event(copy.deepcopy(audit))
+    assert isinstance(event, AuditCallbackEvent)
+    assert event.villa_id == 1
+    assert event.audit_result is AuditResult.REJECTED
+    assert event.room_id is None
+
+    del audit["robot"]
+    with pytest.raises(ValueError):
+        parse_event_fast(audit, False)
+
+
+def test_event_from_proto():
+    # protobuf 属于可选依赖 ws
+    pytest.importorskip("google.protobuf")
+    from hertavilla.event import (
+        AddQuickEmoticonEvent,
+        DeleteRobotEvent,
+    )
+    from hertavilla.ws.convert import event_from_proto
+    from hertavilla.ws.pb.model_pb2 import RobotEvent
+
+    from google.protobuf.json_format import MessageToDict
+
+    message = RobotEvent(id="1", created_at=1, send_at=2)
+    message.type = RobotEvent.EventType.SendMessage
+    message.robot.villa_id = 3
+    message.robot.template.id = "bot"
+    message.robot.template.name = "bot"
+    message.robot.template.icon = "icon"
+    message.robot.template.commands.add(name="/help", desc="help")
+    info = message.extend_data.SendMessage
+    info.content = json.dumps(
+        {"content": {"text": "hello", "entities": []}},
+    )
+    info.from_user_id = 4
+    info.send_at = 5
+    info.room_id = 6
+    info.object_name = 1
+    info.nickname = "user"
+    info.msg_uid = "msg"
+    info.quote_msg.content = "quoted"
+    info.quote_msg.msg_uid = "quoted"
+    info.quote_msg.send_at = 7
+    info.quote_msg.msg_type = "文本"
+    info.quote_msg.from_user_id = 8
+    info.quote_msg.from_user_id_str = "8"
+    info.quote_msg.from_user_nickname = "user"
+
+    def parse(message: RobotEvent):
+        payload = MessageToDict(
+            message,
+            preserving_proto_field_name=True,
+            use_integers_for_enums=True,
+        )
+        return parse_event(payload)
+
+    for lazy in (False, True):
+        event = event_from_proto(message, lazy)
+        expected = parse(message)
+        assert isinstance(event, SendMessageEvent)
+        assert event.send_at == 5
+        assert event.bot_msg_id is None
+        assert event.robot == expected.robot
+        assert event.quote_msg == expected.quote_msg
+        assert str(event.message) == str(expected.message) == "hello"
+
+    # oneof 字段名与事件名不一致的事件
+    message = RobotEvent(id="2", type=RobotEvent.EventType.DeleteRobot)
+    message.robot.template.id = "bot"
+    message.extend_data.DelectRobot.villa_id = 3
+    assert isinstance(event_from_proto(message), DeleteRobotEvent)
+
+    # 值为默认值的必需字段
+    message = RobotEvent(id="3", type=RobotEvent.EventType.AddQuickEmoticon)
+    message.extend_data.AddQuickEmotion.emoticon = "ok"
+    event = event_from_proto(message)
+    assert isinstance(event, AddQuickEmoticonEvent)
+    assert event.bot_msg_id == ""
+    assert event.emoticon == "ok"
+    assert event.is_cancel is False
+
+    with pytest.raises(ValueError):
+        event_from_proto(RobotEvent(id="4"))
+
+
+def test_event_dispatcher():
+    from hertavilla.bot import Handler
+    from hertavilla.dispatch import EventDispatcher
+    from hertavilla.event import CreateRobotEvent, Event
+
+    async def noop(event, bot):
+        ...
+
+    dispatcher = EventDispatcher()
+    on_event = Handler(Event, noop)
+    on_message = Handler(SendMessageEvent, noop, temp=True)
+    dispatcher.add(on_event)
+    dispatcher.add(on_message)
+    assert dispatcher.handlers_for(SendMessageEvent) == [on_event, on_message]
+    assert dispatcher.handlers_for(CreateRobotEvent) == [on_event]
+
+    # 新注册的处理器会加入已缓存的索引
+    on_message_again = Handler(SendMessageEvent, noop)
+    dispatcher.add(on_message_again)
+    dispatcher.remove(on_message)
+    dispatcher.remove(on_message)
+    assert dispatcher.handlers_for(SendMessageEvent) == [
+        on_event,
+        on_message_again,
+    ]
+    assert dispatcher.handlers_for(CreateRobotEvent) == [on_event]
+    assert list(dispatcher) == [on_event, on_message_again]
+
+
+def test_bot_handlers_read_only(keypair):
+    from hertavilla.bot import VillaBot
+    from hertavilla.event import CreateRobotEvent
+
+    bot = VillaBot("bot", "secret", keypair[0])
+
+    @bot.listen(CreateRobotEvent)
+    async def on_create(event, bot):
+        ...
+
+    handlers = bot.handlers
+    assert [handler.func for handler in handlers][-1] is on_create
+    # 修改处理器列表时报错，而不是静默地修改副本
+    with pytest.raises(AttributeError):
+        handlers.append(handlers[0])  # type: ignore
+    with pytest.raises(AttributeError):
+        bot.message_handlers.remove(handlers[0])  # type: ignore
+    bot.dispatcher.remove(handlers[-1])
+    assert on_create not in [handler.func for handler in bot.handlers]
@@ -0,0 +1,189 @@
+# ruff: noqa: PLR2004
+from __future__ import annotations
+
+import asyncio
+from types import SimpleNamespace
+
+from hertavilla.dispatch import EventWorkerPool
+from hertavilla.metrics import MetricsRegistry
+
+import pytest
+
+
+class FakeBot:
+    bot_id = "bot"
+
+    def __init__(self) -> None:
+        self.handled: list[int] = []
+        self.handling = 0
+        self.max_concurrency = 0
+        self.gate = asyncio.Event()
+
+    async def handle_event(self, event) -> None:
+        self.handling += 1
+        self.max_concurrency = max(self.max_concurrency, self.handling)
+        await self.gate.wait()
+        self.handling -= 1
+        if event.id == -1:
+            raise RuntimeError("failed")
+        self.handled.append(event.id)
+
+
+def test_event_worker_pool():
+    registry = MetricsRegistry()
+    pool = EventWorkerPool(workers=2, maxsize=3, registry=registry)
+    depth = registry.metrics["hertavilla_event_queue_depth"]
+    in_flight = registry.metrics["hertavilla_event_handlers_in_flight"]
+    rejected = registry.metrics["hertavilla_events_rejected_total"]
+
+    async def run():
+        bot = FakeBot()
+        events = [SimpleNamespace(id=i) for i in (-1, *range(5))]
+        assert all(pool.put_nowait(bot, e) for e in events[:3])  # type: ignore
+        await asyncio.sleep(0)
+        # 两个 worker 各取走一个事件
+        assert pool.in_flight == 2
+        assert len(pool) == 1
+        assert depth.get(bot="bot") == 1
+        assert in_flight.get(bot="bot") == 2
+        assert pool.put_nowait(bot, events[3])  # type: ignore
+        assert pool.put_nowait(bot, events[4])  # type: ignore
+        assert pool.full()
+        assert not pool.put_nowait(bot, events[5])  # type: ignore
+        assert rejected.get(bot="bot") == 1
+
+        # 队列满时 put 等待
+        put = asyncio.create_task(pool.put(bot, events[5]))  # type: ignore
+        await asyncio.sleep(0)
+        assert not put.done()
+        bot.gate.set()
+        await put
+        await pool.join()
+        assert sorted(bot.handled) == [0, 1, 2, 3, 4]
+        assert bot.max_concurrency == 2
+        assert depth.get(bot="bot") == 0
+        assert in_flight.get(bot="bot") == 0
+        await pool.close()
+
+    asyncio.run(run())
+
+
+def test_event_worker_pool_close():
+    pool = EventWorkerPool(workers=1, registry=MetricsRegistry())
+
+    async def run():
+        bot = FakeBot()
+        # 等待后续事件的处理器不会让关闭一直挂起
+        assert pool.put_nowait(bot, SimpleNamespace(id=0))  # type: ignore
+        await asyncio.sleep(0)
+        await asyncio.wait_for(pool.close(0.05), 1)
+        assert pool.closed
+        assert pool.in_flight == 0
+        # 关闭后不再接受事件，也不会重新启动 worker
+        assert not pool.put_nowait(bot, SimpleNamespace(id=1))  # type: ignore
+        assert not await pool.put(bot, SimpleNamespace(id=2))  # type: ignore
+        assert not pool._tasks  # noqa: SLF001
+        assert not bot.handled
+
+    asyncio.run(run())
+
+
+def test_run_handles_event_queue_full(signed_callback):
+    from hertavilla.bot import VillaBot
+    from hertavilla.event import CreateRobotEvent, parse_event
+    from hertavilla.server.aiohttp import AIOHTTPBackend
+
+    pool = EventWorkerPool(workers=1, maxsize=1, registry=MetricsRegistry())
+    fill = []
+
+    def parse(payload, lazy):
+        event = parse_event(payload, lazy)
+        if fill:
+            # 解析期间队列被占满
+            pool.put_nowait(bot, fill.pop())
+        return event
+
+    event, body, sign = (
+        signed_callback.event,
+        signed_callback.body,
+        signed_callback.sign,
+    )
+    backend = AIOHTTPBackend(event_parser=parse)
+    bot = backend.bots["bot"] = VillaBot(
+        "bot",
+        "secret",
+        signed_callback.pub_key,
+    )
+    bot.event_pool = pool
+    handled = []
+
+    @bot.listen(CreateRobotEvent)
+    async def on_create(event, bot):
+        handled.append(event)
+
+    async def handle() -> int:
+        resp = await backend._run_handles(sign, body)  # noqa: SLF001
+        return resp.status_code
+
+    async def run() -> list[int]:
+        fill.append(parse_event(event))
+        codes = [await handle(), await handle()]
+        await pool.join()
+        # 被拒绝的事件重试时不视为重复
+        codes.append(await handle())
+        await pool.join()
+        await pool.close()
+        return codes
+
+    assert asyncio.run(run()) == [503, 503, 200]
+    assert len(handled) == 2
+
+
+def test_backend_stops_websocket_before_closing_bots(keypair):
+    from hertavilla.bot import VillaBot
+    from hertavilla.server.aiohttp import AIOHTTPBackend
+
+    calls = []
+
+    class Backend(AIOHTTPBackend):
+        async def _stop_ws(self) -> None:
+            calls.append("stop_ws")
+
+    class Bot(VillaBot):
+        async def close(self, timeout: float | None = 10) -> None:
+            calls.append("close")
+            await super().close(timeout)
+
+    bot = Bot("bot", "secret", keypair[0])
+    asyncio.run(Backend()._close_sessions((bot,)))  # noqa: SLF001
+    assert calls == ["stop_ws", "close"]
+
+
+def test_websocket_stops_when_pool_closed(signed_callback):
+    pytest.importorskip("google.protobuf")
+    from hertavilla.bot import VillaBot
+    from hertavilla.event import parse_event
+    from hertavilla.ws.connection import StopConnecting, WSConnection
+
+    bot = VillaBot("bot", "secret", signed_callback.pub_key)
+    bot.event_pool = EventWorkerPool(workers=1, registry=MetricsRegistry())
+    event = parse_event(signed_callback.event)
+    received = []
+
+    class FakeWS:
+        async def recv(self):
+            if received:
+                raise RuntimeError("read after the pool is closed")
+            received.append(event)
+            return event
+
+    async def run():
+        await bot.event_pool.close()  # type: ignore
+        conn = WSConnection(bot, set())
+        # 关闭后不再继续读取
+        with pytest.raises(StopConnecting):
+            await conn.listen_ws(FakeWS())  # type: ignore
+
+    asyncio.run(run())
+    # 未分发的事件在重连后重新推送时不视为重复
+    assert not bot.deduplicator.is_duplicate("bot", event.id)
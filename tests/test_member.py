@@ -0,0 +1,95 @@
+# ruff: noqa: PLR2004
+from __future__ import annotations
+
+import asyncio
+
+from hertavilla.apis.member import MemberAPIMixin
+from hertavilla.exception import InvalidRequest
+
+import pytest
+
+PAGES = {
+    "0": ([1, 2], "1"),
+    "1": ([3, 4], "2"),
+    "2": ([5], "3"),
+    "3": ([6], ""),
+}
+
+
+class PagedAPI(MemberAPIMixin):
+    def __init__(self, fail: str | None = None, block: str | None = None):
+        super().__init__("bot", "secret", "key")
+        self.fail = fail
+        self.block = block
+        self.requested: list[str] = []
+        self.cancelled = False
+
+    async def get_villa_members(self, villa_id, offset_str="0", size=10):
+        self.requested.append(offset_str)
+        if offset_str == self.fail:
+            raise InvalidRequest(-1, "failed")
+        if offset_str == self.block:
+            try:
+                await asyncio.Event().wait()
+            except asyncio.CancelledError:
+                self.cancelled = True
+                raise
+        return PAGES[offset_str]
+
+
+async def _settle() -> None:
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_iter_villa_members_prefetch():
+    async def run(prefetch: int) -> tuple[list[str], list[int]]:
+        api = PagedAPI()
+        members = api.iter_villa_members(1, prefetch=prefetch)
+        first = [await members.__anext__()]  # type: ignore
+        await _settle()
+        requested = list(api.requested)
+        return requested, first + [member async for member in members]
+
+    # 不预取时，处理完当前页才请求下一页
+    requested, members = asyncio.run(run(0))
+    assert requested == ["0"]
+    assert members == [1, 2, 3, 4, 5, 6]
+    # 缓存一页，另一页取回后等待放入缓存
+    requested, members = asyncio.run(run(1))
+    assert requested == ["0", "1", "2"]
+    assert members == [1, 2, 3, 4, 5, 6]
+
+
+def test_iter_villa_members_prefetch_error():
+    async def run() -> list[int]:
+        api = PagedAPI(fail="1")
+        received = []
+        with pytest.raises(InvalidRequest):
+            async for member in api.iter_villa_members(1, prefetch=2):
+                received.append(member)
+        return received
+
+    # 预取页面的错误在处理完之前的页面后抛出
+    assert asyncio.run(run()) == [1, 2]
+
+
+def test_iter_villa_members_cancel_prefetch():
+    async def run(close: bool) -> bool:
+        api = PagedAPI(block="1")
+        members = api.iter_villa_members(1)
+        async for _ in members:
+            break
+        await _settle()
+        assert api.requested == ["0", "1"]
+        if close:
+            await members.aclose()
+        else:
+            # 提前退出循环后，生成器被回收时关闭
+            del members
+        await _settle()
+        # 在事件循环关闭（取消剩余任务）之前检查
+        return api.cancelled
+
+    assert asyncio.run(run(close=True))
+    assert asyncio.run(run(close=False))
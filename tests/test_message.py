@@ -0,0 +1,185 @@
+# ruff: noqa: PLR2004
+from __future__ import annotations
+
+import asyncio
+import copy
+import re
+from types import SimpleNamespace
+
+from hertavilla.message import MentionedAll, MentionedRobot, MessageChain
+from hertavilla.message.entity import entities_to_chain
+from hertavilla.message.text import Link, Text, text_to_content
+
+import pytest
+
+
+def _dump(chain: MessageChain) -> list[tuple[str, dict]]:
+    return [(type(x).__name__, vars(x)) for x in chain]
+
+
+def test_entities_round_trip():
+    bot = SimpleNamespace(name="bot")
+    chains = [
+        MessageChain("hello"),
+        MessageChain([MentionedRobot("bot"), Text("hi")]),
+        MessageChain(
+            [
+                Text("😊你好 "),
+                MentionedAll(),
+                Text("🎉", "bold", "italic"),
+                Link("https://example.com"),
+                Text(" 😊 end"),
+            ],
+        ),
+    ]
+    for chain in chains:
+        info = asyncio.run(text_to_content(list(chain), bot))  # type: ignore
+        content = info["content"]
+        entities = copy.deepcopy(content.entities)
+        decoded = entities_to_chain(content.text, content.entities)
+        assert _dump(decoded) == _dump(chain)
+        # 不会修改传入的 entity
+        assert content.entities == entities
+
+
+def test_entities_utf16_offsets():
+    text = "😊😊 @bot 😊!"
+    entity = {"type": "mentioned_robot", "bot_id": "bot"}
+    chain = entities_to_chain(
+        text,
+        [{"offset": 5, "length": 5, "entity": entity}],
+    )
+    assert _dump(chain) == [
+        ("Text", {"text": "😊😊 ", "styles": ()}),
+        ("MentionedRobot", {"bot_id": "bot"}),
+        ("Text", {"text": "😊!", "styles": ()}),
+    ]
+    # 与上一个 entity 重叠时，之后的偏移仍然正确
+    link = {"type": "link", "url": "u", "requires_bot_access_token": False}
+    bold = {"type": "style", "font_style": "bold"}
+    chain = entities_to_chain(
+        text,
+        [
+            {"offset": 0, "length": 10, "entity": entity},
+            {"offset": 2, "length": 8, "entity": link},
+            {"offset": 10, "length": 2, "entity": bold},
+        ],
+    )
+    assert _dump(chain)[-2:] == [
+        ("Text", {"text": "😊", "styles": ("bold",)}),
+        ("Text", {"text": "!", "styles": ()}),
+    ]
+    with pytest.raises(ValueError):
+        entities_to_chain(
+            text,
+            [{"offset": 0, "length": 1, "entity": {"type": "unknown"}}],
+        )
+
+
+def test_entities_overlapping_styles():
+    text = "@bob hi"
+    mention = {
+        "offset": 0,
+        "length": 5,
+        "entity": {"type": "mentioned_user", "user_id": "1"},
+    }
+    bold = {
+        "offset": 0,
+        "length": 5,
+        "entity": {"type": "style", "font_style": "bold"},
+    }
+    italic = {
+        "offset": 0,
+        "length": 7,
+        "entity": {"type": "style", "font_style": "italic"},
+    }
+    expected = [
+        ("MentionedUser", {"user_id": "1", "_villa_id": 0}),
+        ("Text", {"text": "hi", "styles": ()}),
+    ]
+    # 与其他 entity 重叠的样式被忽略，结果与 entity 的顺序无关
+    for entities in ([bold, mention], [mention, bold], [italic, mention]):
+        chain = entities_to_chain(text, entities)
+        assert _dump(chain) == expected
+        assert chain.plaintext == "hi"
+
+
+def _result(result) -> dict:
+    # re.Match 不能直接比较
+    return {
+        k: v.span() if isinstance(v, re.Match) else v
+        for k, v in vars(result).items()
+    }
+
+
+def test_compiled_matcher():
+    from hertavilla.match import (
+        CompiledMatcher,
+        Endswith,
+        Keywords,
+        Match,
+        MatchResult,
+        Regex,
+        Startswith,
+        current_match_result,
+    )
+
+    class Length(Match):
+        def check(self, chain):
+            return len(chain.plaintext) > 8
+
+    matches = [
+        Startswith("/help"),
+        Startswith("/h"),
+        Endswith("!"),
+        Keywords("hi", "hello"),
+        Keywords("a.b"),
+        Regex(r"/ban (\d+)"),
+        Regex(r"\d+"),
+        Regex("^ab*c"),
+        Length(),
+    ]
+    matcher: CompiledMatcher[int] = CompiledMatcher()
+    for i, match in enumerate(matches):
+        matcher.add(i, match)
+    texts = ["/help me!", "hello there", "/ban 12", "123", "axb", "ac", ""]
+    for text in texts:
+        chain = MessageChain(text)
+        expected = []
+        for i, match in enumerate(matches):
+            current_match_result.set(MatchResult(match=match))
+            if match.check(chain):
+                expected.append((i, _result(current_match_result.get())))
+        assert [
+            (i, _result(result)) for i, result in matcher.matches(chain)
+        ] == expected
+
+    for i in range(len(matches)):
+        matcher.remove(i)
+    assert not matcher.matches(MessageChain("/help me!"))
+
+
+def test_chain_cache():
+    import pickle
+
+    from hertavilla.match import Startswith, current_match_result
+
+    text = "\uff28\uff45\uff4c\uff4c\uff4f"  # 全角 Hello
+    chain = MessageChain(text)
+    assert chain.plaintext == text
+    assert chain.normalized_plaintext == "hello"
+    chain += " world"
+    assert chain.plaintext == f"{text} world"
+    chain[0] = Text("/help")
+    assert chain.plaintext == "/help world"
+    assert chain.copy().plaintext == "/help world"
+    assert pickle.loads(pickle.dumps(chain)).plaintext == "/help world"
+
+    # 相等的匹配规则共享同一个匹配结果
+    assert Startswith("/help").check(chain)
+    result = current_match_result.get()
+    assert Startswith("/help").check(chain)
+    assert current_match_result.get() is result
+    del chain[0]
+    assert not Startswith("/help").check(chain)
+    assert chain.plaintext == " world"
@@ -0,0 +1,26 @@
+# ruff: noqa: PLR2004
+from __future__ import annotations
+
+
+def test_registry():
+    from hertavilla.metrics import MetricsRegistry
+
+    registry = MetricsRegistry()
+    counter = registry.counter("calls_total", "calls", ("api",))
+    assert registry.counter("calls_total") is counter
+    counter.inc(api="/getRoom")
+    counter.inc(2, api="/getRoom")
+    assert counter.get(api="/getRoom") == 3
+
+    hist = registry.histogram("latency", "latency", buckets=(0.1, 1))
+    for value in (0.05, 0.5, 5):
+        hist.observe(value)
+    value = hist.get()
+    assert value is not None
+    assert value.cumulative() == [(0.1, 1), (1, 2), (float("inf"), 3)]
+    assert value.quantile(0.5) == 1
+
+    text = registry.render()
+    assert 'calls_total{api="/getRoom"} 3' in text
+    assert 'latency_bucket{le="+Inf"} 3' in text
+    assert "latency_count 3" in text
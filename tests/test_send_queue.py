@@ -0,0 +1,50 @@
+# ruff: noqa: PLR2004
+from __future__ import annotations
+
+import asyncio
+import random
+
+from hertavilla.send_queue import SendQueue
+
+
+class FakeBot:
+    bot_id = "bot"
+
+    def __init__(self) -> None:
+        self.sent: dict[int, list[str]] = {}
+        self.sending: set[int] = set()
+        self.max_concurrency = 0
+
+    async def send(self, villa_id: int, room_id: int, chain: str) -> str:
+        assert room_id not in self.sending, "room sent concurrently"
+        self.sending.add(room_id)
+        self.max_concurrency = max(self.max_concurrency, len(self.sending))
+        await asyncio.sleep(random.uniform(0, 0.005))
+        self.sending.discard(room_id)
+        if chain == "fail":
+            raise RuntimeError(chain)
+        self.sent.setdefault(room_id, []).append(chain)
+        return f"{room_id}-{chain}"
+
+
+def test_send_queue():
+    bot = FakeBot()
+    queue = SendQueue(workers=3, maxsize=5)
+
+    async def run():
+        futures = [
+            await queue.put(bot, 1, room_id, str(i))  # type: ignore
+            for i in range(10)
+            for room_id in range(4)
+        ]
+        failed = await queue.put(bot, 1, 0, "fail")  # type: ignore
+        await queue.join()
+        assert len(queue) == 0
+        assert queue.rooms == 0
+        assert await futures[0] == "0-0"
+        assert isinstance(failed.exception(), RuntimeError)
+        await queue.close()
+
+    asyncio.run(run())
+    assert bot.sent == {room: [str(i) for i in range(10)] for room in range(4)}
+    assert 1 < bot.max_concurrency <= 3
@@ -0,0 +1,117 @@
+# ruff: noqa: PLR2004
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+
+def test_verifiers(keypair, sign_callback):
+    from hertavilla.bot import VillaBot
+    from hertavilla.verify import CryptographyVerifier, RSAVerifier
+
+    pub_key, _ = keypair
+    body = '{"event": {}}'
+    sign = sign_callback(body)
+
+    verifiers = [RSAVerifier(pub_key)]
+    if _has_cryptography():
+        verifiers.append(CryptographyVerifier(pub_key))
+    for verifier in verifiers:
+        bot = VillaBot("bot", "secret", pub_key, verifier=verifier)
+        assert bot.verify(sign, body)
+        assert not bot.verify(sign, body + " ")
+        bot.verify_in_executor = True
+        assert asyncio.run(bot.verify_async(sign, body))
+
+
+def _has_cryptography() -> bool:
+    try:
+        import cryptography  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def test_default_verifier(keypair):
+    from hertavilla.verify import default_verifier
+
+    pub_key, _ = keypair
+    expected = "cryptography" if _has_cryptography() else "rsa"
+    assert default_verifier(pub_key).name == expected
+    with pytest.raises(ValueError):
+        default_verifier("invalid")
+
+
+def test_run_handles_verifies_before_parsing(signed_callback):
+    import json
+
+    from hertavilla.bot import VillaBot
+    from hertavilla.decoder import parse_event_fast
+    from hertavilla.server.aiohttp import AIOHTTPBackend
+
+    parsed = []
+
+    def parse_event(payload, lazy):
+        parsed.append(payload)
+        return parse_event_fast(payload, lazy)
+
+    event, body, sign = (
+        signed_callback.event,
+        signed_callback.body,
+        signed_callback.sign,
+    )
+    backend = AIOHTTPBackend(event_parser=parse_event)
+    backend.bots["bot"] = VillaBot("bot", "secret", signed_callback.pub_key)
+
+    async def run(sign: str | None, body: str) -> int:
+        resp = await backend._run_handles(sign, body)  # noqa: SLF001
+        return resp.status_code
+
+    assert asyncio.run(run(None, "junk")) == 400
+    assert asyncio.run(run(None, '{"event": {"robot": 1}}')) == 400
+    other = json.dumps(
+        {"event": {**event, "robot": {"template": {"id": "x"}}}},
+    )
+    assert asyncio.run(run(sign, other)) == 404
+    assert asyncio.run(run(None, body)) == 401
+    assert asyncio.run(run(sign, body + " ")) == 401
+    assert not parsed
+    assert asyncio.run(run(sign, body)) == 200
+    assert len(parsed) == 1
+    # 平台重试的回调不会再次分发
+    assert asyncio.run(run(sign, body)) == 200
+    assert len(parsed) == 1
+
+
+def test_rsa_pub_key_lazy(keypair, monkeypatch):
+    from hertavilla.bot import VillaBot
+    from hertavilla.verify import RSAVerifier, Verifier
+
+    import rsa
+
+    class StubVerifier(Verifier):
+        def verify(self, sign: bytes, message: bytes) -> bool:
+            return True
+
+    pub_key, _ = keypair
+    verifier = RSAVerifier(pub_key)
+    load = rsa.PublicKey.load_pkcs1_openssl_pem
+    calls = []
+
+    def counting_load(data):
+        calls.append(data)
+        return load(data)
+
+    monkeypatch.setattr(rsa.PublicKey, "load_pkcs1_openssl_pem", counting_load)
+    # 使用 RSAVerifier 时复用其已解析的公钥
+    bot = VillaBot("bot", "secret", pub_key, verifier=verifier)
+    assert bot.rsa_pub_key is verifier.key
+    assert not calls
+
+    # 构造时不解析，首次访问时解析一次
+    bot = VillaBot("bot", "secret", pub_key, verifier=StubVerifier(pub_key))
+    assert not calls
+    assert bot.rsa_pub_key == verifier.key
+    assert bot.rsa_pub_key == verifier.key
+    assert len(calls) == 1